@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from typing import Iterable
+import numpy as np
 import pandas as pd
 
+from .config import ROLLING_MIN_COUNT, ROLLING_WINDOWS
+
 
 def add_month(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -10,19 +14,94 @@ def add_month(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def rolling_mean(df: pd.DataFrame, window: int = 7) -> pd.DataFrame:
-    df = df.copy()
-    if "date" in df.columns:
-        df = df.sort_values("date")
-    numeric_cols = df.select_dtypes(include=["number"]).columns
-    df[numeric_cols] = df[numeric_cols].rolling(window=window, min_periods=1).mean()
-    return df
+def _window_bounds(window: int, center: bool) -> tuple[int, int]:
+    # Days before and after each date covered by a `window`-day window (even centered
+    # windows lean forward one day, as pandas' centered offset windows, e.g. "30D")
+    if center:
+        return (window - 1) // 2, window // 2
+    return window - 1, 0
+
+
+def window_reach(windows: Iterable[int], center: bool = False) -> tuple[int, int]:
+    # Most days any of `windows` looks back and ahead
+    bounds = [_window_bounds(window, center) for window in windows]
+    return max((b for b, _ in bounds), default=0), max((a for _, a in bounds), default=0)
+
+
+def rolling_mean(
+    df: pd.DataFrame,
+    windows: Iterable[int] = ROLLING_WINDOWS,
+    cols: list[str] | None = None,
+    center: bool = False,
+    min_count: dict[int, int] | None = None,
+) -> pd.DataFrame:
+    # Time-based means over calendar-day windows (a 7-day window never spans more than 7
+    # days, whatever is missing), trailing or centered, for all windows and columns in one
+    # pass. Multi-site frames are windowed per 'site'. A mean needs at least min_count[window]
+    # observations of that column inside the window, else NaN. Output rows are sorted by
+    # (site, date) and hold the keys plus one <col>_<window>d column per column and window.
+    windows = list(windows)
+    min_count = ROLLING_MIN_COUNT if min_count is None else min_count
+    if cols is None:
+        cols = [c for c in df.select_dtypes(include=["number"]).columns if c != "site"]
+    keys = [c for c in ("site", "date") if c in df.columns]
+    if "date" not in keys:
+        raise ValueError("No 'date' column available for time-based rolling windows")
+
+    ordered = df.sort_values(keys, kind="stable")
+    site = pd.factorize(ordered["site"])[0] if "site" in keys else np.zeros(len(ordered), dtype=np.int64)
+    dated = ordered["date"].notna().to_numpy()
+    day = ordered["date"].to_numpy("datetime64[D]").astype(np.int64)
+    day = day - (day[dated].min() if dated.any() else 0)
+    # One sorted integer key per row; undated rows (sorted last) sit beyond every window and
+    # sites are spaced further apart than any window reaches
+    reach = max(windows, default=0) + 1
+    last = int(day[dated].max()) if dated.any() else 0
+    day = np.where(dated, day, last + reach)
+    key = site * (last + 2 * reach) + day
+
+    values = ordered[cols].to_numpy(dtype=float)
+    observed = np.isfinite(values) & dated[:, None]
+    # Cumulative sums around the column means limit cancellation over long series
+    n_obs = observed.sum(axis=0)
+    offset = np.where(observed, values, 0.0).sum(axis=0) / np.maximum(n_obs, 1)
+    # Running sums and observation counts side by side: one gather per window edge
+    k = len(cols)
+    running = np.zeros((len(ordered) + 1, 2 * k))
+    np.cumsum(np.where(observed, values - offset, 0.0), axis=0, out=running[1:, :k])
+    np.cumsum(observed, axis=0, out=running[1:, k:])
+
+    out = np.full((len(ordered), len(windows) * k), np.nan)
+    for i, window in enumerate(windows):
+        before, after = _window_bounds(window, center)
+        lo = np.searchsorted(key, key - before, side="left")
+        hi = np.searchsorted(key, key + after, side="right")
+        totals = running[hi]
+        totals -= running[lo]
+        ok = (totals[:, k:] >= max(min_count.get(window, 1), 1)) & dated[:, None]
+        block = out[:, i * k : (i + 1) * k]
+        np.divide(totals[:, :k], totals[:, k:], out=block, where=ok)
+        block += offset
+
+    names = [f"{col}_{window}d" for window in windows for col in cols]
+    result = pd.DataFrame(out, columns=names)
+    for col in reversed(keys):
+        result.insert(0, col, ordered[col].to_numpy())
+    return result
 
 
-def monthly_sum(df: pd.DataFrame, value_cols: list[str]) -> pd.DataFrame:
+def monthly_sum(df: pd.DataFrame, value_cols: list[str], complete: bool = False) -> pd.DataFrame:
+    # Totals per month, and per site for long multi-site frames. With `complete`, a total needs
+    # a value on every calendar day of the month; months with missing days (unfilled values or
+    # dates without a row) are NaN rather than under-reported.
     df = add_month(df)
     if "month" not in df.columns:
         raise ValueError("No 'month' column available for aggregation")
 
-    agg = df.groupby("month")[value_cols].sum().reset_index()
-    return agg
+    keys = [c for c in ("site", "month") if c in df.columns]
+    groups = df.groupby(keys, observed=True)[value_cols]
+    totals = groups.sum()
+    if complete:
+        days = totals.index.get_level_values("month").days_in_month.to_numpy()
+        totals = totals.where(groups.count().to_numpy() >= days[:, None])
+    return totals.reset_index()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import os
+import numpy as np
+import pandas as pd
+
+from . import eto
+from .config import ASTRO_CACHE_DIR, ASTRO_EXACT_MAX_LATS, ASTRO_LAT_STEP
+
+# Lookup tables for the astronomical terms of FAO-56 that depend only on latitude and day
+# of year: Ra (eq. 21), daylength N (eq. 34) and, scaled by altitude, Rso (eq. 37). The
+# trigonometry runs once per (latitude, doy) instead of once per station-day.
+TABLE_VERSION = 1
+DOYS = np.arange(1, 367)
+
+
+@dataclass(frozen=True)
+class AstronomyTable:
+    # Ra (MJ m-2 d-1) and N (h) on a regular latitude grid from -90 to 90 for doy 1..366.
+    # Day-major, so a lookup gathers along contiguous latitude rows.
+    lat_step: float
+    ra: np.ndarray  # (366, n_lat)
+    daylength: np.ndarray  # (366, n_lat)
+
+
+_tables: dict[tuple[float, str], AstronomyTable] = {}
+
+
+def _exact_rows(lats: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # (366, len(lats)) Ra and N, evaluated with eto's formulas
+    lats = np.asarray(lats, dtype=float)[None, :]
+    return eto.extraterrestrial_radiation(lats, DOYS[:, None]), eto.daylight_hours(lats, DOYS[:, None])
+
+
+def _n_lat(lat_step: float) -> int:
+    return int(round(180 / lat_step)) + 1
+
+
+def build_table(lat_step: float = ASTRO_LAT_STEP) -> AstronomyTable:
+    ra, daylength = _exact_rows(np.linspace(-90.0, 90.0, _n_lat(lat_step)))
+    return AstronomyTable(lat_step, ra, daylength)
+
+
+def table_path(lat_step: float, cache_dir: Path = ASTRO_CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"fao56_step{lat_step:g}_v{TABLE_VERSION}.npy"
+
+
+def load_table(lat_step: float = ASTRO_LAT_STEP, cache_dir: Path = ASTRO_CACHE_DIR) -> AstronomyTable:
+    # Memoized per process; on disk as one (2, 366, n_lat) array, memory-mapped when read.
+    # A missing, stale or unreadable file is rebuilt; an unwritable cache dir only costs
+    # the rebuild in the next process.
+    key = (lat_step, str(cache_dir))
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    path = table_path(lat_step, cache_dir)
+    try:
+        stacked = np.load(path, mmap_mode="r")
+        if stacked.shape != (2, DOYS.size, _n_lat(lat_step)):
+            raise ValueError(f"Unexpected table shape {stacked.shape}")
+        table = AstronomyTable(lat_step, stacked[0], stacked[1])
+    except (OSError, ValueError):
+        table = build_table(lat_step)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with tmp.open("wb") as handle:
+                np.save(handle, np.stack([table.ra, table.daylength]))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    _tables[key] = table
+    return table
+
+
+def _few_latitudes(lat: np.ndarray) -> bool:
+    # Station data: few latitudes, either as a short array to broadcast or in long runs
+    # (one per station in long frames). Counting runs avoids hashing every row.
+    if lat.size <= ASTRO_EXACT_MAX_LATS:
+        return True
+    flat = lat.ravel()
+    return np.count_nonzero(flat[1:] != flat[:-1]) < ASTRO_EXACT_MAX_LATS
+
+
+def lookup(
+    lat_deg: float | np.ndarray,
+    doy: np.ndarray,
+    lat_step: float = ASTRO_LAT_STEP,
+    cache_dir: Path = ASTRO_CACHE_DIR,
+) -> tuple[np.ndarray, np.ndarray]:
+    # (Ra, N) for broadcast latitudes and days of year. Station latitudes get exact rows,
+    # identical to eto's formulas; many distinct latitudes (gridded inputs) are interpolated
+    # linearly on the cached grid (at the default step, within 1e-4 MJ m-2 d-1 and 1e-3 h
+    # outside the polar regions). NaN latitudes and days outside 1..366 give NaN.
+    lat_in = np.asarray(lat_deg, dtype=float)
+    lat, doy = np.broadcast_arrays(lat_in, np.asarray(doy, dtype=float))
+    shape = lat.shape
+    lat, doy = lat.ravel(), doy.ravel()
+    valid = (doy >= 1) & (doy <= DOYS[-1]) & np.isfinite(lat)
+    if not valid.any():
+        return np.full(shape, np.nan), np.full(shape, np.nan)
+    day = np.where(valid, doy, 1).astype(np.int64) - 1
+
+    if _few_latitudes(lat_in):
+        codes, uniques = pd.factorize(lat)
+        ra_rows, n_rows = _exact_rows(uniques)
+        flat = day * len(uniques) + np.where(valid, codes, 0)
+        ra, daylength = ra_rows.ravel()[flat], n_rows.ravel()[flat]
+    else:
+        table = load_table(lat_step, cache_dir)
+        n_lat = table.ra.shape[1]
+        position = (np.clip(np.where(valid, lat, 0.0), -90.0, 90.0) + 90.0) / lat_step
+        below = np.minimum(position.astype(np.int64), n_lat - 2)
+        weight = position - below
+        flat = day * n_lat + below
+        ra_table, n_table = table.ra.ravel(), table.daylength.ravel()
+        ra = ra_table[flat] * (1 - weight) + ra_table[flat + 1] * weight
+        daylength = n_table[flat] * (1 - weight) + n_table[flat + 1] * weight
+
+    ra = np.where(valid, ra, np.nan).reshape(shape)
+    daylength = np.where(valid, daylength, np.nan).reshape(shape)
+    return ra, daylength
+
+
+def extraterrestrial_radiation(lat_deg: float | np.ndarray, doy: np.ndarray) -> np.ndarray:
+    # Ra (MJ m-2 d-1) from the tables
+    return lookup(lat_deg, doy)[0]
+
+
+def daylight_hours(lat_deg: float | np.ndarray, doy: np.ndarray) -> np.ndarray:
+    # N (h) from the tables
+    return lookup(lat_deg, doy)[1]
+
+
+def clear_sky_radiation(lat_deg: float | np.ndarray, doy: np.ndarray, alt_m: float | np.ndarray) -> np.ndarray:
+    # Rso (MJ m-2 d-1): linear in altitude, so only Ra is tabulated
+    return eto.clear_sky_radiation(extraterrestrial_radiation(lat_deg, doy), alt_m)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+
+from . import aggregate, cleaning, eto, io, metrics, plots, synthetic
+from .config import (
+    BASE_DIR,
+    BENCH_REPEAT,
+    BENCH_TOLERANCE,
+    DEFAULT_YEAR,
+    METHOD_COLUMNS,
+)
+from .pipeline import REF_COL
+
+# Timed benchmarks over synthetic stations (synthetic.py) at several sizes. Every run is
+# appended to <root>/history.csv and compared with the previous run on the same host.
+HISTORY = "history.csv"
+RESULT_COLUMNS = ["benchmark", "stations", "years", "rows", "repeat", "best_s", "median_s", "rows_per_s"]
+
+
+@dataclass
+class Fixture:
+    # Inputs shared by the benchmarks of one size
+    stations: dict[str, dict]
+    years: int
+    raw: pd.DataFrame  # long synthetic frame with gaps
+    daily: pd.DataFrame  # cleaned raw
+    site_daily: pd.DataFrame  # first station only (per-station steps: workbook, figures)
+    monthly: pd.DataFrame
+    method_cols: list[str]
+    workdir: Path
+
+    @property
+    def compare_cols(self) -> list[str]:
+        return [c for c in self.method_cols if c != REF_COL]
+
+
+def make_fixture(n_stations: int, years: int, workdir: Path, seed: int = 0) -> Fixture:
+    stations = synthetic.synthetic_stations(n_stations, seed)
+    raw = synthetic.synthetic_daily(stations, years, DEFAULT_YEAR, seed=seed)
+    daily = cleaning.clean_daily(raw)
+    method_cols = [c for c in METHOD_COLUMNS.values() if c in daily.columns]
+    first = next(iter(stations))
+    site_daily = daily[daily["site"] == first].drop(columns="site").reset_index(drop=True)
+    synthetic.write_workbook(raw[raw["site"] == first], stations, workdir / "synthetic.xlsx")
+    return Fixture(
+        stations=stations,
+        years=years,
+        raw=raw,
+        daily=daily,
+        site_daily=site_daily,
+        monthly=aggregate.monthly_sum(site_daily, method_cols),
+        method_cols=method_cols,
+        workdir=workdir,
+    )
+
+
+def _read_sheet(fx: Fixture) -> pd.DataFrame:
+    sheet = next(iter(fx.stations.values()))["sheet"]
+    return io.read_evapo_sheet(fx.workdir / "synthetic.xlsx", sheet, DEFAULT_YEAR, use_cache=False)
+
+
+def _compute_eto(fx: Fixture) -> None:
+    lat = fx.daily["site"].map({site: meta["lat"] for site, meta in fx.stations.items()}).to_numpy()
+    alt_m = fx.daily["site"].map({site: meta["alt_m"] for site, meta in fx.stations.items()}).to_numpy()
+    eto.compute_eto(fx.daily, lat=lat, alt_m=alt_m)
+
+
+def _scatter(fx: Fixture) -> None:
+    plots.plot_scatter(fx.site_daily, REF_COL, fx.compare_cols[0], fx.workdir / "scatter.png")
+
+
+def _timeseries(fx: Fixture) -> None:
+    plots.plot_timeseries(fx.site_daily, REF_COL, fx.compare_cols[0], fx.workdir / "timeseries.png")
+
+
+def _monthly_totals(fx: Fixture) -> None:
+    plots.plot_monthly_totals(fx.monthly, fx.method_cols, fx.workdir / "monthly.png")
+
+
+def _taylor(fx: Fixture) -> None:
+    plots.plot_taylor(fx.site_daily, REF_COL, fx.compare_cols, fx.workdir / "taylor.png", "Taylor")
+
+
+def _all_rows(fx: Fixture) -> int:
+    return len(fx.daily)
+
+
+def _site_rows(fx: Fixture) -> int:
+    return len(fx.site_daily)
+
+
+# name -> (timed call on a fixture, rows it processes)
+BENCHMARKS: dict[str, tuple[Callable[[Fixture], Any], Callable[[Fixture], int]]] = {
+    "read_evapo_sheet": (_read_sheet, _site_rows),
+    "clean_daily": (lambda fx: cleaning.clean_daily(fx.raw), _all_rows),
+    "compute_eto": (_compute_eto, _all_rows),
+    "rolling_mean": (lambda fx: aggregate.rolling_mean(fx.daily), _all_rows),
+    "monthly_sum": (lambda fx: aggregate.monthly_sum(fx.daily, fx.method_cols), _all_rows),
+    "compute_metrics": (lambda fx: metrics.compute_metrics(fx.daily, REF_COL, fx.compare_cols), _all_rows),
+    "plot_scatter": (_scatter, _site_rows),
+    "plot_timeseries": (_timeseries, _site_rows),
+    "plot_monthly_totals": (_monthly_totals, lambda fx: len(fx.monthly)),
+    "plot_taylor": (_taylor, _site_rows),
+}
+
+
+def time_call(func: Callable[[], Any], repeat: int = BENCH_REPEAT) -> list[float]:
+    # Wall times of `repeat` calls after one untimed warm-up (imports, caches, first allocation)
+    func()
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    return times
+
+
+def run_benchmarks(
+    sizes: list[tuple[int, int]], repeat: int = BENCH_REPEAT, only: list[str] | None = None, seed: int = 0
+) -> pd.DataFrame:
+    names = list(BENCHMARKS) if not only else only
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown} (expected some of {list(BENCHMARKS)})")
+
+    rows = []
+    for n_stations, years in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            fx = make_fixture(n_stations, years, Path(tmp), seed)
+            for name in names:
+                call, count = BENCHMARKS[name]
+                times = time_call(partial(call, fx), repeat)
+                median = float(np.median(times))
+                n_rows = count(fx)
+                rows.append([name, n_stations, years, n_rows, repeat, min(times), median, n_rows / median])
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def _commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return out.stdout.strip()
+
+
+def record_run(results: pd.DataFrame, root: Path) -> pd.DataFrame:
+    # Tag the results with run/environment details and append them to the history file
+    run = results.assign(
+        run_id=datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        commit=_commit(),
+        host=platform.node(),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        pandas=pd.__version__,
+    )
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / HISTORY
+    run.to_csv(path, mode="a", header=not path.exists(), index=False)
+    return run
+
+
+def read_history(root: Path) -> pd.DataFrame | None:
+    path = root / HISTORY
+    return pd.read_csv(path, dtype={"run_id": str, "commit": str}) if path.exists() else None
+
+
+def compare_runs(
+    run: pd.DataFrame, history: pd.DataFrame | None, baseline: str | None = None, tolerance: float = BENCH_TOLERANCE
+) -> pd.DataFrame:
+    # Median time against a baseline run: `baseline` (a run_id) or the latest earlier run on
+    # the same host. Rows slower than (1 + tolerance) x baseline are flagged as regressions.
+    keys = ["benchmark", "stations", "years"]
+    out = run[[*keys, "rows", "median_s"]].copy()
+    out["baseline_s"] = np.nan
+    if history is not None:
+        current = run["run_id"].iloc[0]
+        earlier = history[history["run_id"] != current]
+        if baseline is not None:
+            earlier = earlier[earlier["run_id"] == baseline]
+        else:
+            earlier = earlier[earlier["host"] == run["host"].iloc[0]]
+        if not earlier.empty:
+            # Latest measurement of each benchmark and size
+            latest = earlier.sort_values("run_id").drop_duplicates(keys, keep="last")
+            out = out.drop(columns="baseline_s").merge(
+                latest[[*keys, "median_s"]].rename(columns={"median_s": "baseline_s"}), on=keys, how="left"
+            )
+    out["ratio"] = out["median_s"] / out["baseline_s"]
+    out["regression"] = out["ratio"] > 1 + tolerance
+    return out
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import warnings
+import numpy as np
+import pandas as pd
+
+from .config import BOOTSTRAP_CHUNK_MB
+from .metrics import batch_scores
+
+METRICS = ("rmse", "mae", "mbe", "r2", "willmott_d")
+
+# Peak working memory per resampled (day, method) cell: the gathered series and the
+# batch_scores buffers, ~35 B measured with missing values; used to size batches from a
+# memory budget
+BYTES_PER_RESAMPLE_CELL = 40
+
+
+def block_indices(n: int, n_boot: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    # Moving-block bootstrap: (n_boot, n) row indices built from random contiguous blocks
+    block = max(1, min(block, n))
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(n_boot, n_blocks))
+    idx = starts[:, :, None] + np.arange(block)
+    return idx.reshape(n_boot, n_blocks * block)[:, :n]
+
+
+def resample_scores(ref: np.ndarray, preds: np.ndarray, idx: np.ndarray) -> dict[str, np.ndarray]:
+    # Skill scores for every resample and method at once: arrays of shape (n_boot, k)
+    return batch_scores(ref[idx][:, :, None], preds[idx])
+
+
+def _batch(ref: np.ndarray, preds: np.ndarray, block: int, seeds: list[np.random.SeedSequence]) -> dict:
+    # Each resample draws its blocks from its own seed, so results do not depend on the
+    # batch size or on how batches are spread over workers
+    idx = np.concatenate([block_indices(len(ref), 1, block, np.random.default_rng(seed)) for seed in seeds])
+    return resample_scores(ref, preds, idx)
+
+
+def bootstrap_metrics(
+    df: pd.DataFrame,
+    ref_col: str,
+    method_cols: list[str],
+    n_boot: int = 1000,
+    block: int = 7,
+    alpha: float = 0.05,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_mb: float = BOOTSTRAP_CHUNK_MB,
+) -> pd.DataFrame:
+    # Long table: method, metric, estimate (full sample) and percentile interval bounds.
+    # Resamples run in batches sized to `chunk_mb` of working memory per worker.
+    ref = df[ref_col].to_numpy(dtype=float)
+    preds = df[method_cols].to_numpy(dtype=float).reshape(len(df), len(method_cols))
+    if len(df) == 0:
+        raise ValueError("Cannot bootstrap an empty series")
+
+    per_batch = max(1, int(chunk_mb * 2**20 // (preds.size * BYTES_PER_RESAMPLE_CELL)))
+    seeds = np.random.SeedSequence(seed).spawn(n_boot)
+    chunks = [seeds[start : start + per_batch] for start in range(0, n_boot, per_batch)]
+    if workers <= 1 or len(chunks) <= 1:
+        batches = [_batch(ref, preds, block, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(_batch, repeat(ref), repeat(preds), repeat(block), chunks))
+
+    full = resample_scores(ref, preds, np.arange(len(ref))[None, :])
+    estimate = np.column_stack([full[metric][0] for metric in METRICS])
+    bounds = []
+    for metric in METRICS:
+        samples = np.concatenate([batch[metric] for batch in batches], axis=0)
+        with warnings.catch_warnings():
+            # Metrics undefined in every resample (e.g. r2 of a constant series) stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            bounds.append(np.nanpercentile(samples, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0))
+    low = np.column_stack([b[0] for b in bounds])
+    high = np.column_stack([b[1] for b in bounds])
+
+    return pd.DataFrame(
+        {
+            "method": np.repeat(method_cols, len(METRICS)),
+            "metric": np.tile(METRICS, len(method_cols)),
+            "estimate": estimate.ravel(),
+            "ci_low": low.ravel(),
+            "ci_high": high.ravel(),
+        }
+    )
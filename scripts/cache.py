@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import pickle
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+import pandas as pd
+
+from .config import CACHE_DIR, CACHE_MAX_BYTES, METHOD_COLUMNS, WEATHER_COLUMNS
+
+# Bump when the parsing logic in io.py changes so stale entries stop matching
+CACHE_VERSION = 2
+
+_CHUNK = 1 << 20
+_file_digests: dict[tuple[str, int, int, str], str] = {}
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+# Workbook-wide parts that change how any sheet is decoded (strings, number formats)
+_SHARED_PARTS = ("xl/sharedStrings.xml", "xl/styles.xml")
+
+
+def _xlsx_sheet_part(archive: zipfile.ZipFile, workbook: ET.Element, sheet: str) -> str | None:
+    rel_id = None
+    for node in workbook.iter(f"{_NS_MAIN}sheet"):
+        if node.get("name") == sheet:
+            rel_id = node.get(f"{_NS_REL}id")
+            break
+    if rel_id is None:
+        return None
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for node in rels.iter(f"{_NS_PKG_REL}Relationship"):
+        if node.get("Id") == rel_id:
+            target = node.get("Target", "")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+    return None
+
+
+def _xlsx_date1904(workbook: ET.Element) -> bool:
+    # Workbook-wide date system: the same serial numbers are dates four years apart
+    node = workbook.find(f"{_NS_MAIN}workbookPr")
+    return node is not None and node.get("date1904", "0").lower() in ("1", "true")
+
+
+def _hash_stream(hasher, handle) -> None:
+    for chunk in iter(lambda: handle.read(_CHUNK), b""):
+        hasher.update(chunk)
+
+
+def sheet_digest(path: Path, sheet: str) -> str:
+    # Content hash of one sheet: for .xlsx only the sheet's own XML part plus the shared
+    # string/style tables and the date system are hashed, so editing another sheet leaves
+    # this digest unchanged.
+    # Other formats fall back to hashing the whole file. Memoized per (path, size, mtime).
+    path = Path(path)
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns, sheet)
+    digest = _file_digests.get(memo_key)
+    if digest is not None:
+        return digest
+
+    hasher = hashlib.sha256()
+    part = None
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            try:
+                workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+                part = _xlsx_sheet_part(archive, workbook, sheet)
+            except (KeyError, ET.ParseError):
+                part = None
+            if part is not None and part in archive.namelist():
+                hasher.update(b"date1904" if _xlsx_date1904(workbook) else b"date1900")
+                names = set(archive.namelist())
+                for name in (part, *_SHARED_PARTS):
+                    if name in names:
+                        hasher.update(name.encode("utf-8"))
+                        with archive.open(name) as handle:
+                            _hash_stream(hasher, handle)
+            else:
+                part = None
+    if part is None:
+        with path.open("rb") as handle:
+            _hash_stream(hasher, handle)
+
+    digest = hasher.hexdigest()
+    _file_digests[memo_key] = digest
+    return digest
+
+
+def sheet_key(path: Path, sheet: str, year: int) -> str:
+    payload = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "content": sheet_digest(path, sheet),
+            "sheet": sheet,
+            "year": year,
+            "weather": WEATHER_COLUMNS,
+            "methods": METHOD_COLUMNS,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SheetCache:
+    """Size-bounded on-disk cache of parsed sheets, evicting least recently used entries."""
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _entries(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return [p for p in self.root.iterdir() if p.suffix in (".parquet", ".pkl")]
+
+    def _find(self, key: str) -> Path | None:
+        for suffix in (".parquet", ".pkl"):
+            path = self.root / f"{key}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._find(key)
+        if path is None:
+            return None
+        try:
+            if path.suffix == ".parquet":
+                df = pd.read_parquet(path)
+            else:
+                with path.open("rb") as handle:
+                    df = pickle.load(handle)
+        except (OSError, ValueError, ImportError, pickle.UnpicklingError, EOFError):
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # mark as recently used
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{key}.parquet"
+        tmp = path.with_suffix(".tmp")
+        try:
+            df.to_parquet(tmp, index=False)
+        except (ImportError, ValueError, TypeError):
+            # No Parquet engine, or column types Parquet cannot hold
+            path = self.root / f"{key}.pkl"
+            tmp = path.with_suffix(".tmp")
+            with tmp.open("wb") as handle:
+                pickle.dump(df, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self._entries():
+            path.unlink(missing_ok=True)
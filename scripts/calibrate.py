@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .config import CALIBRATION_MODELS
+
+# scale: ref ~ b * method (through the origin, as in the legacy coefficient table)
+# linear: ref ~ a + b * method
+MODELS = CALIBRATION_MODELS
+CALIBRATED_SUFFIX = "_cal"
+
+
+def _design(preds: np.ndarray, model: str) -> np.ndarray:
+    # (n, k, p) regressors per method
+    if model == "scale":
+        return preds[:, :, None]
+    if model == "linear":
+        return np.stack([np.ones_like(preds), preds], axis=-1)
+    raise ValueError(f"Unknown calibration model '{model}' (expected one of {MODELS})")
+
+
+def _normal_sums(
+    ref: np.ndarray, preds: np.ndarray, codes: np.ndarray, n_groups: int, model: str
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Per (group, method) X'X, X'y and counts, accumulated with one bincount per entry
+    mask = np.isfinite(ref)[:, None] & np.isfinite(preds)
+    x = _design(np.where(mask, preds, 0.0), model) * mask[:, :, None]
+    y = np.where(mask, ref[:, None], 0.0)
+    k, p = x.shape[1], x.shape[2]
+    cell = (codes[:, None] * k + np.arange(k)).ravel()
+    size = n_groups * k
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(cell, weights=values.ravel(), minlength=size).reshape(n_groups, k)
+
+    xtx = np.empty((n_groups, k, p, p))
+    xty = np.empty((n_groups, k, p))
+    for i in range(p):
+        xty[..., i] = total(x[..., i] * y)
+        for j in range(i, p):
+            xtx[..., i, j] = xtx[..., j, i] = total(x[..., i] * x[..., j])
+    return xtx, xty, total(mask.astype(float))
+
+
+def _solve(xtx: np.ndarray, xty: np.ndarray) -> np.ndarray:
+    # Batched least squares from normal equations; singular systems give NaN coefficients
+    p = xtx.shape[-1]
+    scale = np.prod(np.diagonal(xtx, axis1=-2, axis2=-1), axis=-1)
+    ok = (scale > 0) & (np.linalg.det(xtx) > 1e-12 * scale)
+    safe = np.where(ok[..., None, None], xtx, np.eye(p))
+    coef = np.linalg.solve(safe, xty[..., None])[..., 0]
+    return np.where(ok[..., None], coef, np.nan)
+
+
+def _as_intercept_slope(coef: np.ndarray, model: str) -> tuple[np.ndarray, np.ndarray]:
+    if model == "scale":
+        return np.zeros(coef.shape[:-1]), coef[..., 0]
+    return coef[..., 0], coef[..., 1]
+
+
+def fold_codes(dates: pd.Series, cv: str, folds: int = 5) -> np.ndarray:
+    # Fold index per row: 'month' leaves one calendar month out, 'kfold' uses contiguous
+    # blocks (keeps autocorrelated neighbours together)
+    if cv == "month":
+        return pd.factorize(dates.dt.to_period("M"), sort=True)[0]
+    if cv == "kfold":
+        order = np.argsort(np.argsort(dates.to_numpy(), kind="stable"), kind="stable")
+        return (order * folds // max(len(dates), 1)).astype(int)
+    raise ValueError(f"Unknown cross-validation scheme '{cv}' (expected 'month' or 'kfold')")
+
+
+def calibrate(
+    df: pd.DataFrame,
+    ref_col: str,
+    method_cols: list[str],
+    model: str = "scale",
+    cv: str | None = "month",
+    folds: int = 5,
+) -> pd.DataFrame:
+    # Coefficients fitted on all rows for every method, plus out-of-fold skill of the
+    # corrected methods. All folds and methods are solved together: fold fits reuse the
+    # per-fold normal sums (total minus the held-out fold), so there is no refit loop.
+    if cv:
+        df = df[df["date"].notna()]  # undated rows belong to no fold
+    ref = df[ref_col].to_numpy(dtype=float)
+    preds = df[method_cols].to_numpy(dtype=float).reshape(len(df), len(method_cols))
+
+    codes = fold_codes(df["date"], cv, folds) if cv else np.zeros(len(df), dtype=int)
+    n_groups = int(codes.max()) + 1 if len(codes) else 1
+    xtx, xty, counts = _normal_sums(ref, preds, codes, n_groups, model)
+
+    intercept, slope = _as_intercept_slope(_solve(xtx.sum(axis=0), xty.sum(axis=0)), model)
+    table = pd.DataFrame(
+        {"method": method_cols, "model": model, "intercept": intercept, "slope": slope, "n": counts.sum(axis=0)}
+    )
+    if not cv:
+        return table
+
+    fold_a, fold_b = _as_intercept_slope(_solve(xtx.sum(axis=0) - xtx, xty.sum(axis=0) - xty), model)
+    corrected = fold_a[codes] + fold_b[codes] * preds
+    cv_frame = pd.DataFrame(corrected, columns=method_cols).assign(**{ref_col: ref})
+    scores = metrics.compute_metrics(cv_frame, ref_col, method_cols).drop(columns="method")
+    table["cv"] = cv if cv == "month" else f"{cv}{folds}"
+    return pd.concat([table, scores.add_prefix("cv_")], axis=1)
+
+
+def apply_calibration(df: pd.DataFrame, coefficients: pd.DataFrame) -> pd.DataFrame:
+    # Adds <method>_cal columns for every method with stored coefficients
+    df = df.copy()
+    for row in coefficients.itertuples(index=False):
+        if row.method in df.columns:
+            df[f"{row.method}{CALIBRATED_SUFFIX}"] = row.intercept + row.slope * df[row.method]
+    return df
+
+
+def coefficients_path(output_dir: Path, site: str) -> Path:
+    return output_dir / f"{site}_calibration.csv"
+
+
+def read_coefficients(output_dir: Path, site: str) -> pd.DataFrame | None:
+    path = coefficients_path(output_dir, site)
+    return pd.read_csv(path) if path.exists() else None
@@ -1,20 +1,221 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
+from .config import (
+    CLIMATOLOGY_MIN_OBS,
+    CLIMATOLOGY_MIN_SHARE,
+    CLIMATOLOGY_WINDOW_DAYS,
+    GAP_FILL,
+    GAP_FILL_DEFAULT,
+    WEATHER_COLUMNS,
+)
 
-def clean_daily(df: pd.DataFrame) -> pd.DataFrame:
+# Per-cell fill flags (uint8), stored next to the cleaned data
+OBSERVED = 0
+INTERPOLATED = 1
+CLIMATOLOGY = 2
+ZERO_FILLED = 3
+MISSING = 4
+FLAG_NAMES = {
+    OBSERVED: "observed",
+    INTERPOLATED: "interpolated",
+    CLIMATOLOGY: "climatology",
+    ZERO_FILLED: "zero",
+    MISSING: "missing",
+}
+_STRATEGY_FLAGS = {"linear": INTERPOLATED, "climatology": CLIMATOLOGY, "zero": ZERO_FILLED, "missing": MISSING}
+# Columns with a fill rule: the standardized weather variables and those listed in GAP_FILL.
+# Spreadsheet helper columns (T_med, I, ...) and ingest extras (hours, n_*) are kept as read.
+FILLED_COLUMNS = (set(WEATHER_COLUMNS.values()) - {"date"}) | set(GAP_FILL)
+
+
+def fill_rule(col: str) -> dict:
+    # Gaps up to max_gap days use `short`, longer gaps use `long`
+    rule = {**GAP_FILL_DEFAULT, **GAP_FILL.get(col, {})}
+    for key in ("short", "long"):
+        if rule[key] not in _STRATEGY_FLAGS:
+            raise ValueError(f"Unknown gap-fill strategy '{rule[key]}' for {col}")
+    return rule
+
+
+def station_keys(df: pd.DataFrame) -> np.ndarray:
+    # Multi-station frames are filled per station; runs never cross a station boundary
+    if "site" in df.columns:
+        return pd.factorize(df["site"])[0]
+    return np.zeros(len(df), dtype=np.int64)
+
+
+def station_breaks(keys: np.ndarray) -> np.ndarray:
+    # True on the first row of each station block
+    return np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.zeros(0, dtype=bool)
+
+
+def run_lengths(mask: np.ndarray, breaks: np.ndarray) -> np.ndarray:
+    # Run-length encoding of True cells, column by column: each cell gets the length of the
+    # run it belongs to (0 where False). `breaks` marks each station's first row.
+    n, k = mask.shape
+    previous = np.vstack([np.zeros((1, k), dtype=bool), mask[:-1]])
+    starts = mask & (~previous | breaks[:, None])
+    # Column-major cumsum gives every run a unique id across columns
+    run_id = np.cumsum(starts.ravel(order="F")).reshape(n, k, order="F")
+    run_id = np.where(mask, run_id, 0)
+    lengths = np.bincount(run_id.ravel(), minlength=int(run_id.max()) + 1)
+    lengths[0] = 0
+    return lengths[run_id]
+
+
+def day_positions(df: pd.DataFrame) -> np.ndarray:
+    # Calendar day of each row (NaN when undated); row positions for frames without dates
+    if "date" not in df.columns:
+        return np.arange(len(df), dtype=float)
+    day = df["date"].to_numpy("datetime64[D]").astype(np.int64).astype(float)
+    return np.where(df["date"].notna().to_numpy(), day, np.nan)
+
+
+def _neighbours(
+    values: np.ndarray, observed: np.ndarray, keys: np.ndarray, day: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Day and value of the previous and next dated observation of the same station, per cell
+    n, k = values.shape
+    anchor = observed & np.isfinite(day)[:, None]
+    pos = np.where(anchor, day[:, None], np.nan)
+    vals = np.where(anchor, values, np.nan)
+    frame = pd.DataFrame(np.hstack([pos, vals]))
+    groups = frame.groupby(keys, sort=False)
+    before = groups.ffill().to_numpy()
+    after = groups.bfill().to_numpy()
+    return before[:, :k], before[:, k:], after[:, :k], after[:, k:]
+
+
+def gap_days(observed: np.ndarray, keys: np.ndarray, day: np.ndarray, neighbours: tuple) -> np.ndarray:
+    # Calendar days in the gap each missing cell belongs to (0 where observed), counting dates
+    # that have no row at all; leading/trailing gaps run to the station's first/last date.
+    # Undated cells get an infinite gap.
+    prev_day, _, next_day, _ = neighbours
+    days = pd.Series(day).groupby(keys, sort=False)
+    first = days.transform("min").to_numpy()[:, None]
+    last = days.transform("max").to_numpy()[:, None]
+    low = np.where(np.isnan(prev_day), first - 1, prev_day)
+    high = np.where(np.isnan(next_day), last + 1, next_day)
+    lengths = np.where(np.isfinite(day)[:, None], high - low - 1, np.inf)
+    return np.where(observed, 0.0, lengths)
+
+
+def _linear(values: np.ndarray, observed: np.ndarray, day: np.ndarray, neighbours: tuple) -> np.ndarray:
+    # Linear interpolation in calendar days between the nearest observations of the same
+    # station; leading/trailing gaps take the nearest observed value
+    prev_day, prev_val, next_day, next_val = neighbours
+    here = day[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = (here - prev_day) / (next_day - prev_day)
+        filled = prev_val + (next_val - prev_val) * weight
+    filled = np.where(np.isnan(prev_day), next_val, filled)
+    filled = np.where(np.isnan(next_day), prev_val, filled)
+    return np.where(observed, values, filled)
+
+
+def climatology(df: pd.DataFrame, values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    # Day-of-year mean per station over a circular window, looked up for every row. A mean
+    # needs observations on CLIMATOLOGY_MIN_SHARE of the window's dated rows (so a single
+    # year can fill from its own neighbouring days), and at most CLIMATOLOGY_MIN_OBS; else NaN.
+    n, k = values.shape
+    if "date" not in df.columns or n == 0:
+        return np.full((n, k), np.nan)
+    dated = df["date"].notna().to_numpy()
+    doy = np.minimum(df["date"].dt.dayofyear.fillna(1).to_numpy(dtype=np.int64), 366) - 1
+    n_keys = int(keys.max()) + 1
+    cell = keys * 366 + doy
+
+    observed = np.isfinite(values) & dated[:, None]
+    rows = np.bincount(cell, weights=dated, minlength=n_keys * 366)
+    sums = np.empty((n_keys * 366, k))
+    counts = np.empty((n_keys * 366, k))
+    for j in range(k):
+        sums[:, j] = np.bincount(cell, weights=np.where(observed[:, j], values[:, j], 0.0), minlength=n_keys * 366)
+        counts[:, j] = np.bincount(cell, weights=observed[:, j], minlength=n_keys * 366)
+
+    half = CLIMATOLOGY_WINDOW_DAYS // 2
+    window = 2 * half + 1
+
+    def smooth(table: np.ndarray) -> np.ndarray:
+        width = table.shape[1]
+        table = table.reshape(n_keys, 366, width)
+        wrapped = np.concatenate([table[:, -half:], table, table[:, :half]], axis=1)
+        cumulative = np.concatenate([np.zeros((n_keys, 1, width)), np.cumsum(wrapped, axis=1)], axis=1)
+        return (cumulative[:, window:] - cumulative[:, :-window]).reshape(n_keys * 366, width)
+
+    window_sums = smooth(sums)
+    window_counts = smooth(counts)
+    needed = np.clip(np.ceil(CLIMATOLOGY_MIN_SHARE * smooth(rows[:, None])), 1, CLIMATOLOGY_MIN_OBS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        clim = np.where(window_counts >= needed, window_sums / window_counts, np.nan)
+    return np.where(dated[:, None], clim[cell], np.nan)
+
+
+def fill_columns(df: pd.DataFrame) -> list[str]:
+    # Columns fill_gaps fills by default
+    return [c for c in df.select_dtypes(include=["number"]).columns if c in FILLED_COLUMNS]
+
+
+def fill_gaps(
+    df: pd.DataFrame, cols: list[str] | None = None, climate: np.ndarray | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Fill `cols` (default: fill_columns) per their GAP_FILL rule; returns (filled frame, uint8 flags).
+    # `climate` replaces the per-row climatology of `cols` computed from `df` itself, e.g. to
+    # fill a slice of a longer series with the climatology of the whole series.
     df = df.copy()
+    if cols is None:
+        cols = fill_columns(df)
+    if not cols:
+        return df, pd.DataFrame(index=df.index)
+
+    values = df[cols].to_numpy(dtype=float)
+    observed = np.isfinite(values)
+    keys = station_keys(df)
+    day = day_positions(df)
+    neighbours = _neighbours(values, observed, keys, day)
+    lengths = gap_days(observed, keys, day, neighbours)
 
-    if "date" in df.columns:
-        df = df.sort_values("date")
+    rules = [fill_rule(col) for col in cols]
+    max_gap = np.array([rule["max_gap"] for rule in rules])
+    short = np.array([_STRATEGY_FLAGS[rule["short"]] for rule in rules], dtype=np.uint8)
+    long = np.array([_STRATEGY_FLAGS[rule["long"]] for rule in rules], dtype=np.uint8)
+    wanted = np.where(lengths <= max_gap, short, long)
+    wanted = np.where(observed, OBSERVED, wanted).astype(np.uint8)
 
-    # Interpolate numeric columns
-    numeric_cols = df.select_dtypes(include=["number"]).columns
-    df[numeric_cols] = df[numeric_cols].interpolate(method="linear", limit_direction="both")
+    candidates = {OBSERVED: values, ZERO_FILLED: np.zeros_like(values), MISSING: np.full_like(values, np.nan)}
+    if (wanted == INTERPOLATED).any():
+        candidates[INTERPOLATED] = _linear(values, observed, day, neighbours)
+    if (wanted == CLIMATOLOGY).any():
+        candidates[CLIMATOLOGY] = climatology(df, values, keys) if climate is None else climate
+
+    filled = np.full_like(values, np.nan)
+    for flag, candidate in candidates.items():
+        filled = np.where(wanted == flag, candidate, filled)
+    flags = np.where(np.isnan(filled), MISSING, wanted).astype(np.uint8)
+
+    df[cols] = filled
+    return df, pd.DataFrame(flags, index=df.index, columns=cols)
+
+
+def sort_dedupe(df: pd.DataFrame) -> pd.DataFrame:
+    keys = [c for c in ("site", "date") if c in df.columns]
+    if "date" not in keys:
+        return df
+    return df.sort_values(keys, kind="stable").drop_duplicates(subset=keys, keep="first")
+
+
+def clean_daily_flagged(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    return fill_gaps(sort_dedupe(df))
+
+
+def clean_daily(df: pd.DataFrame) -> pd.DataFrame:
+    return clean_daily_flagged(df)[0]
 
-    # Drop duplicated dates if any
-    if "date" in df.columns:
-        df = df.drop_duplicates(subset=["date"], keep="first")
 
-    return df
+def flag_summary(flags: pd.DataFrame) -> pd.DataFrame:
+    # Cells per column and flag, e.g. for a quick look at how much was filled
+    counts = {name: (flags == flag).sum(axis=0) for flag, name in FLAG_NAMES.items()}
+    return pd.DataFrame(counts).rename_axis("column").reset_index()
@@ -1,130 +1,62 @@
 from __future__ import annotations
 
+from importlib import import_module
+from typing import Callable
 import argparse
-from pathlib import Path
-import pandas as pd
+import sys
 
-from . import aggregate, cleaning, io, metrics, plots
 from .config import (
+    BENCH_REPEAT,
+    BENCH_TOLERANCE,
+    BOOTSTRAP_BLOCK,
+    BOOTSTRAP_CHUNK_MB,
+    CALIBRATION_MODELS,
     DATA_CLEANED,
+    DATA_GRID,
     DATA_RAW,
+    DATA_STATE,
+    DEFAULT_WORKERS,
     DEFAULT_YEAR,
-    METHOD_COLUMNS,
-    METHOD_SHORT,
+    GRID_TILE_MB,
+    HOURLY_CHUNK_ROWS,
+    OUTPUTS_BENCHMARKS,
     OUTPUTS_FIGURES,
+    OUTPUTS_GRID,
     OUTPUTS_RESULTS,
     OUTPUTS_TABLES,
-    SITES,
+    SENSITIVITY_CHUNK_MB,
+    SENSITIVITY_REALIZATIONS,
+    SERVICE_BATCH_MAX_ROWS,
+    SERVICE_CACHE_SITES,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    STATIONS_FILE,
 )
 
+# Only argparse and config are loaded at startup: `--help`, argument errors and each
+# command's parsing cost no pandas/matplotlib import. Only the running command's handler module
+# is imported, with just that command's dependencies; matplotlib only once a figure is drawn.
+def resolve(command: str) -> Callable[[argparse.Namespace], int | None]:
+    # Handler of a subcommand: commands.<name>.cmd_<name>
+    return getattr(import_module(f".commands.{command}", __package__), f"cmd_{command}")
 
-def _ensure_dir(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
 
+def _size(spec: str) -> tuple[int, int]:
+    # "<a>x<b>", e.g. 10x5: <stations>x<years> for bench, <lat>x<lon> for synth --grid
+    try:
+        first, second = (int(part) for part in spec.lower().split("x"))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Expected <n>x<m>, got {spec!r}") from exc
+    return first, second
 
-def _method_cols_present(df: pd.DataFrame) -> list[str]:
-    return [col for col in METHOD_COLUMNS.values() if col in df.columns]
 
+def _add_site_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--stations", default=str(STATIONS_FILE), help="Station catalog CSV")
+    parser.add_argument("--site", action="append", help="Restrict to a station id (repeatable)")
 
-def cmd_clean(args: argparse.Namespace) -> None:
-    input_path = Path(args.input)
-    output_dir = Path(args.output)
-    _ensure_dir(output_dir)
 
-    for site, meta in SITES.items():
-        df = io.read_evapo_sheet(input_path, meta["sheet"], year=args.year)
-        df = cleaning.clean_daily(df)
-        io.write_cleaned(df, output_dir / f"{site}_daily.csv")
-
-
-def cmd_aggregate(args: argparse.Namespace) -> None:
-    input_dir = Path(args.input)
-    output_dir = Path(args.output)
-    _ensure_dir(output_dir)
-
-    for site in SITES.keys():
-        df = pd.read_csv(input_dir / f"{site}_daily.csv", parse_dates=["date"])
-        method_cols = _method_cols_present(df)
-
-        rolling = aggregate.rolling_mean(df, window=7)
-        rolling.to_csv(output_dir / f"{site}_rolling7d.csv", index=False)
-
-        monthly = aggregate.monthly_sum(df, method_cols)
-        monthly.to_csv(output_dir / f"{site}_monthly_totals.csv", index=False)
-
-
-def cmd_metrics(args: argparse.Namespace) -> None:
-    input_dir = Path(args.input)
-    output_dir = Path(args.output)
-    _ensure_dir(output_dir)
-
-    for site in SITES.keys():
-        df = pd.read_csv(input_dir / f"{site}_daily.csv", parse_dates=["date"])
-        method_cols = _method_cols_present(df)
-        ref_col = "et_penman_monteith"
-
-        if ref_col not in df.columns:
-            raise ValueError(f"Reference column '{ref_col}' not found for {site}")
-
-        daily_metrics = metrics.compute_metrics(df, ref_col, [c for c in method_cols if c != ref_col])
-        daily_metrics.to_csv(output_dir / f"{site}_daily_metrics.csv", index=False)
-
-        monthly_df = aggregate.monthly_sum(df, method_cols)
-        monthly_metrics = metrics.compute_metrics(monthly_df, ref_col, [c for c in method_cols if c != ref_col])
-        monthly_metrics.to_csv(output_dir / f"{site}_monthly_metrics.csv", index=False)
-
-
-def cmd_plots(args: argparse.Namespace) -> None:
-    input_dir = Path(args.input)
-    figures_dir = Path(args.output)
-    _ensure_dir(figures_dir)
-
-    for site in SITES.keys():
-        df = pd.read_csv(input_dir / f"{site}_daily.csv", parse_dates=["date"])
-        method_cols = _method_cols_present(df)
-        ref_col = "et_penman_monteith"
-
-        site_dir = figures_dir / site
-        _ensure_dir(site_dir)
-
-        for col in method_cols:
-            if col == ref_col:
-                continue
-            method_id = METHOD_SHORT.get(col, col)
-            ref_id = METHOD_SHORT.get(ref_col, "pm")
-            plots.plot_scatter(df, ref_col, col, site_dir / f"{site}_daily_scatter_{method_id}_vs_{ref_id}.png")
-            plots.plot_timeseries(df, ref_col, col, site_dir / f"{site}_daily_series_{method_id}_vs_{ref_id}.png")
-
-        monthly_df = aggregate.monthly_sum(df, method_cols)
-        plots.plot_monthly_totals(monthly_df, method_cols, site_dir / f"{site}_monthly_totals.png")
-        plots.plot_taylor(
-            df,
-            ref_col,
-            method_cols,
-            site_dir / f"{site}_daily_taylor.png",
-            title=f"Taylor diagram (daily) - {site}",
-        )
-        plots.plot_taylor(
-            monthly_df,
-            ref_col,
-            method_cols,
-            site_dir / f"{site}_monthly_taylor.png",
-            title=f"Taylor diagram (monthly) - {site}",
-        )
-
-
-def cmd_all(args: argparse.Namespace) -> None:
-    clean_args = argparse.Namespace(input=args.input, output=args.output, year=args.year)
-    cmd_clean(clean_args)
-
-    aggregate_args = argparse.Namespace(input=str(DATA_CLEANED), output=str(OUTPUTS_RESULTS), year=args.year)
-    cmd_aggregate(aggregate_args)
-
-    metrics_args = argparse.Namespace(input=str(DATA_CLEANED), output=str(OUTPUTS_TABLES), year=args.year)
-    cmd_metrics(metrics_args)
-
-    plots_args = argparse.Namespace(input=str(DATA_CLEANED), output=str(OUTPUTS_FIGURES), year=args.year)
-    cmd_plots(plots_args)
+def _add_csv_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--csv", action="store_true", help="Also export per-site CSVs next to the datasets")
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -137,31 +69,181 @@ def build_parser() -> argparse.ArgumentParser:
     clean_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
     clean_parser.add_argument("--input", default=str(DATA_RAW / "Evapo.xlsx"))
     clean_parser.add_argument("--output", default=str(DATA_CLEANED))
-    clean_parser.set_defaults(func=cmd_clean)
+    clean_parser.add_argument("--no-cache", action="store_true", help="Always re-parse the workbook")
+    clean_parser.add_argument(
+        "--long", action="store_true", help="Process all stations as one long (site, date) frame"
+    )
+    _add_csv_arg(clean_parser)
+    _add_site_args(clean_parser)
+
+    compute_parser = subparsers.add_parser("compute", help="Compute ETo methods from weather columns")
+    compute_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
+    compute_parser.add_argument("--input", default=str(DATA_CLEANED))
+    compute_parser.add_argument("--output", default=str(OUTPUTS_RESULTS))
+    _add_site_args(compute_parser)
 
     aggregate_parser = subparsers.add_parser("aggregate", help="Create rolling and monthly aggregates")
     aggregate_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
     aggregate_parser.add_argument("--input", default=str(DATA_CLEANED))
     aggregate_parser.add_argument("--output", default=str(OUTPUTS_RESULTS))
-    aggregate_parser.set_defaults(func=cmd_aggregate)
+    _add_csv_arg(aggregate_parser)
+    _add_site_args(aggregate_parser)
 
     metrics_parser = subparsers.add_parser("metrics", help="Compute metrics vs Penman-Monteith")
     metrics_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
     metrics_parser.add_argument("--input", default=str(DATA_CLEANED))
     metrics_parser.add_argument("--output", default=str(OUTPUTS_TABLES))
-    metrics_parser.set_defaults(func=cmd_metrics)
+    metrics_parser.add_argument(
+        "--group-by",
+        action="append",
+        default=[],
+        help="Also write per-group metrics; comma-separated keys (month, season, year, site). Repeatable",
+    )
+    metrics_parser.add_argument(
+        "--bootstrap", type=int, default=0, metavar="N", help="Write N-resample block-bootstrap intervals"
+    )
+    metrics_parser.add_argument("--block", type=int, default=BOOTSTRAP_BLOCK, help="Bootstrap block length (days)")
+    metrics_parser.add_argument("--seed", type=int, default=0)
+    metrics_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Processes for resampling")
+    metrics_parser.add_argument(
+        "--chunk-mb", type=float, default=BOOTSTRAP_CHUNK_MB, help="Working memory per batch of resamples (MB)"
+    )
+    metrics_parser.add_argument(
+        "--calibration", help="Directory with {site}_calibration.csv; adds calibrated (_cal) methods"
+    )
+    _add_csv_arg(metrics_parser)
+    _add_site_args(metrics_parser)
+
+    calibrate_parser = subparsers.add_parser("calibrate", help="Fit correction coefficients vs Penman-Monteith")
+    calibrate_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
+    calibrate_parser.add_argument("--input", default=str(DATA_CLEANED))
+    calibrate_parser.add_argument("--output", default=str(OUTPUTS_TABLES))
+    calibrate_parser.add_argument("--model", choices=CALIBRATION_MODELS, default="scale")
+    calibrate_parser.add_argument("--cv", choices=("month", "kfold", "none"), default="month")
+    calibrate_parser.add_argument("--folds", type=int, default=5, help="Folds for --cv kfold")
+    _add_site_args(calibrate_parser)
 
     plots_parser = subparsers.add_parser("plots", help="Generate figures")
     plots_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
     plots_parser.add_argument("--input", default=str(DATA_CLEANED))
     plots_parser.add_argument("--output", default=str(OUTPUTS_FIGURES))
-    plots_parser.set_defaults(func=cmd_plots)
+    plots_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel rendering processes")
+    plots_parser.add_argument("--force", action="store_true", help="Re-render figures even if inputs are unchanged")
+    _add_site_args(plots_parser)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Aggregate INMET hourly CSVs to daily weather rows")
+    ingest_parser.add_argument("--input", nargs="+", required=True, help="Hourly CSV files (e.g. one per year)")
+    ingest_parser.add_argument("--output", default=str(DATA_RAW / "daily"))
+    ingest_parser.add_argument("--chunk-rows", type=int, default=HOURLY_CHUNK_ROWS)
+    ingest_parser.add_argument(
+        "--hourly-eto", action="store_true", help="Add daily sums of hourly Penman-Monteith (FAO-56 eq. 53)"
+    )
+    _add_site_args(ingest_parser)
+
+    update_parser = subparsers.add_parser("update", help="Append new daily rows and refresh outputs incrementally")
+    update_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
+    update_parser.add_argument("--input", required=True, help="CSV with the new daily rows")
+    update_parser.add_argument("--workbook", default=str(DATA_RAW / "Evapo.xlsx"), help="Used when no state exists")
+    update_parser.add_argument("--state", default=str(DATA_STATE))
+    update_parser.add_argument("--cleaned", default=str(DATA_CLEANED))
+    update_parser.add_argument("--results", default=str(OUTPUTS_RESULTS))
+    update_parser.add_argument("--tables", default=str(OUTPUTS_TABLES))
+    update_parser.add_argument("--check", action="store_true", help="Compare against a full rebuild")
+    _add_csv_arg(update_parser)
+    _add_site_args(update_parser)
+
+    synth_parser = subparsers.add_parser("synth", help="Write a synthetic multi-station workbook and catalog")
+    synth_parser.add_argument("--year", type=int, default=DEFAULT_YEAR, help="First year")
+    synth_parser.add_argument("--years", type=int, default=1)
+    synth_parser.add_argument("--n-stations", type=int, default=10)
+    synth_parser.add_argument("--gap-rate", type=float, default=0.02, help="Share of isolated missing cells")
+    synth_parser.add_argument("--seed", type=int, default=0)
+    synth_parser.add_argument("--output", default=str(DATA_RAW / "synthetic.xlsx"))
+    synth_parser.add_argument("--catalog", default=str(DATA_RAW / "synthetic_stations.csv"))
+    synth_parser.add_argument(
+        "--grid", type=_size, metavar="LATxLON", help="Write gridded stacks of LATxLON cells instead of a workbook"
+    )
+    synth_parser.add_argument("--grid-output", default=str(DATA_GRID))
+
+    bench_parser = subparsers.add_parser("bench", help="Time pipeline functions on synthetic stations")
+    bench_parser.add_argument(
+        "--size", action="append", type=_size, help="<stations>x<years> (repeatable; default from BENCH_SIZES)"
+    )
+    bench_parser.add_argument("--only", action="append", help="Benchmark name, e.g. clean_daily (repeatable)")
+    bench_parser.add_argument("--repeat", type=int, default=BENCH_REPEAT)
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.add_argument("--output", default=str(OUTPUTS_BENCHMARKS), help="Directory with history.csv")
+    bench_parser.add_argument("--baseline", help="run_id to compare with (default: previous run on this host)")
+    bench_parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE, help="Allowed slowdown ratio - 1")
+    bench_parser.add_argument("--check", action="store_true", help="Exit with status 1 on regressions")
+    bench_parser.add_argument(
+        "--startup", action="store_true", help="Check each subcommand's startup time and imports against its budget"
+    )
+
+    sensitivity_parser = subparsers.add_parser(
+        "sensitivity", help="Monte-Carlo propagation of sensor errors into ETo and the metrics rankings"
+    )
+    sensitivity_parser.add_argument("--input", default=str(DATA_CLEANED))
+    sensitivity_parser.add_argument("--output", default=str(OUTPUTS_TABLES))
+    sensitivity_parser.add_argument("--realizations", type=int, default=SENSITIVITY_REALIZATIONS)
+    sensitivity_parser.add_argument(
+        "--error",
+        action="append",
+        default=[],
+        metavar="COL=KIND:SD[:BIAS]",
+        help="Override an error model, e.g. wind_mean_ms=relative:0.1:0.05 (defaults: SENSITIVITY_ERRORS). Repeatable",
+    )
+    sensitivity_parser.add_argument("--seed", type=int, default=0)
+    sensitivity_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Processes for realizations")
+    sensitivity_parser.add_argument(
+        "--chunk-mb", type=float, default=SENSITIVITY_CHUNK_MB, help="Working memory per chunk of realizations (MB)"
+    )
+    _add_site_args(sensitivity_parser)
+
+    grid_parser = subparsers.add_parser("grid", help="Compute ETo maps over memory-mapped (time, lat, lon) stacks")
+    grid_parser.add_argument("--input", default=str(DATA_GRID), help="Directory with <variable>.npy stacks and axes")
+    grid_parser.add_argument("--output", default=str(OUTPUTS_GRID))
+    grid_parser.add_argument("--method", action="append", help="ETo method, e.g. et_penman_monteith (repeatable; default all)")
+    grid_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel tile processes")
+    grid_parser.add_argument("--tile-mb", type=float, default=GRID_TILE_MB, help="Working memory per tile (MB)")
+
+    serve_parser = subparsers.add_parser("serve", help="Local HTTP/JSON service for ETo and site metrics")
+    serve_parser.add_argument("--host", default=SERVICE_HOST, help="Loopback address to listen on")
+    serve_parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    serve_parser.add_argument("--cleaned", default=str(DATA_CLEANED), help="Cleaned data served by /sites/<site>/metrics")
+    serve_parser.add_argument("--cache-sites", type=int, default=SERVICE_CACHE_SITES, help="Sites kept in memory")
+    serve_parser.add_argument(
+        "--batch-rows", type=int, default=SERVICE_BATCH_MAX_ROWS, help="Max records per merged /eto batch"
+    )
+    _add_site_args(serve_parser)
+
+    loadtest_parser = subparsers.add_parser("loadtest", help="Measure service throughput and latency")
+    loadtest_parser.add_argument("--host", default=SERVICE_HOST)
+    loadtest_parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    loadtest_parser.add_argument("--spawn", action="store_true", help="Start a service process for the test")
+    loadtest_parser.add_argument("--endpoint", choices=("eto", "metrics"), default="eto")
+    loadtest_parser.add_argument("--site", dest="load_site", help="Site for --endpoint metrics")
+    loadtest_parser.add_argument("--requests", type=int, default=2000)
+    loadtest_parser.add_argument("--concurrency", type=int, default=16, help="Concurrent keep-alive connections")
+    loadtest_parser.add_argument("--batch", type=int, default=7, help="Weather records per /eto request")
+    loadtest_parser.add_argument("--seed", type=int, default=0)
+    loadtest_parser.add_argument("--report", help="Also write the report as JSON")
 
     all_parser = subparsers.add_parser("all", help="Run full pipeline")
     all_parser.add_argument("--year", type=int, default=DEFAULT_YEAR)
     all_parser.add_argument("--input", default=str(DATA_RAW / "Evapo.xlsx"))
     all_parser.add_argument("--output", default=str(DATA_CLEANED))
-    all_parser.set_defaults(func=cmd_all)
+    all_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel station processes")
+    all_parser.add_argument(
+        "--long", action="store_true", help="Process all stations as one long (site, date) frame"
+    )
+    all_parser.add_argument("--no-cache", action="store_true", help="Always re-parse the workbook")
+    all_parser.add_argument(
+        "--profile", metavar="REPORT", help="Write per-stage, per-site timings to REPORT (.json or .csv)"
+    )
+    all_parser.add_argument("--profile-dump", metavar="DIR", help="Also write a cProfile dump per stage to DIR")
+    _add_csv_arg(all_parser)
+    _add_site_args(all_parser)
 
     return parser
 
@@ -170,7 +252,9 @@ def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
 
-    args.func(args)
+    status = resolve(args.command)(args)
+    if status:
+        sys.exit(status)
 
 
 if __name__ == "__main__":
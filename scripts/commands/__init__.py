@@ -0,0 +1,3 @@
+# Subcommand handlers, one module per subcommand (cli.py dispatches to commands.<name>.cmd_<name>
+# once the arguments are parsed). A module imports only what its command uses, so loading a
+# handler costs that command's imports and nothing more (tests/test_startup.py).
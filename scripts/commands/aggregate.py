@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import pipeline
+from .common import ensure_dir, selected_sites
+from .loading import load_long
+
+
+def cmd_aggregate(args: argparse.Namespace) -> None:
+    input_dir = Path(args.input)
+    output_dir = Path(args.output)
+    ensure_dir(output_dir)
+
+    pipeline.write_aggregates(load_long(selected_sites(args), input_dir), output_dir, args.csv)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+import argparse
+import sys
+import traceback
+
+from .. import incremental, pipeline, profiling
+from ..config import DATA_STATE, DEFAULT_WORKERS, OUTPUTS_FIGURES, OUTPUTS_RESULTS, OUTPUTS_TABLES
+from ..pipeline import SitePipeline
+from .common import ensure_dir, selected_sites
+
+
+def _write_state(pipe: SitePipeline, root: Path) -> None:
+    incremental.state_from_pipeline(pipe).save(incremental.state_dir(pipe.site, root))
+
+
+def _run_sinks(pipe: SitePipeline, sinks: tuple) -> dict:
+    # Failures are returned rather than raised so one bad station does not abort the run
+    stage = sinks[0][0]
+    profile = {} if pipe.profiler is None else {"profile": pipe.profiler.records}
+    try:
+        for stage, sink, output_dir in sinks:
+            pipe.run(stage, sink, output_dir)
+    except Exception as exc:
+        return {
+            "site": pipe.site,
+            "status": "failed",
+            "stage": stage,
+            "error": f"{type(exc).__name__}: {exc}",
+            "traceback": traceback.format_exc(),
+            **profile,
+        }
+    return {"site": pipe.site, "status": "ok", "stage": stage, "error": "", **profile}
+
+
+def _profiler(profile: bool, profile_dump: Path | None) -> profiling.Profiler | None:
+    return profiling.Profiler(profile_dump) if profile or profile_dump else None
+
+
+def _output_sinks(cleaned_dir: Path, csv: bool) -> tuple:
+    return (
+        ("clean", partial(pipeline.write_cleaned, csv=csv), cleaned_dir),
+        ("qc", pipeline.write_qc_summary, OUTPUTS_TABLES),
+        ("aggregate", partial(pipeline.write_aggregates, csv=csv), OUTPUTS_RESULTS),
+        ("metrics", partial(pipeline.write_metrics, csv=csv), OUTPUTS_TABLES),
+    )
+
+
+def run_site(
+    site: str,
+    meta: dict,
+    input_path: Path,
+    cleaned_dir: Path,
+    year: int,
+    use_cache: bool = True,
+    csv: bool = False,
+    profile: bool = False,
+    profile_dump: Path | None = None,
+) -> dict:
+    # Full chain for one station over a single in-memory frame; files are only written as sinks.
+    # With profiling on, the result carries one record per stage and sink under "profile".
+    source = Path(meta.get("source") or input_path)
+    pipe = SitePipeline(
+        site, meta, source=source, year=year, use_cache=use_cache, profiler=_profiler(profile, profile_dump)
+    )
+    sinks = _output_sinks(cleaned_dir, csv) + (
+        ("plots", pipeline.write_plots, OUTPUTS_FIGURES),
+        ("state", _write_state, DATA_STATE),
+    )
+    return _run_sinks(pipe, sinks)
+
+
+def run_long(
+    sites: dict[str, dict],
+    input_path: Path,
+    cleaned_dir: Path,
+    year: int,
+    workers: int = DEFAULT_WORKERS,
+    use_cache: bool = True,
+    csv: bool = False,
+    profile: bool = False,
+    profile_dump: Path | None = None,
+) -> dict:
+    # Full chain over one long frame of all stations. Update state is per station and is
+    # left to `update`, which builds it from the workbook when missing.
+    for path in (cleaned_dir, OUTPUTS_RESULTS, OUTPUTS_TABLES, OUTPUTS_FIGURES):
+        ensure_dir(path)
+    pipe = SitePipeline.for_stations(sites, source=input_path, year=year, use_cache=use_cache)
+    pipe.profiler = _profiler(profile, profile_dump)
+    sinks = _output_sinks(cleaned_dir, csv) + (
+        ("plots", partial(pipeline.write_plots, workers=workers), OUTPUTS_FIGURES),
+    )
+    return _run_sinks(pipe, sinks)
+
+
+def run_sites(
+    sites: dict[str, dict],
+    input_path: Path,
+    cleaned_dir: Path,
+    year: int,
+    workers: int = DEFAULT_WORKERS,
+    use_cache: bool = True,
+    csv: bool = False,
+    profile: bool = False,
+    profile_dump: Path | None = None,
+) -> list[dict]:
+    for path in (cleaned_dir, OUTPUTS_RESULTS, OUTPUTS_TABLES, OUTPUTS_FIGURES):
+        ensure_dir(path)
+
+    options = {"use_cache": use_cache, "csv": csv, "profile": profile, "profile_dump": profile_dump}
+    if workers <= 1 or len(sites) <= 1:
+        return [run_site(site, meta, input_path, cleaned_dir, year, **options) for site, meta in sites.items()]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_site, site, meta, input_path, cleaned_dir, year, **options): site
+            for site, meta in sites.items()
+        }
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:  # worker died (e.g. killed, unpicklable result)
+                results.append(
+                    {"site": futures[future], "status": "failed", "stage": "worker", "error": repr(exc)}
+                )
+    order = {site: i for i, site in enumerate(sites)}
+    return sorted(results, key=lambda r: order[r["site"]])
+
+
+def cmd_all(args: argparse.Namespace) -> int:
+    sites = selected_sites(args)
+    options = {"workers": args.workers, "use_cache": not args.no_cache, "csv": args.csv}
+    profile_dump = Path(args.profile_dump) if args.profile_dump else None
+    options.update(profile=bool(args.profile), profile_dump=profile_dump)
+    if args.long:
+        results = [run_long(sites, Path(args.input), Path(args.output), args.year, **options)]
+    else:
+        results = run_sites(sites, Path(args.input), Path(args.output), args.year, **options)
+
+    failures = [r for r in results if r["status"] != "ok"]
+    for result in results:
+        if result["status"] == "ok":
+            print(f"[ok]     {result['site']}")
+        else:
+            print(f"[failed] {result['site']} ({result['stage']}): {result['error']}", file=sys.stderr)
+    if args.long:
+        print(f"{0 if failures else len(sites)}/{len(sites)} stations processed as one frame")
+    else:
+        print(f"{len(results) - len(failures)}/{len(results)} stations processed")
+    if args.profile:
+        _write_profile([record for r in results for record in r.get("profile", [])], Path(args.profile))
+    return 1 if failures else 0
+
+
+def _write_profile(records: list[dict], path: Path) -> None:
+    profiling.write_report(records, path)
+    print(f"profile: {len(records)} stage timings -> {path}")
+    print(profiling.slowest(records).to_string(index=False, float_format="%.3f"))
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import sys
+
+from .. import startup
+from ..config import BENCH_SIZES
+
+
+def _print_startup(rows: list[dict]) -> None:
+    # Times in seconds and in bare `python -c pass` starts (the budget's unit)
+    print(f"{'command':>12} {'seconds':>8} {'x bare':>7} {'budget':>7}  ok     loaded")
+    for row in rows:
+        flag = "yes" if row["ok"] else f"NO {row['forbidden']}".strip()
+        print(
+            f"{row['command']:>12} {row['seconds']:8.3f} {row['bare_starts']:7.1f} {row['budget']:7d}  "
+            f"{flag:<6} {row['loaded']}"
+        )
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    if args.startup:
+        rows = startup.startup_check(args.repeat)
+        _print_startup(rows)
+        return 0 if all(row["ok"] for row in rows) else 1
+
+    # The benchmarks load the whole pipeline; `--startup` does not need it
+    from .. import benchmark
+
+    sizes = args.size or list(BENCH_SIZES)
+    root = Path(args.output)
+    results = benchmark.run_benchmarks(sizes, args.repeat, args.only, args.seed)
+    history = benchmark.read_history(root)
+    run = benchmark.record_run(results, root)
+    table = benchmark.compare_runs(run, history, args.baseline, args.tolerance)
+    print(table.to_string(index=False, float_format="%.4f"))
+    print(f"run {run['run_id'].iloc[0]} -> {root / benchmark.HISTORY}")
+
+    regressions = table[table["regression"]]
+    for row in regressions.itertuples():
+        print(
+            f"[regression] {row.benchmark} ({row.stations}x{row.years}): "
+            f"{row.median_s:.4f}s vs {row.baseline_s:.4f}s",
+            file=sys.stderr,
+        )
+    return 1 if args.check and not regressions.empty else 0
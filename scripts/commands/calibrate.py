@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import pipeline
+from .common import ensure_dir, selected_sites
+from .loading import load_long
+
+
+def cmd_calibrate(args: argparse.Namespace) -> None:
+    input_dir = Path(args.input)
+    output_dir = Path(args.output)
+    ensure_dir(output_dir)
+
+    options = {"model": args.model, "cv": None if args.cv == "none" else args.cv, "folds": args.folds}
+    for site_pipe in pipeline.site_pipelines(load_long(selected_sites(args), input_dir)):
+        table = pipeline.write_calibration(site_pipe, output_dir, **options)
+        print(f"{site_pipe.site}: {len(table)} methods calibrated ({args.model}, cv={args.cv})")
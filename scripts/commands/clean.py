@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import pipeline
+from ..config import OUTPUTS_TABLES
+from ..pipeline import SitePipeline
+from .common import ensure_dir, selected_sites
+
+
+def clean_site(
+    site: str, meta: dict, input_path: Path, output_dir: Path, year: int, use_cache: bool = True, csv: bool = False
+) -> None:
+    source = Path(meta.get("source") or input_path)
+    pipe = SitePipeline(site, meta, source=source, year=year, use_cache=use_cache)
+    pipeline.write_cleaned(pipe, output_dir, csv)
+    pipeline.write_qc_summary(pipe, OUTPUTS_TABLES)
+
+
+def clean_sites(
+    sites: dict[str, dict], input_path: Path, output_dir: Path, year: int, use_cache: bool = True, csv: bool = False
+) -> None:
+    # All stations as one long frame: one QC and gap-filling pass, one dataset write
+    pipe = SitePipeline.for_stations(sites, source=input_path, year=year, use_cache=use_cache)
+    pipeline.write_cleaned(pipe, output_dir, csv)
+    pipeline.write_qc_summary(pipe, OUTPUTS_TABLES)
+
+
+def cmd_clean(args: argparse.Namespace) -> None:
+    input_path = Path(args.input)
+    output_dir = Path(args.output)
+    ensure_dir(output_dir)
+
+    sites = selected_sites(args)
+    if args.long:
+        clean_sites(sites, input_path, output_dir, args.year, use_cache=not args.no_cache, csv=args.csv)
+        return
+    for site, meta in sites.items():
+        clean_site(site, meta, input_path, output_dir, args.year, use_cache=not args.no_cache, csv=args.csv)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from ..config import STATIONS_FILE
+from ..stations import load_stations, select_stations
+
+# Helpers shared by every subcommand; standard library and the station catalog only
+
+
+def ensure_dir(path: Path) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+
+
+def selected_sites(args: argparse.Namespace) -> dict[str, dict]:
+    stations = load_stations(getattr(args, "stations", None) or STATIONS_FILE)
+    return select_stations(stations, getattr(args, "site", None))
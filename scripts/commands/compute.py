@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import eto, pipeline
+from .common import ensure_dir, selected_sites
+from .loading import load_long
+
+
+def compute_sites(sites: dict[str, dict], input_dir: Path, output_dir: Path) -> None:
+    pipe = load_long(sites, input_dir)
+    daily = pipe.get("daily")
+    lat, alt_m = pipeline.station_coordinates(pipe, daily)
+    computed = eto.compute_eto(daily, lat=lat, alt_m=alt_m)
+    for site, frame in computed.groupby("site", sort=False):
+        frame.drop(columns="site").to_csv(output_dir / f"{site}_eto.csv", index=False)
+
+
+def cmd_compute(args: argparse.Namespace) -> None:
+    input_dir = Path(args.input)
+    output_dir = Path(args.output)
+    ensure_dir(output_dir)
+
+    compute_sites(selected_sites(args), input_dir, output_dir)
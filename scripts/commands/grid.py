@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import gridded
+
+
+def cmd_grid(args: argparse.Namespace) -> None:
+    try:
+        summary = gridded.run_grid(Path(args.input), Path(args.output), args.method, args.workers, args.tile_mb)
+    except (FileNotFoundError, ValueError) as exc:
+        raise SystemExit(str(exc)) from exc
+    n_time, n_lat, n_lon = summary["shape"]
+    peak = f" (peak RSS {summary['peak_rss_mb']:.0f} MB)" if summary["peak_rss_mb"] is not None else ""
+    print(
+        f"{len(summary['methods'])} methods over {n_time} days x {n_lat}x{n_lon} cells in {summary['tiles']} tiles "
+        f"-> {args.output}{peak}"
+    )
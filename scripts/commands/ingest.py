@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import hourly
+from .common import ensure_dir, selected_sites
+
+
+def cmd_ingest(args: argparse.Namespace) -> None:
+    sites = selected_sites(args)
+    if len(sites) != 1:
+        raise SystemExit("ingest needs exactly one --site")
+    (site, meta), = sites.items()
+
+    daily = hourly.ingest_hourly(
+        [Path(p) for p in args.input], meta, chunk_rows=args.chunk_rows, hourly_eto=args.hourly_eto
+    )
+    output_dir = Path(args.output)
+    ensure_dir(output_dir)
+    output_path = output_dir / f"{site}_daily.csv"
+    daily.to_csv(output_path, index=False)
+    complete = int((daily["hours"] == 24).sum()) if "hours" in daily else 0
+    print(f"{site}: {len(daily)} days ({complete} complete) -> {output_path} (usable as the station's catalog source)")
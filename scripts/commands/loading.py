@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+import pandas as pd
+
+from .. import calibrate, pipeline, storage
+from ..pipeline import SitePipeline
+
+# Pipelines over cleaned data, for the commands that start from data/cleaned
+
+
+def read_daily_long(input_dir: Path, sites: dict[str, dict]) -> pd.DataFrame:
+    # One long frame keyed by (site, date): a single dataset read covering every station,
+    # per-site CSVs only for stations the dataset lacks
+    daily = storage.read_dataset(input_dir, pipeline.DAILY_DATASET, list(sites))
+    found = set() if daily is None else set(daily["site"].astype(str))
+    frames = [] if daily is None else [daily]
+    frames += [pipeline.read_daily(input_dir, site).assign(site=site) for site in sites if site not in found]
+    long = pd.concat(frames, ignore_index=True)
+    long["site"] = long["site"].astype(str)
+    return long
+
+
+def load_pipeline(
+    site: str, meta: dict, input_dir: Path, calibration_dir: Path | None = None
+) -> SitePipeline:
+    coefficients = calibrate.read_coefficients(calibration_dir, site) if calibration_dir else None
+    return SitePipeline.from_daily(site, meta, pipeline.read_daily(input_dir, site), coefficients)
+
+
+def load_long(sites: dict[str, dict], input_dir: Path) -> SitePipeline:
+    columns = {site: pipeline.read_daily_columns(input_dir, site) for site in sites}
+    return SitePipeline.from_long_daily(sites, read_daily_long(input_dir, sites), columns)
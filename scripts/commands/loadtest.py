@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import asyncio
+
+from .. import loadtest
+
+
+def cmd_loadtest(args: argparse.Namespace) -> int:
+    process = loadtest.spawn_service(args.host, args.port) if args.spawn else None
+    try:
+        asyncio.run(loadtest.wait_ready(args.host, args.port))
+        report = asyncio.run(
+            loadtest.run_load(
+                args.host, args.port, args.requests, args.concurrency, args.batch, args.endpoint, args.load_site, args.seed
+            )
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    for key, value in report.items():
+        if value is not None:
+            print(f"{key:>20}: {value}")
+    if args.report:
+        loadtest.write_report(report, Path(args.report))
+    return 1 if report["errors"] else 0
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import pipeline
+from .common import ensure_dir, selected_sites
+from .loading import load_long, load_pipeline
+
+
+def metrics_site(
+    site: str,
+    meta: dict,
+    input_dir: Path,
+    output_dir: Path,
+    groupings: list[list[str]] | None = None,
+    bootstrap: dict | None = None,
+    calibration_dir: Path | None = None,
+    csv: bool = False,
+) -> None:
+    pipe = load_pipeline(site, meta, input_dir, calibration_dir)
+    pipeline.write_metrics(pipe, output_dir, csv)
+    if groupings:
+        pipeline.write_grouped_metrics(pipe, output_dir, groupings)
+    if bootstrap:
+        pipeline.write_bootstrap(pipe, output_dir, **bootstrap)
+
+
+def metrics_sites(
+    sites: dict[str, dict],
+    input_dir: Path,
+    output_dir: Path,
+    groupings: list[list[str]] | None = None,
+    bootstrap: dict | None = None,
+    csv: bool = False,
+) -> None:
+    # Scores for every station in one grouped pass; bootstrap intervals stay per station
+    pipe = load_long(sites, input_dir)
+    pipeline.write_metrics(pipe, output_dir, csv)
+    if groupings:
+        pipeline.write_grouped_metrics(pipe, output_dir, groupings)
+    if bootstrap:
+        for site_pipe in pipeline.site_pipelines(pipe):
+            pipeline.write_bootstrap(site_pipe, output_dir, **bootstrap)
+
+
+def cmd_metrics(args: argparse.Namespace) -> None:
+    input_dir = Path(args.input)
+    output_dir = Path(args.output)
+    ensure_dir(output_dir)
+
+    groupings = [[key.strip() for key in spec.split(",") if key.strip()] for spec in args.group_by]
+    bootstrap = None
+    if args.bootstrap:
+        bootstrap = {
+            "n_boot": args.bootstrap,
+            "block": args.block,
+            "seed": args.seed,
+            "workers": args.workers,
+            "chunk_mb": args.chunk_mb,
+        }
+    if not args.calibration:
+        metrics_sites(selected_sites(args), input_dir, output_dir, groupings, bootstrap, args.csv)
+        return
+    # Calibrated methods use each station's own coefficients
+    calibration_dir = Path(args.calibration)
+    for site, meta in selected_sites(args).items():
+        metrics_site(site, meta, input_dir, output_dir, groupings, bootstrap, calibration_dir, args.csv)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import pipeline
+from .common import ensure_dir, selected_sites
+from .loading import load_long
+
+
+def cmd_plots(args: argparse.Namespace) -> None:
+    input_dir = Path(args.input)
+    figures_dir = Path(args.output)
+    ensure_dir(figures_dir)
+
+    sites = selected_sites(args)
+    rendered, skipped = pipeline.write_plots(load_long(sites, input_dir), figures_dir, args.workers, args.force)
+    print(f"{len(sites)} stations: {rendered} figures rendered, {skipped} unchanged")
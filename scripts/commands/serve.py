@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import asyncio
+
+from .. import service
+from .common import selected_sites
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    try:
+        service.require_loopback(args.host)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    server = service.EtoService(selected_sites(args), Path(args.cleaned), args.cache_sites, args.batch_rows)
+    print(f"serving on http://{args.host}:{args.port} (Ctrl-C to stop)")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+from .. import synthetic
+
+
+def cmd_synth(args: argparse.Namespace) -> None:
+    if args.grid:
+        n_lat, n_lon = args.grid
+        root = synthetic.write_grid(Path(args.grid_output), n_lat, n_lon, args.years, args.year, seed=args.seed)
+        print(f"{n_lat}x{n_lon} cells x {args.years} years -> {root}")
+        return
+    stations = synthetic.synthetic_stations(args.n_stations, args.seed)
+    daily = synthetic.synthetic_daily(stations, args.years, args.year, args.gap_rate, args.seed)
+    workbook = synthetic.write_workbook(daily, stations, Path(args.output))
+    catalog = synthetic.write_catalog(stations, Path(args.catalog), workbook.resolve())
+    print(f"{len(stations)} stations x {args.years} years ({len(daily)} rows) -> {workbook}, {catalog}")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import sys
+
+from .. import incremental, io, pipeline
+from ..pipeline import SitePipeline
+from .common import selected_sites
+
+
+def cmd_update(args: argparse.Namespace) -> int:
+    sites = selected_sites(args)
+    if len(sites) != 1:
+        raise SystemExit("update needs exactly one --site")
+    (site, meta), = sites.items()
+
+    state_path = incremental.state_dir(site, Path(args.state))
+    state = incremental.SiteState.load(state_path)
+    if state is None:
+        # First update for this site: build the state once from the workbook
+        source = Path(meta.get("source") or args.workbook)
+        state = incremental.state_from_pipeline(SitePipeline(site, meta, source=source, year=args.year))
+
+    new_rows = io.read_observations(Path(args.input), year=args.year)
+    state, summary = incremental.update_state(state, new_rows, meta)
+    state.save(state_path)
+
+    pipe = incremental.pipeline_from_state(site, meta, state)
+    pipeline.write_cleaned(pipe, Path(args.cleaned), args.csv)
+    pipeline.write_aggregates(pipe, Path(args.results), args.csv)
+    pipeline.write_metrics(pipe, Path(args.tables), args.csv)
+    pipeline.write_qc_summary(pipe, Path(args.tables))
+    print(f"{site}: {summary['rows']} new rows, {summary['changed']} cleaned rows in {summary['months']} months recomputed")
+
+    if args.check:
+        mismatches = incremental.compare_with_rebuild(state, meta)
+        if mismatches:
+            print(f"{site}: differs from full rebuild in {', '.join(mismatches)}", file=sys.stderr)
+            return 1
+        print(f"{site}: matches full rebuild")
+    return 0
@@ -6,12 +6,100 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 
 DATA_RAW = BASE_DIR / "data" / "raw"
 DATA_CLEANED = BASE_DIR / "data" / "cleaned"
+DATA_STATE = BASE_DIR / "data" / "state"
+DATA_GRID = BASE_DIR / "data" / "grid"
 OUTPUTS_RESULTS = BASE_DIR / "outputs" / "results"
 OUTPUTS_FIGURES = BASE_DIR / "outputs" / "figures"
 OUTPUTS_TABLES = BASE_DIR / "outputs" / "tables"
+OUTPUTS_BENCHMARKS = BASE_DIR / "outputs" / "benchmarks"
+OUTPUTS_GRID = BASE_DIR / "outputs" / "grid"
+STATIONS_FILE = BASE_DIR / "data" / "stations.csv"
+CACHE_DIR = BASE_DIR / ".cache" / "sheets"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Astronomy lookup tables (astronomy.py): Ra and daylength over a (latitude, day-of-year)
+# grid, persisted here. Lookups with up to ASTRO_EXACT_MAX_LATS distinct latitudes use
+# exact per-latitude rows; more latitudes (gridded inputs) interpolate on the grid.
+ASTRO_CACHE_DIR = BASE_DIR / ".cache" / "astronomy"
+ASTRO_LAT_STEP = 0.05
+ASTRO_EXACT_MAX_LATS = 256
 
 DEFAULT_YEAR = 2024
+# Calendar months counted as the wet season when grouping metrics by season
+WET_SEASON_MONTHS = (10, 11, 12, 1, 2, 3)
+DEFAULT_WORKERS = 1
+# Benchmarks (benchmark.py): synthetic (stations, years) sizes, timed calls per benchmark,
+# and the slowdown vs the previous run that counts as a regression
+BENCH_SIZES = ((2, 1), (10, 5), (50, 10))
+BENCH_REPEAT = 3
+BENCH_TOLERANCE = 0.25
+# Gridded ETo (gridded.py): working-memory budget per tile and dtype of the output stacks
+GRID_TILE_MB = 256
+GRID_DTYPE = "float32"
+# Local HTTP service (service.py): loopback only; cleaned sites kept in memory (LRU), and
+# concurrent /eto requests merged into batches of up to this many records
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_CACHE_SITES = 16
+SERVICE_BATCH_MAX_ROWS = 50_000
+SERVICE_MAX_BODY_BYTES = 16 * 1024 * 1024
+# CLI startup budget (`bench --startup`): time from interpreter start until a subcommand's
+# handler is loaded ("--help": parser only), in multiples of a bare `python -c pass` on the same
+# machine. Commands on pandas pay its import (about 50 bare starts); the others stay well below.
+# Modules each command must not import yet (startup.py, tests/test_startup.py) follow.
+STARTUP_BUDGET = {
+    "--help": 15,
+    "clean": 100,
+    "compute": 100,
+    "aggregate": 100,
+    "metrics": 100,
+    "calibrate": 100,
+    "plots": 100,
+    "ingest": 100,
+    "update": 100,
+    "synth": 100,
+    "bench": 15,
+    "serve": 100,
+    "loadtest": 40,
+    "grid": 100,
+    "sensitivity": 100,
+    "all": 100,
+}
+STARTUP_FORBIDDEN = {
+    "--help": ("numpy", "pandas", "matplotlib", "openpyxl"),
+    "bench": ("numpy", "pandas", "matplotlib", "openpyxl", "scripts.benchmark"),  # --startup needs neither
+    "loadtest": ("pandas", "matplotlib", "openpyxl", "scripts.pipeline"),
+    "ingest": ("matplotlib", "openpyxl", "scripts.pipeline"),
+    "synth": ("matplotlib", "openpyxl", "scripts.pipeline"),
+    "grid": ("matplotlib", "openpyxl", "scripts.pipeline"),
+}
+STARTUP_FORBIDDEN_DEFAULT = ("matplotlib", "openpyxl")
+# Calibration models (calibrate.py)
+CALIBRATION_MODELS = ("scale", "linear")
+# Moving-block length for bootstrap intervals (daily ETo is autocorrelated over ~a week),
+# and the working-memory budget per worker that sizes the resample batches (small batches
+# stay in cache: a few MB is faster than hundreds)
+BOOTSTRAP_BLOCK = 7
+BOOTSTRAP_CHUNK_MB = 8
+
+# Monte-Carlo sensitivity of the methods to sensor errors (sensitivity.py): per input column
+# (kind, random sd, bias sd). "additive" errors are in the column's units, "relative" ones a
+# fraction of the value; the random part is drawn per day, the bias once per realization
+# (calibration offset). Perturbed values are clipped to QC_LIMITS.
+SENSITIVITY_ERRORS = {
+    "tmed_c": ("additive", 0.2, 0.1),
+    "tmax_c": ("additive", 0.3, 0.1),
+    "tmin_c": ("additive", 0.3, 0.1),
+    "rh_mean_pct": ("additive", 2.0, 1.0),
+    "rh_max_pct": ("additive", 3.0, 1.5),
+    "rh_min_pct": ("additive", 3.0, 1.5),
+    "wind_mean_ms": ("relative", 0.10, 0.05),
+    "rad_global_mj_m2_d": ("relative", 0.05, 0.03),
+    "rad_net_mj_m2_d": ("relative", 0.10, 0.05),
+}
+SENSITIVITY_REALIZATIONS = 1000
+SENSITIVITY_CHUNK_MB = 256
 
+# Fallback station set when STATIONS_FILE is absent
 SITES = {
     "manaus": {
         "sheet": "Manaus",
@@ -38,6 +126,60 @@ METHOD_COLUMNS = {
     "Garcia Lopez": "et_garcia_lopez",
 }
 
+# Gap filling (cleaning.fill_gaps): gaps up to max_gap calendar days (dates without a row
+# count as missing) use `short`, longer ones `long`. Only the standardized weather columns
+# and columns listed here are filled; other numeric columns are kept as read.
+# Strategies: linear, climatology (day-of-year mean), zero, missing
+GAP_FILL_DEFAULT = {"short": "linear", "max_gap": 5, "long": "climatology"}
+GAP_FILL = {
+    "rain_mm": {"short": "missing", "long": "missing"},
+    # Method estimates are derived values: never invent them
+    **{col: {"short": "missing", "long": "missing"} for col in METHOD_COLUMNS.values()},
+}
+CLIMATOLOGY_WINDOW_DAYS = 15
+# A day-of-year mean needs observations on this share of the window's dated rows over the
+# record (8 of 15 days with one year), capped at two seasons' worth for long records
+CLIMATOLOGY_MIN_SHARE = 0.5
+CLIMATOLOGY_MIN_OBS = 2 * CLIMATOLOGY_WINDOW_DAYS
+
+# Meteorological QC (qc.run_qc): failed cells are set missing before gap filling
+QC_LIMITS = {
+    "tmed_c": (-10.0, 45.0),
+    "tmax_c": (-10.0, 50.0),
+    "tmin_c": (-15.0, 40.0),
+    "rh_mean_pct": (1.0, 100.0),
+    "rh_max_pct": (1.0, 100.0),
+    "rh_min_pct": (1.0, 100.0),
+    "wind_mean_ms": (0.0, 30.0),
+    "wind_max_ms": (0.0, 60.0),
+    "rain_mm": (0.0, 300.0),
+    "rad_global_mj_m2_d": (0.0, 45.0),
+}
+QC_MAX_STEP = {"tmed_c": 10.0, "tmax_c": 15.0, "tmin_c": 15.0}  # day-to-day change
+# Flat-line runs: this many identical consecutive values (rain and rh_max legitimately repeat)
+QC_PERSISTENCE_DAYS = {
+    "tmed_c": 5,
+    "tmax_c": 5,
+    "tmin_c": 5,
+    "rh_mean_pct": 5,
+    "wind_mean_ms": 5,
+    "rad_global_mj_m2_d": 5,
+}
+QC_RSO_TOLERANCE = 1.03  # Rs may exceed clear-sky Rso by this factor
+
+# Rolling means (aggregate.rolling_mean): calendar-day windows and the minimum number of
+# observations a window needs for a mean
+ROLLING_WINDOWS = (3, 7, 15, 30)
+ROLLING_MIN_COUNT = {3: 2, 7: 3, 15: 7, 30: 15}
+ROLLING_CENTER = False
+# Monthly totals of the pipeline and incremental state need a value on every day of the month
+# (else NaN rather than an under-reported sum)
+MONTHLY_COMPLETE = True
+
+# Partitioned storage (storage.py): label columns are stored as categoricals; numbers keep
+# their in-memory dtype (float64) so stored and in-memory runs compute the same values
+STORAGE_CATEGORIES = ("method", "metric", "model", "cv")
+
 METHOD_SHORT = {
     "et_thornthwaite": "thorn",
     "et_thornthwaite_camargo": "thorn_camargo",
@@ -49,6 +191,30 @@ METHOD_SHORT = {
     "et_garcia_lopez": "gl",
 }
 
+# INMET automatic-station hourly CSVs (times in UTC, values for the hour ending then)
+INMET_CSV = {"sep": ";", "decimal": ",", "encoding": "latin-1", "skiprows": 8}
+INMET_MISSING = -9999
+HOURLY_CHUNK_ROWS = 200_000
+DEFAULT_UTC_OFFSET_H = -3  # local day boundaries; stations.csv may set utc_offset
+
+HOURLY_COLUMNS = {
+    "Data": "day",
+    "DATA (YYYY-MM-DD)": "day",
+    "Hora UTC": "hour_utc",
+    "HORA (UTC)": "hour_utc",
+    "PRECIPITAÇÃO TOTAL, HORÁRIO (mm)": "rain_mm",
+    "RADIACAO GLOBAL (Kj/m²)": "rad_mj_m2",
+    "RADIACAO GLOBAL (KJ/m²)": "rad_mj_m2",
+    "TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)": "temp_c",
+    "TEMPERATURA MÁXIMA NA HORA ANT. (AUT) (°C)": "tmax_c",
+    "TEMPERATURA MÍNIMA NA HORA ANT. (AUT) (°C)": "tmin_c",
+    "UMIDADE REL. MAX. NA HORA ANT. (AUT) (%)": "rh_max_pct",
+    "UMIDADE REL. MIN. NA HORA ANT. (AUT) (%)": "rh_min_pct",
+    "UMIDADE RELATIVA DO AR, HORARIA (%)": "rh_pct",
+    "VENTO, RAJADA MAXIMA (m/s)": "gust_ms",
+    "VENTO, VELOCIDADE HORARIA (m/s)": "wind_ms",
+}
+
 WEATHER_COLUMNS = {
     "DIA": "date",
     "TMED (oC)": "tmed_c",
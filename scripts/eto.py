@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+ALBEDO = 0.23
+ALPHA_PT = 1.26
+G_DAILY = 0.0  # MJ m-2 d-1 (soil heat flux, daily step)
+HS_COEF = 0.0023
+K_CAMARGO = 0.01
+SIGMA = 4.903e-9  # MJ K-4 m-2 d-1
+MJ_TO_MM = 0.408  # 1 / lambda (MJ m-2 d-1 -> mm d-1)
+
+METHODS = (
+    "et_thornthwaite",
+    "et_thornthwaite_camargo",
+    "et_camargo",
+    "et_hargreaves_samani",
+    "et_hargreaves_samani_corr",
+    "et_priestley_taylor",
+    "et_penman_monteith",
+    "et_garcia_lopez",
+)
+
+
+def _as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+# Key offset between stations in Thornthwaite's month keys (year * 12 + month stays below it)
+_STATION_STRIDE = 12 * 10_000
+
+
+def _group_mean(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    # NaN-aware mean per group code, returned per group
+    valid = np.isfinite(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+# --- Atmospheric parameters -------------------------------------------------
+
+
+def atmospheric_pressure(alt_m: float) -> float:
+    # P (kPa) FAO-56 eq. 7
+    return 101.3 * ((293 - 0.0065 * alt_m) / 293) ** 5.26
+
+
+def psychrometric_constant(pressure_kpa: float) -> float:
+    # gamma (kPa C-1) FAO-56 eq. 8
+    return 0.000665 * pressure_kpa
+
+
+def saturation_vapour_pressure(t: np.ndarray) -> np.ndarray:
+    # e0(T) (kPa) FAO-56 eq. 11
+    t = _as_array(t)
+    return 0.6108 * np.exp(17.27 * t / (t + 237.3))
+
+
+def vapour_pressure_slope(t: np.ndarray) -> np.ndarray:
+    # Delta (kPa C-1) FAO-56 eq. 13
+    t = _as_array(t)
+    return 4098 * saturation_vapour_pressure(t) / (t + 237.3) ** 2
+
+
+def actual_vapour_pressure(
+    tmax: np.ndarray,
+    tmin: np.ndarray,
+    rh_max: np.ndarray | None = None,
+    rh_min: np.ndarray | None = None,
+    rh_mean: np.ndarray | None = None,
+) -> np.ndarray:
+    # ea (kPa) FAO-56 eq. 17, falling back to eq. 19 where RHmax/RHmin are missing
+    es_max = saturation_vapour_pressure(tmax)
+    es_min = saturation_vapour_pressure(tmin)
+    ea = np.full(es_max.shape, np.nan)
+    if rh_max is not None and rh_min is not None:
+        ea = (es_min * _as_array(rh_max) / 100 + es_max * _as_array(rh_min) / 100) / 2
+    if rh_mean is not None:
+        fallback = _as_array(rh_mean) / 100 * (es_max + es_min) / 2
+        ea = np.where(np.isfinite(ea), ea, fallback)
+    return ea
+
+
+# --- Radiation ---------------------------------------------------------------
+
+
+def solar_declination(doy: np.ndarray) -> np.ndarray:
+    # delta (rad) FAO-56 eq. 24
+    return 0.409 * np.sin(2 * np.pi / 365 * _as_array(doy) - 1.39)
+
+
+def inverse_relative_distance(doy: np.ndarray) -> np.ndarray:
+    # dr FAO-56 eq. 23
+    return 1 + 0.033 * np.cos(2 * np.pi / 365 * _as_array(doy))
+
+
+def sunset_hour_angle(lat_rad: np.ndarray, decl: np.ndarray) -> np.ndarray:
+    # ws (rad) FAO-56 eq. 25, clipped for polar day/night
+    arg = -np.tan(lat_rad) * np.tan(decl)
+    return np.arccos(np.clip(arg, -1.0, 1.0))
+
+
+def extraterrestrial_radiation(lat_deg: float | np.ndarray, doy: np.ndarray) -> np.ndarray:
+    # Ra (MJ m-2 d-1) FAO-56 eq. 21
+    lat_rad = np.radians(_as_array(lat_deg))
+    decl = solar_declination(doy)
+    ws = sunset_hour_angle(lat_rad, decl)
+    return (24 * 60 / np.pi) * 0.0820 * inverse_relative_distance(doy) * (
+        ws * np.sin(lat_rad) * np.sin(decl) + np.cos(lat_rad) * np.cos(decl) * np.sin(ws)
+    )
+
+
+def daylight_hours(lat_deg: float | np.ndarray, doy: np.ndarray) -> np.ndarray:
+    # N (h) FAO-56 eq. 34
+    lat_rad = np.radians(_as_array(lat_deg))
+    return 24 / np.pi * sunset_hour_angle(lat_rad, solar_declination(doy))
+
+
+def clear_sky_radiation(ra: np.ndarray, alt_m: float) -> np.ndarray:
+    # Rso (MJ m-2 d-1) FAO-56 eq. 37
+    return (0.75 + 2e-5 * alt_m) * _as_array(ra)
+
+
+def net_longwave(
+    rs: np.ndarray, rso: np.ndarray, tmax: np.ndarray, tmin: np.ndarray, ea: np.ndarray
+) -> np.ndarray:
+    # Rnl (MJ m-2 d-1) FAO-56 eq. 39
+    rs = _as_array(rs)
+    rso = _as_array(rso)
+    term_temp = ((_as_array(tmax) + 273.16) ** 4 + (_as_array(tmin) + 273.16) ** 4) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(rso > 0, np.minimum(rs / rso, 1.0), np.nan)
+    term_cloud = 1.35 * ratio - 0.35
+    return SIGMA * term_temp * (0.34 - 0.14 * np.sqrt(_as_array(ea))) * term_cloud
+
+
+def net_radiation(
+    rs: np.ndarray,
+    ra: np.ndarray,
+    tmax: np.ndarray,
+    tmin: np.ndarray,
+    ea: np.ndarray,
+    alt_m: float,
+    rn_measured: np.ndarray | None = None,
+    albedo: float = ALBEDO,
+) -> np.ndarray:
+    # Rn (MJ m-2 d-1) FAO-56 eq. 38-40; measured Rn takes precedence where present
+    rso = clear_sky_radiation(ra, alt_m)
+    rn = (1 - albedo) * _as_array(rs) - net_longwave(rs, rso, tmax, tmin, ea)
+    if rn_measured is not None:
+        rn_measured = _as_array(rn_measured)
+        rn = np.where(np.isfinite(rn_measured), rn_measured, rn)
+    return rn
+
+
+# --- ETo methods (mm d-1) ----------------------------------------------------
+
+
+def penman_monteith(
+    rn: np.ndarray,
+    t: np.ndarray,
+    u2: np.ndarray,
+    es: np.ndarray,
+    ea: np.ndarray,
+    delta: np.ndarray,
+    gamma: float,
+    g: float = G_DAILY,
+) -> np.ndarray:
+    # FAO-56 eq. 6
+    t = _as_array(t)
+    u2 = _as_array(u2)
+    num = 0.408 * _as_array(delta) * (_as_array(rn) - g) + gamma * (900 / (t + 273)) * u2 * (
+        _as_array(es) - _as_array(ea)
+    )
+    den = _as_array(delta) + gamma * (1 + 0.34 * u2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den != 0, num / den, np.nan)
+
+
+def priestley_taylor(
+    rn: np.ndarray, delta: np.ndarray, gamma: float, alpha: float = ALPHA_PT, g: float = G_DAILY
+) -> np.ndarray:
+    delta = _as_array(delta)
+    return alpha * (delta / (delta + gamma)) * MJ_TO_MM * (_as_array(rn) - g)
+
+
+def hargreaves_samani(
+    tmean: np.ndarray, tmax: np.ndarray, tmin: np.ndarray, ra: np.ndarray, coef: float = HS_COEF
+) -> np.ndarray:
+    # FAO-56 eq. 52, Ra in MJ m-2 d-1
+    trange = np.maximum(_as_array(tmax) - _as_array(tmin), 0)
+    return coef * (_as_array(tmean) + 17.8) * np.sqrt(trange) * MJ_TO_MM * _as_array(ra)
+
+
+def hargreaves_samani_corrected(
+    tmean: np.ndarray, tmax: np.ndarray, tmin: np.ndarray, ra: np.ndarray
+) -> np.ndarray:
+    # Samani (2000): KT adjusted by the daily temperature range, ETo = 0.0135 KT Ra TD^0.5 (T + 17.8)
+    trange = np.maximum(_as_array(tmax) - _as_array(tmin), 0)
+    kt = 0.00185 * trange**2 - 0.0433 * trange + 0.4023
+    return 0.0135 * kt * (_as_array(tmean) + 17.8) * np.sqrt(trange) * MJ_TO_MM * _as_array(ra)
+
+
+def camargo(tmean: np.ndarray, ra: np.ndarray, k: float = K_CAMARGO) -> np.ndarray:
+    # Camargo (1971): ETo = K Qo T, Qo in mm d-1
+    return k * MJ_TO_MM * _as_array(ra) * _as_array(tmean)
+
+
+def garcia_lopez(tmean: np.ndarray, rh_mean: np.ndarray) -> np.ndarray:
+    # Garcia & Lopez (1970)
+    t = _as_array(tmean)
+    return 1.21 * 10 ** (7.45 * t / (234.7 + t)) * (1 - 0.01 * _as_array(rh_mean)) + 0.21 * t - 2.30
+
+
+def thornthwaite(
+    t: np.ndarray,
+    year: np.ndarray,
+    month: np.ndarray,
+    daylength: np.ndarray,
+    station: np.ndarray | None = None,
+    t_index: np.ndarray | None = None,
+) -> np.ndarray:
+    # Thornthwaite (1948), monthly index from monthly mean T of each year, spread as a daily rate.
+    # The annual heat index I and exponent a come from `t_index` (default: `t`) and need all
+    # 12 monthly means of the year; partial years are NaN rather than biased.
+    # `station` codes keep the monthly means and heat index of several stations apart.
+    t = _as_array(t)
+    year = np.asarray(year)
+    month = np.asarray(month)
+
+    month_key = year.astype(np.int64) * 12 + (month.astype(np.int64) - 1)
+    if station is not None:
+        month_key = month_key + np.asarray(station, dtype=np.int64) * _STATION_STRIDE
+    month_ids, month_codes = np.unique(month_key, return_inverse=True)
+    t_month = _group_mean(t, month_codes, month_ids.size)
+    n_month = _group_mean(_as_array(daylength), month_codes, month_ids.size)
+    t_index_month = t_month if t_index is None else _group_mean(_as_array(t_index), month_codes, month_ids.size)
+
+    # Annual heat index I and exponent a per year
+    year_ids, year_codes = np.unique(month_ids // 12, return_inverse=True)
+    known = np.isfinite(t_index_month)
+    heat = np.where(known, np.clip(t_index_month / 5, 0, None) ** 1.514, 0.0)
+    heat_index = np.bincount(year_codes, weights=heat, minlength=year_ids.size)[year_codes]
+    complete = np.bincount(year_codes, weights=known, minlength=year_ids.size)[year_codes] == 12
+    heat_index = np.where(complete, heat_index, np.nan)
+    a = 6.75e-7 * heat_index**3 - 7.71e-5 * heat_index**2 + 1.792e-2 * heat_index + 0.49239
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        base = np.where(t_month > 0, 16 * (10 * t_month / heat_index) ** a, 0.0)
+    # Willmott et al. (1985) extension above 26.5 C
+    hot = t_month >= 26.5
+    base = np.where(hot, -415.85 + 32.24 * t_month - 0.43 * t_month**2, base)
+    base = np.where(np.isfinite(t_month) & complete, base, np.nan)
+
+    daily = base * (n_month / 12) / 30
+    return daily[month_codes]
+
+
+def effective_temperature(tmax: np.ndarray, tmin: np.ndarray) -> np.ndarray:
+    # Camargo et al. (1999): Tef = 0.36 (3 Tmax - Tmin)
+    return 0.36 * (3 * _as_array(tmax) - _as_array(tmin))
+
+
+# --- Frame-level driver ------------------------------------------------------
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray | None:
+    if name not in df.columns:
+        return None
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+
+# Weather columns the methods read (standardized names)
+INPUTS = (
+    "tmed_c",
+    "tmax_c",
+    "tmin_c",
+    "rh_mean_pct",
+    "rh_max_pct",
+    "rh_min_pct",
+    "wind_mean_ms",
+    "rad_global_mj_m2_d",
+    "rad_net_mj_m2_d",
+)
+
+
+def _check_methods(methods: list[str] | None) -> list[str]:
+    methods = list(METHODS) if methods is None else methods
+    unknown = [m for m in methods if m not in METHODS]
+    if unknown:
+        raise ValueError(f"Unknown ETo methods: {unknown}")
+    return methods
+
+
+def eto_arrays(
+    inputs: dict[str, np.ndarray | None],
+    doy: np.ndarray,
+    year: np.ndarray,
+    month: np.ndarray,
+    lat: float | np.ndarray,
+    alt_m: float | np.ndarray,
+    methods: list[str] | None = None,
+    station: np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    # Array core of compute_eto: 1-D float arrays keyed by INPUTS name (absent or None =
+    # missing column), per-row calendar fields and optional station codes for Thornthwaite
+    methods = _check_methods(methods)
+    doy = np.asarray(doy)
+    nan = np.full(len(doy), np.nan)
+
+    tmean = inputs.get("tmed_c")
+    tmax = inputs.get("tmax_c")
+    tmin = inputs.get("tmin_c")
+    if tmax is None:
+        tmax = nan
+    if tmin is None:
+        tmin = nan
+    if tmean is None:
+        tmean = (tmax + tmin) / 2
+
+    # Tabulated per (latitude, doy) rather than evaluated per row; astronomy builds its
+    # tables from this module's formulas, hence the local import
+    from . import astronomy
+
+    ra, daylength = astronomy.lookup(lat, doy)
+    gamma = psychrometric_constant(atmospheric_pressure(alt_m))
+    delta = vapour_pressure_slope(tmean)
+    es = (saturation_vapour_pressure(tmax) + saturation_vapour_pressure(tmin)) / 2
+    ea = actual_vapour_pressure(
+        tmax,
+        tmin,
+        rh_max=inputs.get("rh_max_pct"),
+        rh_min=inputs.get("rh_min_pct"),
+        rh_mean=inputs.get("rh_mean_pct"),
+    )
+    rs = inputs.get("rad_global_mj_m2_d")
+    rn = net_radiation(
+        rs if rs is not None else nan,
+        ra,
+        tmax,
+        tmin,
+        ea,
+        alt_m,
+        rn_measured=inputs.get("rad_net_mj_m2_d"),
+    )
+    u2 = inputs.get("wind_mean_ms")
+    if u2 is None:
+        u2 = np.full(len(doy), 2.0)  # FAO-56 default when wind is missing
+    rh_mean = inputs.get("rh_mean_pct")
+
+    builders = {
+        "et_thornthwaite": lambda: thornthwaite(tmean, year, month, daylength, station),
+        # Camargo: Tef replaces T in the monthly term only; I and a stay on the mean temperature
+        "et_thornthwaite_camargo": lambda: thornthwaite(
+            effective_temperature(tmax, tmin), year, month, daylength, station, t_index=tmean
+        ),
+        "et_camargo": lambda: camargo(tmean, ra),
+        "et_hargreaves_samani": lambda: hargreaves_samani(tmean, tmax, tmin, ra),
+        "et_hargreaves_samani_corr": lambda: hargreaves_samani_corrected(tmean, tmax, tmin, ra),
+        "et_priestley_taylor": lambda: priestley_taylor(rn, delta, gamma),
+        "et_penman_monteith": lambda: penman_monteith(rn, tmean, u2, es, ea, delta, gamma),
+        "et_garcia_lopez": lambda: garcia_lopez(tmean, rh_mean if rh_mean is not None else nan),
+    }
+    return {method: builders[method]() for method in methods}
+
+
+def compute_eto(
+    df: pd.DataFrame,
+    lat: float | np.ndarray,
+    alt_m: float | np.ndarray,
+    methods: list[str] | None = None,
+) -> pd.DataFrame:
+    # Long multi-site frames (a 'site' column) take per-row lat/alt_m arrays
+    if "date" not in df.columns:
+        raise ValueError("A 'date' column is required to compute ETo")
+    methods = _check_methods(methods)
+
+    dates = pd.to_datetime(df["date"])
+    station = pd.factorize(df["site"])[0] if "site" in df.columns else None
+    values = eto_arrays(
+        {name: _column(df, name) for name in INPUTS},
+        dates.dt.dayofyear.to_numpy(),
+        dates.dt.year.to_numpy(),
+        dates.dt.month.to_numpy(),
+        lat,
+        alt_m,
+        methods,
+        station,
+    )
+
+    out = pd.DataFrame({"date": dates.to_numpy()}, index=df.index)
+    if station is not None:
+        out.insert(0, "site", df["site"])
+    for method in methods:
+        out[method] = values[method]
+    return out
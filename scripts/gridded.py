@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
+import json
+import numpy as np
+import pandas as pd
+
+from . import eto
+from .config import ASTRO_EXACT_MAX_LATS, GRID_DTYPE, GRID_TILE_MB
+from .profiling import peak_rss_mb
+
+# Gridded ETo over reanalysis-style stacks. A grid directory holds one (time, lat, lon) .npy
+# stack per input variable, named like the standardized columns (tmax_c.npy, ...), and the
+# axes lat.npy (n_lat,), lon.npy (n_lon,), elevation.npy (n_lat, n_lon; m) and dates.npy
+# (n_time; datetime64[D]). Stacks are memory-mapped and the methods are computed tile by tile
+# (one calendar year x a block of cells) into memory-mapped <method>.npy stacks, so memory
+# follows the tile size rather than the grid size.
+VARIABLES = (
+    "tmed_c",
+    "tmax_c",
+    "tmin_c",
+    "rh_mean_pct",
+    "rh_max_pct",
+    "rh_min_pct",
+    "wind_mean_ms",
+    "rad_global_mj_m2_d",
+    "rad_net_mj_m2_d",
+)
+AXES = ("lat", "lon", "elevation", "dates")
+MANIFEST = "grid.json"
+# Peak working memory of a tile per cell-day (long frame, intermediates, outputs; ~340 B
+# measured with all inputs and methods), used to size tiles from a memory budget
+BYTES_PER_CELL_DAY = 400
+
+
+@dataclass(frozen=True)
+class Grid:
+    root: Path
+    variables: list[str]
+    lat: np.ndarray
+    lon: np.ndarray
+    elevation: np.ndarray
+    dates: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return len(self.dates), len(self.lat), len(self.lon)
+
+    def stack(self, name: str) -> np.ndarray:
+        return np.load(self.root / f"{name}.npy", mmap_mode="r")
+
+
+@dataclass(frozen=True)
+class Tile:
+    time: slice
+    rows: slice
+    cols: slice
+
+
+def open_grid(root: Path) -> Grid:
+    root = Path(root)
+    missing = [f"{axis}.npy" for axis in AXES if not (root / f"{axis}.npy").exists()]
+    if missing:
+        raise FileNotFoundError(f"Grid {root} lacks {missing}")
+    grid = Grid(
+        root=root,
+        variables=[name for name in VARIABLES if (root / f"{name}.npy").exists()],
+        lat=np.load(root / "lat.npy"),
+        lon=np.load(root / "lon.npy"),
+        elevation=np.load(root / "elevation.npy", mmap_mode="r"),
+        dates=np.load(root / "dates.npy").astype("datetime64[D]"),
+    )
+    if not grid.variables:
+        raise ValueError(f"Grid {root} has no input stacks (expected some of {list(VARIABLES)})")
+    if grid.elevation.shape != grid.shape[1:]:
+        raise ValueError(f"elevation.npy is {grid.elevation.shape}, expected {grid.shape[1:]}")
+    for name in grid.variables:
+        if grid.stack(name).shape != grid.shape:
+            raise ValueError(f"{name}.npy is {grid.stack(name).shape}, expected {grid.shape}")
+    return grid
+
+
+# Workers open each grid once, not once per tile
+_open_grid = lru_cache(maxsize=4)(open_grid)
+
+
+def plan_tiles(grid: Grid, tile_mb: float = GRID_TILE_MB) -> list[Tile]:
+    # Calendar years keep Thornthwaite's monthly means and annual heat index exact per tile.
+    # Cells are taken as whole latitude rows when they fit the budget (contiguous reads),
+    # at most ASTRO_EXACT_MAX_LATS rows so Ra/N come from exact per-latitude rows.
+    n_time, n_lat, n_lon = grid.shape
+    years = grid.dates.astype("datetime64[Y]")
+    bounds = [0, *(np.flatnonzero(years[1:] != years[:-1]) + 1), n_time]
+    days = max(stop - start for start, stop in zip(bounds[:-1], bounds[1:]))
+    cells = max(1, int(tile_mb * 2**20 // (days * BYTES_PER_CELL_DAY)))
+    if cells >= n_lon:
+        n_rows, n_cols = min(n_lat, cells // n_lon, ASTRO_EXACT_MAX_LATS), n_lon
+    else:
+        n_rows, n_cols = 1, cells
+    return [
+        Tile(slice(start, stop), slice(row, min(row + n_rows, n_lat)), slice(col, min(col + n_cols, n_lon)))
+        for start, stop in zip(bounds[:-1], bounds[1:])
+        for row in range(0, n_lat, n_rows)
+        for col in range(0, n_lon, n_cols)
+    ]
+
+
+def compute_tile(root: Path, tile: Tile, methods: list[str], output_dir: Path) -> None:
+    # Every cell of the tile is a station of one long compute_eto frame (cell-major, so
+    # Thornthwaite groups never mix cells); results are written into the output stacks
+    grid = _open_grid(Path(root))
+    dates = grid.dates[tile.time]
+    lat = grid.lat[tile.rows]
+    elevation = np.asarray(grid.elevation[tile.rows, tile.cols], dtype=float)
+    n_days, (n_rows, n_cols) = len(dates), elevation.shape
+    n_cells = n_rows * n_cols
+
+    columns = {"site": np.repeat(np.arange(n_cells), n_days), "date": np.tile(dates, n_cells)}
+    for name in grid.variables:
+        block = np.asarray(grid.stack(name)[tile.time, tile.rows, tile.cols], dtype=float)
+        columns[name] = block.reshape(n_days, n_cells).T.ravel()
+    frame = pd.DataFrame(columns)
+    del columns
+    result = eto.compute_eto(
+        frame,
+        lat=np.repeat(np.repeat(lat, n_cols), n_days),
+        alt_m=np.repeat(elevation.ravel(), n_days),
+        methods=methods,
+    )
+    del frame
+
+    for method in methods:
+        out = np.load(output_dir / f"{method}.npy", mmap_mode="r+")
+        values = result[method].to_numpy().reshape(n_cells, n_days).T
+        out[tile.time, tile.rows, tile.cols] = values.reshape(n_days, n_rows, n_cols)
+        out.flush()
+        del out
+
+
+def run_grid(
+    input_dir: Path,
+    output_dir: Path,
+    methods: list[str] | None = None,
+    workers: int = 1,
+    tile_mb: float = GRID_TILE_MB,
+    dtype: str = GRID_DTYPE,
+) -> dict:
+    # Output directory is a grid too: the input axes, one stack per method and grid.json
+    grid = open_grid(input_dir)
+    methods = list(eto.METHODS) if not methods else methods
+    unknown = [m for m in methods if m not in eto.METHODS]
+    if unknown:
+        raise ValueError(f"Unknown ETo methods: {unknown}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for axis in AXES:
+        np.save(output_dir / f"{axis}.npy", np.asarray(getattr(grid, axis)))
+    for method in methods:
+        np.lib.format.open_memmap(output_dir / f"{method}.npy", mode="w+", dtype=dtype, shape=grid.shape).flush()
+
+    tiles = plan_tiles(grid, tile_mb)
+    if workers <= 1 or len(tiles) <= 1:
+        for tile in tiles:
+            compute_tile(grid.root, tile, methods, output_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(compute_tile, repeat(grid.root), tiles, repeat(methods), repeat(output_dir)))
+
+    summary = {
+        "input": str(grid.root),
+        "shape": list(grid.shape),
+        "start": str(grid.dates[0]),
+        "end": str(grid.dates[-1]),
+        "variables": grid.variables,
+        "methods": methods,
+        "dtype": dtype,
+        "tiles": len(tiles),
+        "tile_mb": tile_mb,
+        "workers": workers,
+        "peak_rss_mb": peak_rss_mb(),  # this process; workers have their own
+    }
+    (output_dir / MANIFEST).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Iterator
+import numpy as np
+import pandas as pd
+
+from . import eto
+from .config import DEFAULT_UTC_OFFSET_H, HOURLY_CHUNK_ROWS, HOURLY_COLUMNS, INMET_CSV, INMET_MISSING
+
+GSC = 0.0820  # solar constant, MJ m-2 min-1
+WIND_HEIGHT_M = 10.0  # INMET anemometer height
+
+# Per-day partial aggregates: every column merges across chunks by sum, min or max, so a
+# day split over a chunk edge is combined exactly without keeping its hourly rows
+_SUMS = {
+    "hours": "hours",
+    "sum_temp": "temp_c",
+    "sum_rh": "rh_pct",
+    "sum_wind": "wind_ms",
+    "rain_mm": "rain_mm",
+    "rad_global_mj_m2_d": "rad_mj_m2",
+    "et_pm_hourly": "eto_mm",
+}
+_COUNTS = {
+    "n_temp": "temp_c",
+    "n_rh": "rh_pct",
+    "n_wind": "wind_ms",
+    "n_rain": "rain_mm",
+    "n_rad": "rad_mj_m2",
+    "n_eto": "eto_mm",
+}
+_MAXES = {"tmax_c": "tmax_c", "rh_max_pct": "rh_max_pct", "wind_max_ms": "gust_ms"}
+_MINS = {"tmin_c": "tmin_c", "rh_min_pct": "rh_min_pct"}
+
+
+def read_hourly_chunks(path: Path, chunk_rows: int = HOURLY_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    # INMET hourly CSV in fixed-size chunks, renamed to HOURLY_COLUMNS with a UTC 'time'
+    reader = pd.read_csv(
+        path,
+        usecols=lambda col: col in HOURLY_COLUMNS,
+        chunksize=chunk_rows,
+        dtype=str,
+        **INMET_CSV,
+    )
+    for chunk in reader:
+        chunk = chunk.rename(columns=HOURLY_COLUMNS)
+        hour = chunk["hour_utc"].str.extract(r"(\d{1,2}):?(\d{2})?")[0].astype(float)
+        time = pd.to_datetime(chunk["day"].str.replace("/", "-"), errors="coerce")
+        out = pd.DataFrame({"time": time + pd.to_timedelta(hour, unit="h")})
+        for col in chunk.columns.difference(["day", "hour_utc"]):
+            values = pd.to_numeric(chunk[col].str.replace(",", "."), errors="coerce")
+            out[col] = values.mask(values == INMET_MISSING)
+        if "rad_mj_m2" in out:
+            out["rad_mj_m2"] = out["rad_mj_m2"].clip(lower=0) / 1000  # kJ m-2 h-1 -> MJ
+        yield out.dropna(subset=["time"])
+
+
+def extraterrestrial_radiation_hourly(lat_deg: float, lon_deg: float, time_utc: pd.Series) -> np.ndarray:
+    # Ra (MJ m-2 h-1) for the hour ending at `time_utc`, FAO-56 eq. 28-33 with UTC clock
+    # time (Lz = 0) and Lm in degrees west of Greenwich
+    doy = time_utc.dt.dayofyear.to_numpy()
+    mid = (time_utc.dt.hour + time_utc.dt.minute / 60).to_numpy() - 0.5
+    b = 2 * np.pi * (doy - 81) / 364
+    sc = 0.1645 * np.sin(2 * b) - 0.1255 * np.cos(b) - 0.025 * np.sin(b)
+    omega = np.pi / 12 * ((mid + 0.06667 * lon_deg + sc) - 12)
+
+    lat = np.radians(lat_deg)
+    decl = eto.solar_declination(doy)
+    ws = eto.sunset_hour_angle(lat, decl)
+    w1 = np.clip(omega - np.pi / 24, -ws, ws)
+    w2 = np.clip(omega + np.pi / 24, -ws, ws)
+    ra = (
+        12 * 60 / np.pi * GSC * eto.inverse_relative_distance(doy)
+        * ((w2 - w1) * np.sin(lat) * np.sin(decl) + np.cos(lat) * np.cos(decl) * (np.sin(w2) - np.sin(w1)))
+    )
+    return np.maximum(ra, 0.0)
+
+
+def wind_at_2m(wind: np.ndarray, height_m: float = WIND_HEIGHT_M) -> np.ndarray:
+    # FAO-56 eq. 47: wind speed measured `height_m` above ground to the 2 m reference height
+    return wind * 4.87 / np.log(67.8 * height_m - 5.42)
+
+
+def penman_monteith_hourly(
+    hourly: pd.DataFrame, lat: float, lon: float, alt_m: float, cloud_ratio: float | None = None
+) -> tuple[np.ndarray, float | None]:
+    # ETo (mm h-1) FAO-56 eq. 53. At night (and in daylight hours without radiation) Rs/Rso
+    # is carried over from the last daylight hour, continuing across chunks via
+    # `cloud_ratio`; returns the ratio to carry on
+    t = hourly["temp_c"].to_numpy(dtype=float)
+    es = eto.saturation_vapour_pressure(t)
+    ea = es * hourly["rh_pct"].to_numpy(dtype=float) / 100  # eq. 54
+    u2 = wind_at_2m(hourly["wind_ms"].to_numpy(dtype=float))
+
+    rso = eto.clear_sky_radiation(extraterrestrial_radiation_hourly(lat, lon, hourly["time"]), alt_m)
+    day = rso > 0.05
+    rs = hourly["rad_mj_m2"].to_numpy(dtype=float)
+    rs = np.where(np.isnan(rs) & ~day, 0.0, rs)  # radiation is usually left blank at night
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = pd.Series(np.where(day, np.clip(rs / rso, 0.25, 1.0), np.nan))
+    if cloud_ratio is not None and len(ratio) and np.isnan(ratio.iloc[0]):
+        ratio.iloc[0] = cloud_ratio
+    # Forward only, so the result does not depend on where chunks start: hours before the
+    # first daylight hour with radiation have no ratio (and no ETo)
+    ratio = ratio.ffill().to_numpy()
+    carried = float(ratio[-1]) if len(ratio) and np.isfinite(ratio[-1]) else cloud_ratio
+
+    sigma_h = eto.SIGMA / 24
+    rnl = sigma_h * (t + 273.16) ** 4 * (0.34 - 0.14 * np.sqrt(ea)) * (1.35 * ratio - 0.35)
+    rn = (1 - eto.ALBEDO) * rs - rnl
+    g = np.where(day, 0.1, 0.5) * rn
+
+    delta = eto.vapour_pressure_slope(t)
+    gamma = eto.psychrometric_constant(eto.atmospheric_pressure(alt_m))
+    num = 0.408 * delta * (rn - g) + gamma * 37 / (t + 273) * u2 * (es - ea)
+    return num / (delta + gamma * (1 + 0.34 * u2)), carried
+
+
+def _partials(hourly: pd.DataFrame, utc_offset_h: float) -> pd.DataFrame:
+    local = hourly["time"] + pd.to_timedelta(utc_offset_h, unit="h")
+    # The hour ending at local midnight belongs to the previous day
+    date = (local - pd.Timedelta(minutes=1)).dt.normalize()
+    frame = hourly.assign(date=date.to_numpy(), hours=1)
+    for col in ("tmax_c", "tmin_c"):
+        if col in frame and "temp_c" in frame:
+            frame[col] = frame[col].fillna(frame["temp_c"])
+
+    groups = frame.groupby("date", sort=True)
+    parts = {}
+    for name, col in _SUMS.items():
+        if col in frame:
+            parts[name] = groups[col].sum(min_count=1) if col != "hours" else groups[col].sum()
+    for name, col in _COUNTS.items():
+        if col in frame:
+            parts[name] = groups[col].count()
+    for name, col in _MAXES.items():
+        if col in frame:
+            parts[name] = groups[col].max()
+    for name, col in _MINS.items():
+        if col in frame:
+            parts[name] = groups[col].min()
+    return pd.DataFrame(parts).reset_index()
+
+
+def _merge_partials(parts: pd.DataFrame) -> pd.DataFrame:
+    groups = parts.groupby("date", sort=True)
+    agg = {}
+    for col in parts.columns.drop("date"):
+        if col in _MAXES:
+            agg[col] = groups[col].max()
+        elif col in _MINS:
+            agg[col] = groups[col].min()
+        else:
+            agg[col] = groups[col].sum(min_count=1)
+    return pd.DataFrame(agg).reset_index()
+
+
+def hourly_to_daily(
+    chunks: Iterable[pd.DataFrame],
+    utc_offset_h: float = DEFAULT_UTC_OFFSET_H,
+    site: dict | None = None,
+) -> pd.DataFrame:
+    # Daily WEATHER_COLUMNS schema (mean wind at 2 m) plus per-day completeness counts
+    # (hours, n_*). With a station `site` (lat, lon, alt_m) the hourly Penman-Monteith sum
+    # is added as et_pm_hourly. Memory is one chunk plus one partial row per day seen so far.
+    partials = []
+    cloud_ratio = None
+    for chunk in chunks:
+        if site is not None and {"temp_c", "rh_pct", "wind_ms", "rad_mj_m2"} <= set(chunk.columns):
+            chunk = chunk.sort_values("time")
+            eto_h, cloud_ratio = penman_monteith_hourly(chunk, site["lat"], site["lon"], site["alt_m"], cloud_ratio)
+            chunk = chunk.assign(eto_mm=eto_h)
+        partials.append(_partials(chunk, utc_offset_h))
+        if len(partials) > 1:
+            # Fold as we go so the partials stay one row per day
+            partials = [_merge_partials(pd.concat(partials, ignore_index=True))]
+    if not partials:
+        return pd.DataFrame(columns=["date"])
+
+    daily = _merge_partials(pd.concat(partials, ignore_index=True))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for mean_col, sum_col, count_col in (
+            ("tmed_c", "sum_temp", "n_temp"),
+            ("rh_mean_pct", "sum_rh", "n_rh"),
+            ("wind_mean_ms", "sum_wind", "n_wind"),
+        ):
+            if sum_col in daily:
+                daily[mean_col] = daily[sum_col] / daily[count_col].where(daily[count_col] > 0)
+    if "wind_mean_ms" in daily:
+        # Daily methods take u2; the gust maximum stays at the sensor height
+        daily["wind_mean_ms"] = wind_at_2m(daily["wind_mean_ms"])
+    if "et_pm_hourly" in daily:
+        # Only meaningful for complete days
+        daily["et_pm_hourly"] = daily["et_pm_hourly"].where(daily["n_eto"] == 24)
+
+    daily = daily.drop(columns=[c for c in ("sum_temp", "sum_rh", "sum_wind") if c in daily])
+    schema = [
+        "date", "tmed_c", "tmax_c", "tmin_c", "rh_mean_pct", "rh_max_pct", "rh_min_pct",
+        "wind_mean_ms", "wind_max_ms", "rain_mm", "rad_global_mj_m2_d", "et_pm_hourly",
+    ]
+    ordered = [c for c in schema if c in daily] + [c for c in daily.columns if c not in schema]
+    return daily[ordered]
+
+
+def ingest_hourly(
+    paths: list[Path],
+    site: dict | None = None,
+    chunk_rows: int = HOURLY_CHUNK_ROWS,
+    hourly_eto: bool = False,
+) -> pd.DataFrame:
+    # Stream one or more hourly files (e.g. one per year) into a single daily frame
+    offset = float(site.get("utc_offset", DEFAULT_UTC_OFFSET_H)) if site else DEFAULT_UTC_OFFSET_H
+
+    def chunks() -> Iterator[pd.DataFrame]:
+        for path in paths:
+            yield from read_hourly_chunks(path, chunk_rows)
+
+    return hourly_to_daily(chunks(), offset, site if hourly_eto else None)
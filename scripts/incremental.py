@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from . import aggregate, cleaning, io, metrics, qc
+from .config import (
+    DATA_STATE,
+    METHOD_COLUMNS,
+    MONTHLY_COMPLETE,
+    QC_PERSISTENCE_DAYS,
+    ROLLING_CENTER,
+    ROLLING_WINDOWS,
+)
+from .pipeline import REF_COL, SitePipeline
+
+
+@dataclass
+class SiteState:
+    """Stored series and partial aggregates needed to update a site without a rebuild."""
+
+    observed: pd.DataFrame  # merged raw observations (before QC and gap filling)
+    qc: pd.DataFrame  # per-cell QC bits for `observed`
+    daily: pd.DataFrame
+    flags: pd.DataFrame  # per-cell gap-fill flags for `daily`
+    rolling: pd.DataFrame
+    monthly: pd.DataFrame
+    partials: pd.DataFrame  # per (month, method) metrics accumulator state vs the reference
+
+    FRAMES = ("observed", "qc", "daily", "flags", "rolling", "monthly", "partials")
+
+    def save(self, state_dir: Path) -> None:
+        for name in self.FRAMES:
+            io.write_frame(getattr(self, name), state_dir / name)
+
+    @classmethod
+    def load(cls, state_dir: Path) -> "SiteState | None":
+        frames = {name: io.read_frame(state_dir / name) for name in cls.FRAMES}
+        if any(frame is None for frame in frames.values()):
+            return None
+        return cls(**frames)
+
+
+def state_dir(site: str, root: Path = DATA_STATE) -> Path:
+    return root / site
+
+
+def _method_cols(df: pd.DataFrame) -> list[str]:
+    return [col for col in METHOD_COLUMNS.values() if col in df.columns]
+
+
+def _sort_dedupe(df: pd.DataFrame) -> pd.DataFrame:
+    return cleaning.sort_dedupe(df).reset_index(drop=True)
+
+
+# --- Partial aggregates ------------------------------------------------------
+
+
+def monthly_partials(daily: pd.DataFrame, ref_col: str = REF_COL) -> pd.DataFrame:
+    # Pass-1 metrics accumulator state per (month, method); daily metrics merge these rows
+    compare_cols = [c for c in _method_cols(daily) if c != ref_col]
+    columns = ["month", "method", *metrics.MetricsAccumulator.STATE_FIELDS]
+    if not compare_cols or daily.empty:
+        return pd.DataFrame(columns=columns)
+
+    month = aggregate.add_month(daily[["date"]])["month"]
+    ref = daily[ref_col].to_numpy(dtype=float) if ref_col in daily.columns else np.full(len(daily), np.nan)
+    preds = daily[compare_cols].to_numpy(dtype=float)
+
+    frames = []
+    for key, rows in daily.groupby(month, sort=True).indices.items():
+        state = metrics.MetricsAccumulator(compare_cols).update(ref[rows], preds[rows]).to_state()
+        state.insert(0, "month", key)
+        frames.append(state)
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def metrics_from_partials(
+    partials: pd.DataFrame, daily: pd.DataFrame, method_cols: list[str], ref_col: str = REF_COL
+) -> pd.DataFrame:
+    # Moments and error sums come from merging the stored monthly states; Willmott's d
+    # depends on the final reference mean, so its second pass runs over the series
+    acc = metrics.MetricsAccumulator(method_cols)
+    for _, state in partials.groupby("month", sort=True):
+        acc.merge(metrics.MetricsAccumulator.from_state(state, method_cols))
+    acc.update_agreement(daily[ref_col].to_numpy(dtype=float), daily[method_cols].to_numpy(dtype=float))
+    return acc.to_frame()
+
+
+# --- Build / update ----------------------------------------------------------
+
+
+def build_state(observed: pd.DataFrame, meta: dict | None = None, ref_col: str = REF_COL) -> SiteState:
+    observed = _sort_dedupe(observed)
+    qc_flags, daily, flags = _clean(observed, meta)
+    method_cols = _method_cols(daily)
+    return SiteState(
+        observed=observed,
+        qc=qc_flags,
+        daily=daily,
+        flags=flags,
+        rolling=aggregate.rolling_mean(daily, ROLLING_WINDOWS, center=ROLLING_CENTER),
+        monthly=aggregate.monthly_sum(daily, method_cols, complete=MONTHLY_COMPLETE),
+        partials=monthly_partials(daily, ref_col),
+    )
+
+
+def state_from_pipeline(pipe: SitePipeline, ref_col: str = REF_COL) -> SiteState:
+    # The pipeline's 'observed' stage is already sorted and deduplicated like build_state's
+    daily = pipe.get("daily").reset_index(drop=True)
+    return SiteState(
+        observed=pipe.get("observed"),
+        qc=pipe.get("qc_flags"),
+        daily=daily,
+        flags=pipe.get("fill_flags").reset_index(drop=True),
+        rolling=pipe.get("rolling").reset_index(drop=True),
+        monthly=pipe.get("monthly"),
+        partials=monthly_partials(daily, ref_col),
+    )
+
+
+def pipeline_from_state(site: str, meta: dict, state: SiteState, ref_col: str = REF_COL) -> SitePipeline:
+    # Seed a pipeline with the updated intermediates so the usual sinks can write them
+    daily_metrics, monthly_metrics = site_metrics(state, ref_col)
+    return SitePipeline(
+        site,
+        meta,
+        results={
+            "observed": state.observed,
+            "qc_flags": state.qc,
+            "daily": state.daily,
+            "fill_flags": state.flags,
+            "rolling": state.rolling,
+            "monthly": state.monthly,
+            "daily_metrics": daily_metrics,
+            "monthly_metrics": monthly_metrics,
+        },
+    )
+
+
+def _clean(observed: pd.DataFrame, meta: dict | None) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # QC bits, cleaned series and fill flags for sorted, deduplicated observations
+    meta = meta or {}
+    qc_flags = qc.run_qc(observed, lat=meta.get("lat"), alt_m=meta.get("alt_m", 0.0))
+    daily, flags = cleaning.clean_daily_flagged(qc.mask_failed(observed, qc_flags))
+    return qc_flags, daily.reset_index(drop=True), flags.reset_index(drop=True)
+
+
+# Rows on either side of a changed observation whose QC bits can change: a flat-line run
+# keeps its flag unless it ends within QC_PERSISTENCE_DAYS rows, and steps look one row back
+QC_REACH = max(QC_PERSISTENCE_DAYS.values(), default=0) + 2
+
+
+def _windowed(state: SiteState, observed: pd.DataFrame) -> bool:
+    # The windowed update assumes one station with fully dated rows and the stored columns, and
+    # fill rules under which a cell far from the new rows can only change through climatology
+    if list(observed.columns) != list(state.observed.columns) or "site" in observed.columns:
+        return False
+    if "date" not in observed.columns or observed["date"].isna().any():
+        return False
+    for col in cleaning.fill_columns(observed):
+        rule = cleaning.fill_rule(col)
+        short, long = rule["short"], rule["long"]
+        # A missing cell must tell whether its gap was short or long without the gap length
+        if long == "linear" or (long == "climatology" and short == "missing"):
+            return False
+        if short == "climatology" and long != "climatology":
+            return False
+    return True
+
+
+def _splice(old: pd.DataFrame, old_dates: np.ndarray, part: pd.DataFrame, first, last) -> pd.DataFrame:
+    # Stored rows dated before `first` and after `last` around the recomputed `part`
+    head = old.iloc[: np.searchsorted(old_dates, first, side="left")]
+    tail = old.iloc[np.searchsorted(old_dates, last, side="right") :]
+    return pd.concat([head, part, tail], ignore_index=True)
+
+
+def _splice_rows(old: pd.DataFrame, old_dates: np.ndarray, first, last) -> pd.DataFrame:
+    # Stored rows dated `first` through `last`
+    return old.iloc[np.searchsorted(old_dates, first, side="left") : np.searchsorted(old_dates, last, side="right")]
+
+
+def _rows_differ(old: pd.DataFrame, new: pd.DataFrame) -> np.ndarray:
+    # Per row of `new`: no row of `old` has its date, or a value differs (NaN == NaN)
+    if old.empty:
+        return np.ones(len(new), dtype=bool)
+    old_dates = old["date"].to_numpy("datetime64[D]")
+    new_dates = new["date"].to_numpy("datetime64[D]")
+    pos = np.minimum(np.searchsorted(old_dates, new_dates), len(old) - 1)
+    differs = old_dates[pos] != new_dates
+    for col in new.columns:
+        a = old[col].to_numpy()[pos]
+        b = new[col].to_numpy()
+        same = a == b
+        if a.dtype.kind == "f" and b.dtype.kind == "f":
+            same |= np.isnan(a) & np.isnan(b)
+        differs |= ~same
+    return differs
+
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int]]:
+    # (first, last) rows of the True runs in `mask`
+    rows = np.flatnonzero(mask)
+    if not rows.size:
+        return []
+    cuts = np.flatnonzero(np.diff(rows) > 1)
+    return list(zip(rows[np.r_[0, cuts + 1]], rows[np.r_[cuts, rows.size - 1]]))
+
+
+def update_state(
+    state: SiteState, new_rows: pd.DataFrame, meta: dict | None = None, ref_col: str = REF_COL
+) -> tuple[SiteState, dict]:
+    if new_rows.empty:
+        return state, {"rows": 0, "start": None, "changed": 0, "months": 0}
+    if "date" not in new_rows.columns:
+        raise ValueError("New rows need a 'date' column")
+
+    # New rows override stored observations for the same date
+    existing = state.observed[~state.observed["date"].isin(new_rows["date"])]
+    observed = _sort_dedupe(pd.concat([existing, new_rows], ignore_index=True))
+    if not _windowed(state, observed):
+        rebuilt = build_state(observed, meta, ref_col)
+        months = int(rebuilt.daily["date"].dt.to_period("M").nunique())
+        return rebuilt, {"rows": len(new_rows), "start": 0, "changed": len(rebuilt.daily), "months": months}
+
+    meta = meta or {}
+    n = len(observed)
+    dates = observed["date"].to_numpy("datetime64[D]")
+    old_dates = state.observed["date"].to_numpy("datetime64[D]")
+    new = np.flatnonzero(observed["date"].isin(new_rows["date"]).to_numpy())
+    lo, hi = int(new[0]), int(new[-1])
+
+    # QC bits only change within QC_REACH rows of the new rows; they are computed with as
+    # many rows again of context so runs and steps at the window edges see their neighbours
+    q_lo, q_hi = max(lo - QC_REACH, 0), min(hi + QC_REACH, n - 1)
+    c_lo, c_hi = max(lo - 2 * QC_REACH, 0), min(hi + 2 * QC_REACH, n - 1)
+    window_qc = qc.run_qc(observed.iloc[c_lo : c_hi + 1], lat=meta.get("lat"), alt_m=meta.get("alt_m", 0.0))
+    window_qc = window_qc.iloc[q_lo - c_lo : q_hi - c_lo + 1]
+    qc_flags = _splice(state.qc, old_dates, window_qc, dates[q_lo], dates[q_hi])
+
+    # Gap lengths and interpolation only change within the longest short gap of the changed
+    # QC rows. The fill runs with that many days again of context (from the last row before
+    # it), so a gap cut at the context edge is still too long for a short fill; climatology is
+    # a day-of-year table over the whole series and is recomputed from all masked values.
+    masked = qc.mask_failed(observed, qc_flags)
+    cols = cleaning.fill_columns(masked)
+    climate = cleaning.climatology(masked, masked[cols].to_numpy(dtype=float), np.zeros(n, dtype=np.int64))
+    reach = np.timedelta64(max((cleaning.fill_rule(col)["max_gap"] for col in cols), default=0) + 1, "D")
+    f_lo = int(np.searchsorted(dates, dates[q_lo] - reach, side="left"))
+    f_hi = int(np.searchsorted(dates, dates[q_hi] + reach, side="right")) - 1
+    x_lo = max(int(np.searchsorted(dates, dates[q_lo] - 2 * reach, side="right")) - 1, 0)
+    x_hi = min(int(np.searchsorted(dates, dates[q_hi] + 2 * reach, side="left")), n - 1)
+    filled, filled_flags = cleaning.fill_gaps(masked.iloc[x_lo : x_hi + 1], cols, climate[x_lo : x_hi + 1])
+    keep = slice(f_lo - x_lo, f_hi - x_lo + 1)
+    old_daily = state.daily.iloc[
+        np.searchsorted(old_dates, dates[f_lo], side="left") : np.searchsorted(old_dates, dates[f_hi], side="right")
+    ]
+    changed = np.zeros(n, dtype=bool)
+    changed[f_lo : f_hi + 1] = _rows_differ(old_daily, filled.iloc[keep])
+    daily = _splice(state.daily, old_dates, filled.iloc[keep], dates[f_lo], dates[f_hi])
+    flags = _splice(state.flags, old_dates, filled_flags.iloc[keep], dates[f_lo], dates[f_hi])
+
+    # Outside the window, climatology fills (and cells left missing for want of one) take the
+    # new table
+    refresh = [j for j, col in enumerate(cols) if cleaning.fill_rule(col)["long"] == "climatology"]
+    if refresh:
+        outside = np.ones(n, dtype=bool)
+        outside[f_lo : f_hi + 1] = False
+        names = [cols[j] for j in refresh]
+        old_values = daily[names].to_numpy(dtype=float)
+        old_flags = flags[names].to_numpy()
+        stale = outside[:, None] & np.isin(old_flags, (cleaning.CLIMATOLOGY, cleaning.MISSING))
+        values = np.where(stale, climate[:, refresh], old_values)
+        new_flags = np.where(
+            stale, np.where(np.isnan(values), cleaning.MISSING, cleaning.CLIMATOLOGY), old_flags
+        ).astype(np.uint8)
+        refreshed = ((values != old_values) & ~(np.isnan(values) & np.isnan(old_values))) | (new_flags != old_flags)
+        if refreshed.any():
+            daily[names] = values
+            flags[names] = new_flags
+            changed |= refreshed.any(axis=1)
+
+    if not changed.any():
+        # Same cleaned series (e.g. re-sent rows): only the stored observations change
+        unchanged = SiteState(observed, qc_flags, daily, flags, state.rolling, state.monthly, state.partials)
+        return unchanged, {"rows": len(new_rows), "start": None, "changed": 0, "months": 0}
+
+    # Rolling windows reaching a changed row (dates are unique, so a window of d days spans
+    # at most d rows), with `before`/`after` rows of context. Runs of such rows further apart
+    # than a window are rolled in one call: their contexts cannot reach each other.
+    before, after = aggregate.window_reach(ROLLING_WINDOWS, ROLLING_CENTER)
+    reached = np.convolve(changed, np.ones(before + after + 1), mode="full")[after : after + n] > 0
+    context = np.convolve(reached, np.ones(before + after + 1), mode="full")[before : before + n] > 0
+    rolled = aggregate.rolling_mean(daily[context], ROLLING_WINDOWS, center=ROLLING_CENTER)
+    old_rolling_dates = state.rolling["date"].to_numpy("datetime64[D]")
+    pieces, done = [], 0
+    for first, last in _runs(reached):
+        if first > done:
+            pieces.append(_splice_rows(state.rolling, old_rolling_dates, dates[done], dates[first - 1]))
+        pieces.append(_splice_rows(rolled, dates[context], dates[first], dates[last]))
+        done = last + 1
+    if done < n:
+        pieces.append(_splice_rows(state.rolling, old_rolling_dates, dates[done], dates[n - 1]))
+    rolling = pd.concat(pieces, ignore_index=True)
+
+    # Touched months only
+    method_cols = _method_cols(daily)
+    month = aggregate.add_month(daily[["date"]])["month"]
+    touched = pd.Index(month[changed].unique())
+    rows = daily[month.isin(touched).to_numpy()]
+    monthly = pd.concat(
+        [
+            state.monthly[~state.monthly["month"].isin(touched)],
+            aggregate.monthly_sum(rows, method_cols, complete=MONTHLY_COMPLETE),
+        ],
+        ignore_index=True,
+    )
+    partials = pd.concat(
+        [state.partials[~state.partials["month"].isin(touched)], monthly_partials(rows, ref_col)],
+        ignore_index=True,
+    )
+
+    new_state = SiteState(
+        observed=observed,
+        qc=qc_flags,
+        daily=daily,
+        flags=flags,
+        rolling=rolling,
+        monthly=monthly.sort_values("month", kind="stable", ignore_index=True),
+        partials=partials.sort_values("month", kind="stable", ignore_index=True),
+    )
+    summary = {
+        "rows": len(new_rows),
+        "start": int(np.flatnonzero(changed)[0]),
+        "changed": int(changed.sum()),
+        "months": len(touched),
+    }
+    return new_state, summary
+
+
+def site_metrics(state: SiteState, ref_col: str = REF_COL) -> tuple[pd.DataFrame, pd.DataFrame]:
+    if ref_col not in state.daily.columns:
+        raise ValueError(f"Reference column '{ref_col}' not found")
+    compare_cols = [c for c in _method_cols(state.daily) if c != ref_col]
+    daily_metrics = metrics_from_partials(state.partials, state.daily, compare_cols, ref_col)
+    # Monthly totals are a handful of rows per year, so they are simply rescored
+    monthly_metrics = metrics.compute_metrics(state.monthly, ref_col, compare_cols)
+    return daily_metrics, monthly_metrics
+
+
+def compare_with_rebuild(
+    state: SiteState, meta: dict | None = None, ref_col: str = REF_COL, rtol: float = 1e-8
+) -> list[str]:
+    # Names of outputs that differ from a full rebuild of the stored observations
+    rebuilt = build_state(state.observed, meta, ref_col)
+    mismatches = []
+    for name in ("qc", "daily", "flags", "rolling", "monthly"):
+        if not _frames_close(getattr(state, name), getattr(rebuilt, name), rtol):
+            mismatches.append(name)
+    for name, ours, theirs in zip(
+        ("daily_metrics", "monthly_metrics"), site_metrics(state, ref_col), site_metrics(rebuilt, ref_col)
+    ):
+        full = metrics.compute_metrics(
+            rebuilt.daily if name == "daily_metrics" else rebuilt.monthly, ref_col, list(ours["method"])
+        )
+        if not (_frames_close(ours, theirs, rtol) and _frames_close(ours, full, rtol)):
+            mismatches.append(name)
+    return mismatches
+
+
+def _frames_close(left: pd.DataFrame, right: pd.DataFrame, rtol: float) -> bool:
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    for col in left.columns:
+        a = left[col].reset_index(drop=True)
+        b = right[col].reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            if not np.allclose(a.to_numpy(float), b.to_numpy(float), rtol=rtol, atol=1e-12, equal_nan=True):
+                return False
+        elif not a.equals(b):
+            return False
+    return True
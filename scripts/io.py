@@ -1,41 +1,92 @@
 from __future__ import annotations
 
 from pathlib import Path
+import pickle
+import warnings
+import numpy as np
 import pandas as pd
 
+from .cache import SheetCache, sheet_key
 from .config import DEFAULT_YEAR, METHOD_COLUMNS, WEATHER_COLUMNS
 
 
+def infer_day_counter_dates(values: pd.Series, year: int) -> tuple[pd.Series, pd.Series]:
+    # Dates for a column of day counters starting in `year`. A drop in the counter starts a
+    # new period: a month when every period stays within 1-31 (day-of-month), otherwise a
+    # year (day-of-year). Months roll over into the next year. Returns (dates, ambiguous):
+    # ambiguous rows are missing/invalid counters, values beyond the calendar length of their
+    # month or year (NaT), repeats, periods that do not start at day 1, and typos.
+    day = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    valid = np.isfinite(day) & (day >= 1) & (day == np.floor(day))
+    day = np.where(valid, day, np.nan)
+    day, typo = _counter_typos(day)
+    valid &= np.isfinite(day)
+
+    # Period index from resets among the valid counters only
+    carried = pd.Series(day).ffill().to_numpy()
+    step = np.diff(carried, prepend=np.nan)
+    reset = step < 0
+    period = np.cumsum(reset)
+    period_max = pd.Series(day).groupby(period).max().to_numpy()
+    by_month = bool(reset.any()) and bool((period_max[np.isfinite(period_max)] <= 31).all())
+
+    if by_month:
+        month0 = period  # months since January of `year`
+        years = year + month0 // 12
+        months = month0 % 12 + 1
+        limit = pd.to_datetime({"year": years, "month": months, "day": 1}).dt.days_in_month.to_numpy()
+        start = pd.to_datetime({"year": years, "month": months, "day": 1})
+    else:
+        years = year + period
+        limit = np.where(pd.to_datetime({"year": years, "month": 1, "day": 1}).dt.is_leap_year, 366, 365)
+        start = pd.to_datetime({"year": years, "month": 1, "day": 1})
+
+    in_calendar = valid & (day <= limit)
+    dates = start + pd.to_timedelta(np.where(in_calendar, day - 1, np.nan), unit="D")
+
+    first_in_period = np.r_[True, period[1:] != period[:-1]]
+    bad_start = first_in_period & reset & (day != 1)
+    repeated = np.r_[False, (day[1:] == carried[:-1])]
+    ambiguous = ~in_calendar | bad_start | repeated | typo
+    return pd.Series(dates.to_numpy(), index=values.index), pd.Series(ambiguous, index=values.index)
+
+
+def _counter_typos(day: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # A counter that breaks a sequence its neighbours continue (14, 4, 16 or 14, 41, 16) is a
+    # typo, not a new period: a drop followed by a value above the one before it, or any
+    # value other than prev + 1 between prev and prev + 2. It is repaired to prev + 1 when
+    # the neighbours leave one day for it, else set missing; either way it is flagged.
+    typo = np.zeros(len(day), dtype=bool)
+    rows = np.flatnonzero(np.isfinite(day))
+    if rows.size < 3:
+        return day, typo
+    prev, cur, nxt = day[rows[:-2]], day[rows[1:-1]], day[rows[2:]]
+    one_day = nxt == prev + 2
+    suspect = (nxt > prev) & ((cur < prev) | (one_day & (cur != prev + 1)))
+    fixed = day.copy()
+    fixed[rows[1:-1][suspect]] = np.where(one_day, prev + 1, np.nan)[suspect]
+    typo[rows[1:-1][suspect]] = True
+    return fixed, typo
+
+
 def _parse_date_series(series: pd.Series, year: int) -> pd.Series:
-    # If numeric day-of-year
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    # Integer day counters (day-of-year or day-of-month), possibly spanning several years
     numeric = pd.to_numeric(series, errors="coerce")
-    if numeric.notna().any() and numeric.max() <= 366 and numeric.min() >= 1:
-        return pd.to_datetime(f"{year}-01-01") + pd.to_timedelta(numeric - 1, unit="D")
+    if numeric.notna().sum() > len(series) * 0.5:
+        dates, ambiguous = infer_day_counter_dates(series, year)
+        if ambiguous.any():
+            rows = list(series.index[ambiguous.to_numpy()][:5])
+            warnings.warn(f"{int(ambiguous.sum())} ambiguous day counters in 'date' (first rows: {rows})")
+        return dates
 
     # Try datetime parsing
-    parsed = pd.to_datetime(series, errors="coerce")
-    if parsed.notna().sum() > len(series) * 0.5:
-        return parsed
-
-    # Fallback: treat as day-of-month (1-31) in sequential months
-    numeric = numeric.fillna(1).astype(int)
-    months = []
-    current_month = 1
-    prev_day = None
-    for day in numeric:
-        if prev_day is not None and day < prev_day:
-            current_month += 1
-            if current_month > 12:
-                current_month = 12
-        months.append(current_month)
-        prev_day = day
-
-    return pd.to_datetime({"year": year, "month": months, "day": numeric})
-
-
-def read_evapo_sheet(path: Path, sheet: str, year: int = DEFAULT_YEAR) -> pd.DataFrame:
-    df = pd.read_excel(path, sheet_name=sheet, skiprows=4)
+    return pd.to_datetime(series, errors="coerce")
 
+
+def _standardize(df: pd.DataFrame, year: int) -> pd.DataFrame:
     # Drop unnamed columns
     df = df.loc[:, [c for c in df.columns if not str(c).startswith("Unnamed")]]
 
@@ -51,6 +102,59 @@ def read_evapo_sheet(path: Path, sheet: str, year: int = DEFAULT_YEAR) -> pd.Dat
     return df
 
 
+def _parse_evapo_sheet(path: Path, sheet: str, year: int) -> pd.DataFrame:
+    df = pd.read_excel(path, sheet_name=sheet, skiprows=4)
+    return _standardize(df, year)
+
+
+def read_observations(path: Path, year: int = DEFAULT_YEAR) -> pd.DataFrame:
+    # New daily rows as CSV, with either the workbook headers or the standardized names
+    df = pd.read_csv(path)
+    return _standardize(df, year)
+
+
+def read_evapo_sheet(
+    path: Path, sheet: str, year: int = DEFAULT_YEAR, cache: SheetCache | None = None, use_cache: bool = True
+) -> pd.DataFrame:
+    if not use_cache:
+        return _parse_evapo_sheet(path, sheet, year)
+
+    cache = cache if cache is not None else SheetCache()
+    key = sheet_key(path, sheet, year)
+    df = cache.get(key)
+    if df is None:
+        df = _parse_evapo_sheet(path, sheet, year)
+        cache.put(key, df)
+    return df
+
+
 def write_cleaned(df: pd.DataFrame, output_path: Path) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> Path:
+    # Lossless binary frame: Parquet when an engine is available, pickle otherwise.
+    # The suffix of `path` is replaced by the format actually written.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    target = path.with_suffix(".parquet")
+    try:
+        df.to_parquet(target, index=False)
+    except (ImportError, ValueError, TypeError):
+        target.unlink(missing_ok=True)
+        target = path.with_suffix(".pkl")
+        with target.open("wb") as handle:
+            pickle.dump(df, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    stale = path.with_suffix(".pkl" if target.suffix == ".parquet" else ".parquet")
+    stale.unlink(missing_ok=True)
+    return target
+
+
+def read_frame(path: Path) -> pd.DataFrame | None:
+    for target in (path.with_suffix(".parquet"), path.with_suffix(".pkl")):
+        if target.exists():
+            if target.suffix == ".parquet":
+                return pd.read_parquet(target)
+            with target.open("rb") as handle:
+                return pickle.load(handle)
+    return None
@@ -215,7 +215,7 @@ lat_rad = LAT_GRAUS * DEG2RAD
 
 # Se não existir Ra_extr (Q_0), recalcular; senão usar
 if 'Ra_extr' not in df.columns or df['Ra_extr'].isna().all():
-    df['Ra_extr'] = df['julia'].apply(lambda j: ra_extraterrestre(int(j), lat_rad))
+    df['Ra_extr'] = ra_extraterrestre(df['julia'].to_numpy(dtype=float), lat_rad)
 
 # Calcular Rn: usar rad_liq se disponível e plausível, senão estimar de Rs
 if 'rad_liq' in df.columns and not df['rad_liq'].isna().all():
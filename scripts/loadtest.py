@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from pathlib import Path
+from time import perf_counter
+import asyncio
+import json
+import subprocess
+import sys
+import numpy as np
+
+from .config import BASE_DIR, SERVICE_HOST, SERVICE_PORT
+
+# Load-test harness for service.py: `concurrency` keep-alive connections send `requests`
+# requests in total and the per-request latency is recorded client side.
+WEATHER_FIELDS = ["tmed_c", "tmax_c", "tmin_c", "rh_mean_pct", "rh_max_pct", "rh_min_pct", "wind_mean_ms", "rad_global_mj_m2_d"]
+
+
+def eto_payloads(n: int, batch: int, seed: int = 0) -> list[bytes]:
+    # `n` /eto bodies of `batch` consecutive synthetic days each, cycling over one station-year.
+    # synthetic (pandas) is only needed here, not for --endpoint metrics.
+    from . import synthetic
+
+    stations = synthetic.synthetic_stations(1, seed)
+    (meta,) = stations.values()
+    daily = synthetic.synthetic_daily(stations, 1, gap_rate=0.0, seed=seed)
+    daily = daily.assign(date=daily["date"].dt.strftime("%Y-%m-%d"))
+    records = daily[["date", *WEATHER_FIELDS]].to_dict(orient="records")
+    payloads = []
+    for i in range(n):
+        start = (i * batch) % max(len(records) - batch, 1)
+        body = {"lat": meta["lat"], "alt_m": meta["alt_m"], "records": records[start : start + batch]}
+        payloads.append(json.dumps(body).encode("utf-8"))
+    return payloads
+
+
+async def _send(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str, body: bytes
+) -> tuple[int, bytes]:
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _client(
+    host: str, port: int, jobs: list[tuple[str, str, bytes]], latencies: list[float], errors: list[int]
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for method, path, body in jobs:
+            start = perf_counter()
+            status, _ = await _send(reader, writer, method, path, body)
+            latencies.append(perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+    requests: int = 1000,
+    concurrency: int = 8,
+    batch: int = 7,
+    endpoint: str = "eto",
+    site: str | None = None,
+    seed: int = 0,
+) -> dict:
+    # Throughput and latency percentiles for `requests` calls to /eto or /sites/<site>/metrics
+    if endpoint == "eto":
+        jobs = [("POST", "/eto", body) for body in eto_payloads(requests, batch, seed)]
+    elif endpoint == "metrics":
+        if not site:
+            raise ValueError("The metrics endpoint needs a site")
+        jobs = [("GET", f"/sites/{site}/metrics", b"")] * requests
+    else:
+        raise ValueError(f"Unknown endpoint '{endpoint}' (eto or metrics)")
+
+    latencies: list[float] = []
+    errors: list[int] = []
+    start = perf_counter()
+    await asyncio.gather(
+        *(_client(host, port, jobs[i::concurrency], latencies, errors) for i in range(min(concurrency, requests)))
+    )
+    elapsed = perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "endpoint": endpoint,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "records_per_request": batch if endpoint == "eto" else None,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "records_per_s": round(len(latencies) * batch / elapsed, 1) if endpoint == "eto" else None,
+        **{f"p{q}_ms": round(float(np.percentile(ms, q)), 3) for q in (50, 95, 99)},
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+async def wait_ready(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            status, _ = await _send(reader, writer, "GET", "/health", b"")
+            writer.close()
+            if status == 200:
+                return
+        except OSError:
+            pass
+        if perf_counter() > deadline:
+            raise TimeoutError(f"Service on {host}:{port} not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.1)
+
+
+def spawn_service(host: str, port: int, extra_args: list[str] | None = None) -> subprocess.Popen:
+    # Service in its own process, so client and server do not share a CPU/GIL
+    command = [sys.executable, "-m", "scripts.cli", "serve", "--host", host, "--port", str(port), *(extra_args or [])]
+    return subprocess.Popen(command, cwd=BASE_DIR)
+
+
+def write_report(report: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from typing import Callable, Iterable
 import numpy as np
 import pandas as pd
 
+from .config import WET_SEASON_MONTHS
+
 
 def rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     return float(np.sqrt(np.mean((y_true - y_pred) ** 2)))
@@ -36,23 +39,340 @@ def willmott_d(y_true: np.ndarray, y_pred: np.ndarray) -> float:
 
 
 def compute_metrics(df: pd.DataFrame, ref_col: str, method_cols: list[str]) -> pd.DataFrame:
-    rows = []
-
-    for col in method_cols:
-        ref = df[ref_col].to_numpy()
-        series = df[col].to_numpy()
-        mask = np.isfinite(ref) & np.isfinite(series)
-        ref = ref[mask]
-        series = series[mask]
-        rows.append(
-            {
-                "method": col,
-                "rmse": rmse(ref, series),
-                "mae": mae(ref, series),
-                "mbe": mbe(ref, series),
-                "r2": r2_score(ref, series),
-                "willmott_d": willmott_d(ref, series),
-            }
+    # One series is scored with a single-chunk MetricsAccumulator, so scores from chunks,
+    # stored partials or workers merge to the same numbers. Long multi-site frames are
+    # scored per site (a leading 'site' column) by the grouped kernel.
+    if "site" in df.columns:
+        return grouped_metrics(df, ref_col, method_cols, ["site"]).drop(columns="n")
+    ref = df[ref_col].to_numpy(dtype=float)
+    preds = df[method_cols].to_numpy(dtype=float).reshape(len(df), len(method_cols))
+    return MetricsAccumulator(method_cols).update(ref, preds).update_agreement(ref, preds).to_frame()
+
+
+def group_keys(
+    df: pd.DataFrame, group_by: Iterable[str], wet_months: Iterable[int] = WET_SEASON_MONTHS
+) -> pd.DataFrame:
+    # Derived calendar keys from 'date'; any other name is taken as an existing column
+    keys = {}
+    for key in group_by:
+        if key in df.columns:
+            keys[key] = df[key]
+        elif key == "month":
+            keys[key] = df["date"].dt.month
+        elif key == "year":
+            keys[key] = df["date"].dt.year
+        elif key == "season":
+            wet = df["date"].dt.month.isin(list(wet_months))
+            keys[key] = pd.Series(np.where(wet, "wet", "dry"), index=df.index)
+        else:
+            raise KeyError(f"Cannot group by '{key}': no such column")
+    return pd.DataFrame(keys, index=df.index)
+
+
+def grouped_metrics(
+    df: pd.DataFrame,
+    ref_col: str,
+    method_cols: list[str],
+    group_by: Iterable[str] | None = None,
+    wet_months: Iterable[int] = WET_SEASON_MONTHS,
+) -> pd.DataFrame:
+    # All methods x all groups at once: every statistic is one bincount over flat
+    # (group, method) cells, with the NaN mask built a single time
+    ref = df[ref_col].to_numpy(dtype=float)
+    preds = df[method_cols].to_numpy(dtype=float).reshape(len(df), len(method_cols))
+    k = len(method_cols)
+
+    group_by = list(group_by or [])
+    if group_by:
+        keys = group_keys(df, group_by, wet_months)
+        codes = keys.groupby(group_by, sort=True, dropna=False, observed=True).ngroup().to_numpy()
+        labels = keys.assign(_code=codes).drop_duplicates("_code").sort_values("_code")[group_by]
+    else:
+        codes = np.zeros(len(df), dtype=np.int64)
+        labels = pd.DataFrame(index=range(1))
+    n_groups = len(labels)
+
+    mask = np.isfinite(ref)[:, None] & np.isfinite(preds)
+    rows, cols = np.nonzero(mask)
+    cell = codes[rows] * k + cols
+    size = n_groups * k
+    o = ref[rows]
+    p = preds[rows, cols]
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(cell, weights=values, minlength=size)
+
+    n = np.bincount(cell, minlength=size).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_o = total(o) / n
+        mean_p = total(p) / n
+    do = o - mean_o[cell]
+    dp = p - mean_p[cell]
+    err = p - o
+
+    scores = skill_scores(
+        n,
+        mean_o,
+        mean_p,
+        m2_ref=total(do * do),
+        m2_pred=total(dp * dp),
+        co_moment=total(do * dp),
+        sse=total(err * err),
+        sae=total(np.abs(err)),
+        agreement=total((np.abs(p - mean_o[cell]) + np.abs(do)) ** 2),
+    )
+
+    out = labels.loc[labels.index.repeat(k)].reset_index(drop=True)
+    out["method"] = np.tile(method_cols, n_groups)
+    out["n"] = n.astype(int)
+    for name, values in scores.items():
+        out[name] = values
+    return out
+
+
+# Relative variance below which a series is treated as constant
+_CONSTANT_RTOL = 1e-20
+
+
+def _varies(n: np.ndarray, m2: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    # A series constant up to rounding noise has no defined correlation
+    return m2 > _CONSTANT_RTOL * (n * mean * mean + m2)
+
+
+def skill_scores(
+    n: np.ndarray,
+    mean_ref: np.ndarray,
+    mean_pred: np.ndarray,
+    m2_ref: np.ndarray,
+    m2_pred: np.ndarray,
+    co_moment: np.ndarray,
+    sse: np.ndarray,
+    sae: np.ndarray,
+    agreement: np.ndarray,
+) -> dict[str, np.ndarray]:
+    # Skill scores from per-cell summary statistics; `agreement` is Willmott's denominator
+    # sum((|p - m| + |o - m|)^2), NaN where it could not be formed
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valid_r = (n >= 2) & _varies(n, m2_ref, mean_ref) & _varies(n, m2_pred, mean_pred)
+        return {
+            "rmse": np.where(n > 0, np.sqrt(sse / n), np.nan),
+            "mae": np.where(n > 0, sae / n, np.nan),
+            "mbe": np.where(n > 0, mean_pred - mean_ref, np.nan),
+            "r2": np.where(valid_r, co_moment**2 / (m2_ref * m2_pred), np.nan),
+            "willmott_d": np.where((n > 0) & (agreement != 0), 1 - sse / agreement, np.nan),
+        }
+
+
+def batch_scores(o: np.ndarray, p: np.ndarray) -> dict[str, np.ndarray]:
+    # Skill scores of many series pairs at once: `o` (batch, n, 1 or k) reference and `p`
+    # (batch, n, k) predictions; NaN pairs are skipped. Arrays of shape (batch, k).
+    # Working memory is four float64 arrays of shape (batch, n, k) at most: buffers are
+    # reused in place, the sums of products go through einsum (no temporaries), and
+    # series without NaN skip the masking.
+    mask = np.isfinite(o) & np.isfinite(p)
+    complete = bool(mask.all())
+    if not complete:
+        o = np.where(mask, o, 0.0)
+        p = np.where(mask, p, 0.0)
+
+    def dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.einsum("bnk,bnk->bk", a, b)
+
+    def masked(values: np.ndarray) -> np.ndarray:
+        if not complete:
+            values *= mask
+        return values
+
+    shape = (p.shape[0], p.shape[2])
+    n = np.broadcast_to(mask.sum(axis=1), shape).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_o = np.broadcast_to(o.sum(axis=1), shape) / n
+        mean_p = p.sum(axis=1) / n
+    do = masked(o - mean_o[:, None, :])
+    dp = masked(p - mean_p[:, None, :])
+    m2_ref, m2_pred, co_moment = dot(do, do), dot(dp, dp), dot(do, dp)
+
+    err = np.subtract(p, o, out=dp)
+    sse = dot(err, err)
+    sae = np.abs(err, out=err).sum(axis=1)
+
+    # Willmott's denominator terms |p - mean_o| + |o - mean_o|, reusing the error buffer
+    agreement = np.abs(np.subtract(p, mean_o[:, None, :], out=err), out=err)
+    agreement += np.abs(do, out=do)
+    agreement = masked(agreement)
+
+    return skill_scores(
+        n,
+        mean_o,
+        mean_p,
+        m2_ref=m2_ref,
+        m2_pred=m2_pred,
+        co_moment=co_moment,
+        sse=sse,
+        sae=sae,
+        agreement=dot(agreement, agreement),
+    )
+
+
+class MetricsAccumulator:
+    """Chunked, mergeable skill scores for several methods against one reference.
+
+    Pass 1 (`update`) keeps per-method counts, means, centred second moments and the
+    cross co-moment (Welford/Chan updates), plus squared and absolute error sums. Willmott's
+    d also needs sum(|p - m||o - m|) around the final reference mean m, which no fixed-size
+    summary of pass 1 can provide exactly, so pass 2 (`update_agreement`) accumulates it once
+    the pass-1 states have been merged. Both passes merge by addition across chunks, sites or
+    worker processes.
+    """
+
+    STATE_FIELDS = ("n", "mean_ref", "mean_pred", "m2_ref", "m2_pred", "co_moment", "sse", "sae")
+
+    def __init__(self, methods: list[str]) -> None:
+        self.methods = list(methods)
+        k = len(self.methods)
+        self.n = np.zeros(k)
+        self.mean_ref = np.zeros(k)
+        self.mean_pred = np.zeros(k)
+        self.m2_ref = np.zeros(k)
+        self.m2_pred = np.zeros(k)
+        self.co_moment = np.zeros(k)
+        self.sse = np.zeros(k)
+        self.sae = np.zeros(k)
+        # Pass 2
+        self.anchor: np.ndarray | None = None
+        self.abs_cross = np.zeros(k)
+        self.n_agreement = np.zeros(k)
+
+    @staticmethod
+    def _prepare(ref: np.ndarray, preds: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ref = np.asarray(ref, dtype=float)
+        preds = np.asarray(preds, dtype=float)
+        if preds.ndim == 1:
+            preds = preds[:, None]
+        mask = np.isfinite(ref)[:, None] & np.isfinite(preds)
+        return np.broadcast_to(ref[:, None], preds.shape), preds, mask
+
+    def update(self, ref: np.ndarray, preds: np.ndarray) -> "MetricsAccumulator":
+        if self.anchor is not None:
+            raise RuntimeError("update() after update_agreement(): start a new accumulator")
+        ref, preds, mask = self._prepare(ref, preds)
+        nb = mask.sum(axis=0).astype(float)
+        if not nb.any():
+            return self
+
+        o = np.where(mask, ref, 0.0)
+        p = np.where(mask, preds, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_o = np.where(nb > 0, o.sum(axis=0) / nb, 0.0)
+            mean_p = np.where(nb > 0, p.sum(axis=0) / nb, 0.0)
+        do = np.where(mask, ref - mean_o, 0.0)
+        dp = np.where(mask, preds - mean_p, 0.0)
+        err = p - o
+
+        batch = MetricsAccumulator(self.methods)
+        batch.n = nb
+        batch.mean_ref = mean_o
+        batch.mean_pred = mean_p
+        batch.m2_ref = (do * do).sum(axis=0)
+        batch.m2_pred = (dp * dp).sum(axis=0)
+        batch.co_moment = (do * dp).sum(axis=0)
+        batch.sse = (err * err).sum(axis=0)
+        batch.sae = np.abs(err).sum(axis=0)
+        return self.merge(batch)
+
+    def merge(self, other: "MetricsAccumulator") -> "MetricsAccumulator":
+        if other.methods != self.methods:
+            raise ValueError("Cannot merge accumulators over different methods")
+        if (self.anchor is None) != (other.anchor is None):
+            raise ValueError("Cannot merge accumulators in different passes")
+        if self.anchor is not None and not np.array_equal(self.anchor, other.anchor, equal_nan=True):
+            raise ValueError("Pass-2 states were anchored on different reference means")
+
+        n = self.n + other.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            w = np.where(n > 0, other.n / n, 0.0)
+        delta_o = other.mean_ref - self.mean_ref
+        delta_p = other.mean_pred - self.mean_pred
+        cross = self.n * w  # n_a * n_b / n
+
+        self.m2_ref = self.m2_ref + other.m2_ref + delta_o * delta_o * cross
+        self.m2_pred = self.m2_pred + other.m2_pred + delta_p * delta_p * cross
+        self.co_moment = self.co_moment + other.co_moment + delta_o * delta_p * cross
+        self.mean_ref = self.mean_ref + delta_o * w
+        self.mean_pred = self.mean_pred + delta_p * w
+        self.n = n
+        self.sse = self.sse + other.sse
+        self.sae = self.sae + other.sae
+        self.abs_cross = self.abs_cross + other.abs_cross
+        self.n_agreement = self.n_agreement + other.n_agreement
+        return self
+
+    def start_agreement(self, anchor: np.ndarray | None = None) -> "MetricsAccumulator":
+        # Freeze the reference mean used by Willmott's d (defaults to this state's own mean)
+        self.anchor = np.where(self.n > 0, self.mean_ref, np.nan) if anchor is None else np.asarray(anchor, float)
+        self.abs_cross = np.zeros(len(self.methods))
+        self.n_agreement = np.zeros(len(self.methods))
+        return self
+
+    def update_agreement(self, ref: np.ndarray, preds: np.ndarray) -> "MetricsAccumulator":
+        if self.anchor is None:
+            self.start_agreement()
+        ref, preds, mask = self._prepare(ref, preds)
+        term = np.abs(preds - self.anchor) * np.abs(ref - self.anchor)
+        self.abs_cross = self.abs_cross + np.where(mask, term, 0.0).sum(axis=0)
+        self.n_agreement = self.n_agreement + mask.sum(axis=0)
+        return self
+
+    def to_state(self) -> pd.DataFrame:
+        # Pass-1 state as a table (one row per method), e.g. for storing partial aggregates
+        state = pd.DataFrame({field: getattr(self, field) for field in self.STATE_FIELDS})
+        state.insert(0, "method", self.methods)
+        return state
+
+    @classmethod
+    def from_state(cls, state: pd.DataFrame, methods: list[str] | None = None) -> "MetricsAccumulator":
+        methods = list(state["method"]) if methods is None else list(methods)
+        rows = state.set_index("method").reindex(methods)
+        acc = cls(methods)
+        for field in cls.STATE_FIELDS:
+            setattr(acc, field, rows[field].fillna(0.0).to_numpy(dtype=float))
+        return acc
+
+    def fresh_agreement(self) -> "MetricsAccumulator":
+        # Empty pass-2 state sharing this state's anchor, for scoring chunks in workers
+        if self.anchor is None:
+            self.start_agreement()
+        state = MetricsAccumulator(self.methods)
+        state.anchor = self.anchor.copy()
+        return state
+
+    def to_frame(self) -> pd.DataFrame:
+        n = self.n
+        agreement = np.full(len(self.methods), np.nan)
+        if self.anchor is not None:
+            # sum((|p - m| + |o - m|)^2) expanded around the pass-1 means
+            agreement = (
+                self.m2_ref
+                + n * (self.mean_ref - self.anchor) ** 2
+                + self.m2_pred
+                + n * (self.mean_pred - self.anchor) ** 2
+                + 2 * self.abs_cross
+            )
+            agreement = np.where(self.n_agreement == n, agreement, np.nan)
+        scores = skill_scores(
+            n, self.mean_ref, self.mean_pred, self.m2_ref, self.m2_pred, self.co_moment, self.sse, self.sae, agreement
         )
+        return pd.DataFrame({"method": self.methods, **scores})
+
 
-    return pd.DataFrame(rows)
+def score_chunks(
+    chunks: Callable[[], Iterable[pd.DataFrame]], ref_col: str, method_cols: list[str]
+) -> pd.DataFrame:
+    # Two streaming passes over re-iterable chunks (e.g. a function re-opening a CSV reader)
+    acc = MetricsAccumulator(method_cols)
+    for chunk in chunks():
+        acc.update(chunk[ref_col].to_numpy(), chunk[method_cols].to_numpy())
+    acc.start_agreement()
+    for chunk in chunks():
+        acc.update_agreement(chunk[ref_col].to_numpy(), chunk[method_cols].to_numpy())
+    return acc.to_frame()
@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+import numpy as np
+import pandas as pd
+
+from . import aggregate, bootstrap, calibrate, cleaning, io, metrics, plots, qc, storage
+from .profiling import Profiler, count_rows
+from .config import DEFAULT_YEAR, METHOD_COLUMNS, METHOD_SHORT, MONTHLY_COMPLETE, ROLLING_CENTER, ROLLING_WINDOWS
+
+REF_COL = "et_penman_monteith"
+# Site label of a long-format pipeline over several stations (frames keyed by site, date)
+ALL_SITES = "all"
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    deps: tuple[str, ...]
+    func: Callable[..., Any]
+
+
+STAGES: dict[str, Stage] = {}
+
+
+def stage(name: str, *deps: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    # Register a stage computed from the site context and the results of `deps`
+    def register(func: Callable[..., Any]) -> Callable[..., Any]:
+        STAGES[name] = Stage(name, deps, func)
+        return func
+
+    return register
+
+
+@dataclass
+class SitePipeline:
+    """Memoized stage graph for one site: every intermediate is computed at most once.
+
+    With `stations` set, the pipeline runs once over a long frame of all those stations
+    (a 'site' column) instead of one site.
+    """
+
+    site: str
+    meta: dict
+    source: Path | None = None
+    year: int = DEFAULT_YEAR
+    use_cache: bool = True
+    calibration: pd.DataFrame | None = None  # stored coefficients: adds <method>_cal to the metrics
+    results: dict[str, Any] = field(default_factory=dict)
+    stations: dict[str, dict] | None = None
+    profiler: Profiler | None = None  # times every stage and sink when set
+
+    @classmethod
+    def from_daily(
+        cls, site: str, meta: dict, daily: pd.DataFrame, calibration: pd.DataFrame | None = None
+    ) -> "SitePipeline":
+        # Start from an already cleaned frame (e.g. read back from data/cleaned)
+        return cls(site, meta, calibration=calibration, results={"daily": daily})
+
+    @classmethod
+    def for_stations(
+        cls, stations: dict[str, dict], source: Path | None = None, year: int = DEFAULT_YEAR, use_cache: bool = True
+    ) -> "SitePipeline":
+        return cls(ALL_SITES, {}, source=source, year=year, use_cache=use_cache, stations=stations)
+
+    @classmethod
+    def from_long_daily(
+        cls, stations: dict[str, dict], daily: pd.DataFrame, site_columns: dict[str, list[str]] | None = None
+    ) -> "SitePipeline":
+        # `site_columns`: each station's own columns (default: every column of `daily`)
+        if site_columns is None:
+            site_columns = {site: list(daily.columns) for site in stations}
+        return cls(ALL_SITES, {}, results={"daily": daily, "site_columns": site_columns}, stations=stations)
+
+    @property
+    def long(self) -> bool:
+        return self.stations is not None
+
+    def get(self, name: str) -> Any:
+        if name in self.results:
+            return self.results[name]
+        if name not in STAGES:
+            raise KeyError(f"Unknown stage '{name}'")
+        spec = STAGES[name]
+        inputs = [self.get(dep) for dep in spec.deps]
+        if self.profiler is None:
+            value = spec.func(self, *inputs)
+        else:
+            value = self.profiler.call(self.site, "stage", name, spec.func, self, *inputs)
+        self.results[name] = value
+        return value
+
+    def run(self, name: str, sink: Callable[..., Any], *args: Any) -> Any:
+        # Call a sink (output writer) on this pipeline; profiled like the stages when enabled
+        if self.profiler is None:
+            return sink(self, *args)
+        return self.profiler.call(
+            self.site, "sink", name, sink, self, *args, rows=lambda: count_rows(self.results.get("daily"))
+        )
+
+    def computed(self) -> list[str]:
+        return list(self.results)
+
+
+# --- Stages ------------------------------------------------------------------
+
+
+def _read_sheet(pipe: SitePipeline, site: str, meta: dict) -> pd.DataFrame:
+    # A workbook sheet, or a daily CSV such as the `ingest` output
+    source = meta.get("source") or pipe.source
+    if not source:
+        raise ValueError(f"No source workbook configured for {site}")
+    if Path(source).suffix.lower() == ".csv":
+        return io.read_observations(Path(source), year=pipe.year)
+    return io.read_evapo_sheet(Path(source), meta["sheet"], year=pipe.year, use_cache=pipe.use_cache)
+
+
+@stage("sheets")
+def _sheets(pipe: SitePipeline) -> dict[str, pd.DataFrame]:
+    if not pipe.long:
+        return {pipe.site: _read_sheet(pipe, pipe.site, pipe.meta)}
+    return {site: _read_sheet(pipe, site, meta) for site, meta in pipe.stations.items()}
+
+
+@stage("raw", "sheets")
+def _raw(pipe: SitePipeline, sheets: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    if not pipe.long:
+        return sheets[pipe.site]
+    return pd.concat([sheet.assign(site=site) for site, sheet in sheets.items()], ignore_index=True)
+
+
+@stage("site_columns", "sheets")
+def _site_columns(pipe: SitePipeline, sheets: dict[str, pd.DataFrame]) -> dict[str, list[str]]:
+    # Columns of each station's own source; the long frame has the union of them
+    return {site: list(sheet.columns) for site, sheet in sheets.items()}
+
+
+def station_coordinates(pipe: SitePipeline, frame: pd.DataFrame) -> tuple[Any, Any]:
+    # (lat, alt_m): scalars for one site, per-row arrays for a long frame
+    if not pipe.long:
+        return pipe.meta.get("lat"), pipe.meta.get("alt_m", 0.0)
+    site = frame["site"].astype(str)
+    lat = site.map({s: meta.get("lat", np.nan) for s, meta in pipe.stations.items()}).to_numpy(dtype=float)
+    alt = site.map({s: meta.get("alt_m", 0.0) for s, meta in pipe.stations.items()}).to_numpy(dtype=float)
+    return lat, alt
+
+
+@stage("observed", "raw")
+def _observed(pipe: SitePipeline, raw: pd.DataFrame) -> pd.DataFrame:
+    return cleaning.sort_dedupe(raw).reset_index(drop=True)
+
+
+@stage("qc_flags", "observed")
+def _qc_flags(pipe: SitePipeline, observed: pd.DataFrame) -> pd.DataFrame:
+    lat, alt_m = station_coordinates(pipe, observed)
+    return qc.run_qc(observed, lat=lat, alt_m=alt_m)
+
+
+@stage("checked", "observed", "qc_flags")
+def _checked(pipe: SitePipeline, observed: pd.DataFrame, qc_flags: pd.DataFrame) -> pd.DataFrame:
+    return qc.mask_failed(observed, qc_flags)
+
+
+@stage("cleaned", "checked")
+def _cleaned(pipe: SitePipeline, checked: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    return cleaning.clean_daily_flagged(checked)
+
+
+@stage("daily", "cleaned")
+def _daily(pipe: SitePipeline, cleaned: tuple[pd.DataFrame, pd.DataFrame]) -> pd.DataFrame:
+    return cleaned[0]
+
+
+@stage("fill_flags", "cleaned")
+def _fill_flags(pipe: SitePipeline, cleaned: tuple[pd.DataFrame, pd.DataFrame]) -> pd.DataFrame:
+    return cleaned[1]
+
+
+@stage("method_cols", "daily")
+def _method_cols(pipe: SitePipeline, daily: pd.DataFrame) -> list[str]:
+    return [col for col in METHOD_COLUMNS.values() if col in daily.columns]
+
+
+@stage("compare_cols", "method_cols")
+def _compare_cols(pipe: SitePipeline, method_cols: list[str]) -> list[str]:
+    return [c for c in method_cols if c != REF_COL]
+
+
+@stage("rolling", "daily")
+def _rolling(pipe: SitePipeline, daily: pd.DataFrame) -> pd.DataFrame:
+    return aggregate.rolling_mean(daily, ROLLING_WINDOWS, center=ROLLING_CENTER)
+
+
+@stage("monthly", "daily", "method_cols")
+def _monthly(pipe: SitePipeline, daily: pd.DataFrame, method_cols: list[str]) -> pd.DataFrame:
+    return aggregate.monthly_sum(daily, method_cols, complete=MONTHLY_COMPLETE)
+
+
+@stage("scored_daily", "daily")
+def _scored_daily(pipe: SitePipeline, daily: pd.DataFrame) -> pd.DataFrame:
+    if pipe.calibration is None:
+        return daily
+    return calibrate.apply_calibration(daily, pipe.calibration)
+
+
+@stage("scored_cols", "scored_daily", "compare_cols")
+def _scored_cols(pipe: SitePipeline, scored: pd.DataFrame, compare_cols: list[str]) -> list[str]:
+    calibrated = [f"{c}{calibrate.CALIBRATED_SUFFIX}" for c in compare_cols]
+    return compare_cols + [c for c in calibrated if c in scored.columns]
+
+
+@stage("scored_monthly", "scored_daily", "scored_cols", "method_cols")
+def _scored_monthly(
+    pipe: SitePipeline, scored: pd.DataFrame, scored_cols: list[str], method_cols: list[str]
+) -> pd.DataFrame:
+    if pipe.calibration is None:
+        return pipe.get("monthly")
+    return aggregate.monthly_sum(scored, list(dict.fromkeys(method_cols + scored_cols)), complete=MONTHLY_COMPLETE)
+
+
+def _require_ref(pipe: SitePipeline, df: pd.DataFrame) -> None:
+    if REF_COL not in df.columns:
+        raise ValueError(f"Reference column '{REF_COL}' not found for {pipe.site}")
+
+
+@stage("daily_metrics", "scored_daily", "scored_cols")
+def _daily_metrics(pipe: SitePipeline, daily: pd.DataFrame, scored_cols: list[str]) -> pd.DataFrame:
+    _require_ref(pipe, daily)
+    return metrics.compute_metrics(daily, REF_COL, scored_cols)
+
+
+@stage("monthly_metrics", "scored_monthly", "scored_cols")
+def _monthly_metrics(pipe: SitePipeline, monthly: pd.DataFrame, scored_cols: list[str]) -> pd.DataFrame:
+    _require_ref(pipe, monthly)
+    return metrics.compute_metrics(monthly, REF_COL, scored_cols)
+
+
+# --- Sinks -------------------------------------------------------------------
+
+
+# Dataset names (storage.py) for the per-site frames written by the sinks below
+DAILY_DATASET = "daily"
+ROLLING_DATASET = "rolling"
+MONTHLY_DATASET = "monthly_totals"
+DAILY_METRICS_DATASET = "daily_metrics"
+MONTHLY_METRICS_DATASET = "monthly_metrics"
+
+
+def _absent_columns(pipe: SitePipeline) -> dict[str, set[str]]:
+    # Columns of the long frame that a station's source lacks (all-NaN there after the
+    # concat), with their rolling means
+    site_columns = pipe.get("site_columns")
+    union = set().union(*site_columns.values())
+    absent = {site: union - set(columns) for site, columns in site_columns.items()}
+    return {
+        site: missing | {f"{col}_{window}d" for col in missing for window in ROLLING_WINDOWS}
+        for site, missing in absent.items()
+    }
+
+
+def _by_site(pipe: SitePipeline, frame: pd.DataFrame) -> Iterator[tuple[str, pd.DataFrame]]:
+    # (site, frame without the site column) per station of a long pipeline. Columns a
+    # station's source lacks are dropped, so each station gets the columns of a single-site
+    # run; all-NaN columns it does have are kept.
+    if not pipe.long:
+        yield pipe.site, frame
+        return
+    absent = _absent_columns(pipe)
+    for site, part in frame.groupby("site", sort=False, observed=True):
+        missing = absent.get(str(site), set())
+        keep = [c for c in part.columns if c != "site" and c not in missing]
+        yield str(site), part[keep].reset_index(drop=True)
+
+
+def _write_dataset(pipe: SitePipeline, frame: pd.DataFrame, output_dir: Path, dataset: str) -> None:
+    for site, part in _by_site(pipe, frame):
+        storage.write_dataset(part, output_dir, dataset, site)
+
+
+def read_daily(input_dir: Path, site: str) -> pd.DataFrame:
+    # Cleaned series of a site: partitioned dataset when present, else a per-site CSV
+    # (older runs, --csv exports)
+    daily = storage.read_site(input_dir, DAILY_DATASET, site)
+    if daily is not None:
+        return daily
+    return pd.read_csv(input_dir / f"{site}_daily.csv", parse_dates=["date"])
+
+
+def read_daily_columns(input_dir: Path, site: str) -> list[str]:
+    # Columns of a site's cleaned series (as read_daily), without reading the rows
+    columns = storage.site_columns(input_dir, DAILY_DATASET, site)
+    if columns is not None:
+        return columns
+    return list(pd.read_csv(input_dir / f"{site}_daily.csv", nrows=0).columns)
+
+
+def site_pipelines(pipe: SitePipeline) -> Iterator[SitePipeline]:
+    # One pipeline per station of a long pipeline's cleaned frame, for the outputs that are
+    # per station by nature (figures, bootstrap, calibration)
+    if not pipe.long:
+        yield pipe
+        return
+    for site, daily in _by_site(pipe, pipe.get("daily")):
+        yield SitePipeline.from_daily(site, pipe.stations.get(site, {}), daily)
+
+
+def write_cleaned(pipe: SitePipeline, output_dir: Path, csv: bool = False) -> None:
+    # Partitioned dataset; csv=True also exports the per-site CSV
+    daily = pipe.get("daily")
+    _write_dataset(pipe, daily, output_dir, DAILY_DATASET)
+    if csv:
+        for site, frame in _by_site(pipe, daily):
+            io.write_cleaned(frame, output_dir / f"{site}_daily.csv")
+    # uint8 fill flags per cell (see cleaning.FLAG_NAMES), aligned with the CSV rows, and
+    # uint8 QC bits per observed cell (see qc.CHECKS), same rows; failed cells were gap filled
+    for name, flags, rows in (
+        ("daily_flags", pipe.get("fill_flags"), daily),
+        ("qc_flags", pipe.get("qc_flags"), pipe.get("observed")),
+    ):
+        flags = flags.reset_index(drop=True)
+        if pipe.long:
+            flags = flags.assign(site=rows["site"].to_numpy())
+        for site, frame in _by_site(pipe, flags):
+            io.write_frame(frame, output_dir / f"{site}_{name}")
+
+
+def write_qc_summary(pipe: SitePipeline, output_dir: Path) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sites = pipe.get("observed")["site"] if pipe.long else None
+    summary = qc.qc_summary(pipe.get("qc_flags"), sites)
+    absent = _absent_columns(pipe) if pipe.long else {}
+    for site, frame in _by_site(pipe, summary):
+        frame = frame[~frame["column"].isin(absent.get(site, set()))]
+        frame.to_csv(output_dir / f"{site}_qc_summary.csv", index=False)
+
+
+def _write_tables(pipe: SitePipeline, output_dir: Path, tables: dict[str, str], csv: bool) -> None:
+    for dataset, stage_name in tables.items():
+        frame = pipe.get(stage_name)
+        _write_dataset(pipe, frame, output_dir, dataset)
+        if csv:
+            for site, part in _by_site(pipe, frame):
+                part.to_csv(output_dir / f"{site}_{dataset}.csv", index=False)
+
+
+def write_aggregates(pipe: SitePipeline, output_dir: Path, csv: bool = False) -> None:
+    tables = {ROLLING_DATASET: "rolling", MONTHLY_DATASET: "monthly"}
+    _write_tables(pipe, output_dir, tables, csv)
+
+
+def write_metrics(pipe: SitePipeline, output_dir: Path, csv: bool = False) -> None:
+    tables = {DAILY_METRICS_DATASET: "daily_metrics", MONTHLY_METRICS_DATASET: "monthly_metrics"}
+    _write_tables(pipe, output_dir, tables, csv)
+
+
+def grouped_daily_metrics(pipe: SitePipeline, group_by: list[str]) -> pd.DataFrame:
+    daily = pipe.get("daily")
+    _require_ref(pipe, daily)
+    if "site" in group_by and "site" not in daily.columns:
+        daily = daily.assign(site=pipe.site)
+    if pipe.long and "site" not in group_by:
+        group_by = ["site", *group_by]
+    return metrics.grouped_metrics(daily, REF_COL, pipe.get("compare_cols"), group_by)
+
+
+def write_grouped_metrics(pipe: SitePipeline, output_dir: Path, groupings: list[list[str]]) -> None:
+    # One long table per grouping, e.g. [["month"], ["season"]] -> *_by_month.csv, *_by_season.csv
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for group_by in groupings:
+        for site, table in _by_site(pipe, grouped_daily_metrics(pipe, group_by)):
+            table.to_csv(output_dir / f"{site}_daily_metrics_by_{'_'.join(group_by)}.csv", index=False)
+
+
+def write_bootstrap(pipe: SitePipeline, output_dir: Path, **options: Any) -> None:
+    # Block-bootstrap intervals for the daily metrics (options go to bootstrap_metrics)
+    daily = pipe.get("daily")
+    _require_ref(pipe, daily)
+    table = bootstrap.bootstrap_metrics(daily, REF_COL, pipe.get("compare_cols"), **options)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    table.to_csv(output_dir / f"{pipe.site}_daily_metrics_ci.csv", index=False)
+
+
+def plot_jobs(pipe: SitePipeline, figures_dir: Path) -> list[plots.FigureJob]:
+    if pipe.long:
+        return [job for sub in site_pipelines(pipe) for job in plot_jobs(sub, figures_dir)]
+    site = pipe.site
+    daily = pipe.get("daily")
+    monthly = pipe.get("monthly")
+    method_cols = pipe.get("method_cols")
+
+    site_dir = figures_dir / site
+    ref_id = METHOD_SHORT.get(REF_COL, "pm")
+    jobs = []
+
+    for col in pipe.get("compare_cols"):
+        method_id = METHOD_SHORT.get(col, col)
+        pair = {"ref_col": REF_COL, "method_col": col}
+        jobs.append(
+            plots.FigureJob(
+                "scatter", daily[[REF_COL, col]], site_dir / f"{site}_daily_scatter_{method_id}_vs_{ref_id}.png", pair
+            )
+        )
+        jobs.append(
+            plots.FigureJob(
+                "timeseries",
+                daily[["date", REF_COL, col]],
+                site_dir / f"{site}_daily_series_{method_id}_vs_{ref_id}.png",
+                pair,
+            )
+        )
+
+    jobs.append(
+        plots.FigureJob(
+            "monthly_totals",
+            monthly[["month", *method_cols]],
+            site_dir / f"{site}_monthly_totals.png",
+            {"method_cols": method_cols},
+        )
+    )
+    for label, frame in (("daily", daily), ("monthly", monthly)):
+        jobs.append(
+            plots.FigureJob(
+                "taylor",
+                frame[method_cols],
+                site_dir / f"{site}_{label}_taylor.png",
+                {"ref_col": REF_COL, "method_cols": method_cols, "title": f"Taylor diagram ({label}) - {site}"},
+            )
+        )
+    return jobs
+
+
+def write_calibration(pipe: SitePipeline, output_dir: Path, **options: Any) -> pd.DataFrame:
+    # Fit coefficients for every method (options go to calibrate.calibrate)
+    daily = pipe.get("daily")
+    _require_ref(pipe, daily)
+    table = calibrate.calibrate(daily, REF_COL, pipe.get("compare_cols"), **options)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    table.to_csv(calibrate.coefficients_path(output_dir, pipe.site), index=False)
+    return table
+
+
+def write_plots(pipe: SitePipeline, figures_dir: Path, workers: int = 1, force: bool = False) -> tuple[int, int]:
+    # Figures whose inputs are unchanged since the last run are skipped
+    return plots.render_figures(plot_jobs(pipe, figures_dir), workers=workers, force=force)
@@ -1,54 +1,135 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+import hashlib
+import json
+import os
+import struct
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import pandas as pd
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
 
-def plot_scatter(df: pd.DataFrame, ref_col: str, method_col: str, output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.figure(figsize=(6, 6))
-    plt.scatter(df[ref_col], df[method_col], alpha=0.6)
-    plt.xlabel(ref_col)
-    plt.ylabel(method_col)
-    plt.title(f"Scatter: {method_col} vs {ref_col}")
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=200)
-    plt.close()
-
-
-def plot_timeseries(df: pd.DataFrame, ref_col: str, method_col: str, output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.figure(figsize=(10, 4))
-    plt.plot(df["date"], df[ref_col], label=ref_col)
-    plt.plot(df["date"], df[method_col], label=method_col)
-    plt.xlabel("Date")
-    plt.ylabel("ETo (mm/d)")
-    plt.title(f"Time series: {method_col} vs {ref_col}")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=200)
-    plt.close()
-
-
-def plot_monthly_totals(df: pd.DataFrame, method_cols: list[str], output_path: Path) -> None:
+DPI = 200
+# Bump when the drawing code changes so existing PNGs are re-rendered
+PLOTS_VERSION = 2
+# PNG text chunk holding the digest of the inputs a figure was rendered from
+DIGEST_KEY = "eto-input-digest"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Decimals kept when hashing figure inputs; far below anything visible at DPI
+DIGEST_DECIMALS = 9
+# Above these sizes long series are min/max decimated and scatters drawn as hexbin density,
+# so render time and PNG size stay flat (about 2 points per pixel column at DPI)
+MAX_LINE_POINTS = 4000
+MAX_SCATTER_POINTS = 5000
+HEXBIN_GRIDSIZE = 80
+
+
+def _new_figure(figsize: tuple[float, float]) -> Figure:
+    # Explicit Figure/canvas pair: no pyplot global state, safe in worker processes.
+    # matplotlib is imported on the first drawing, so commands that only hash or skip
+    # figures (and every non-plotting command) never load it.
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save(fig: Figure, output_path: Path, digest: str | None = None) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.figure(figsize=(10, 4))
+    fig.tight_layout()
+    metadata = {DIGEST_KEY: digest} if digest else None
+    fig.savefig(output_path, dpi=DPI, metadata=metadata)
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    # Keep the minimum and maximum of each of max_points // 2 equal-count buckets, in order,
+    # so peaks survive; all-missing buckets become a single NaN to keep gaps in the line
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    pad = buckets * size - n
+    values = np.concatenate([np.asarray(y, dtype=float), np.full(pad, np.nan)]).reshape(buckets, size)
+    missing = np.isnan(values)
+    lo = np.where(missing, np.inf, values).argmin(axis=1)
+    hi = np.where(missing, -np.inf, values).argmax(axis=1)
+    first = np.minimum(lo, hi) + np.arange(buckets) * size
+    second = np.maximum(lo, hi) + np.arange(buckets) * size
+    idx = np.column_stack([first, second]).ravel()
+    idx = np.minimum(idx, n - 1)
+    out_y = np.asarray(y, dtype=float)[idx]
+    out_y[np.repeat(missing.all(axis=1), 2)] = np.nan
+    return np.asarray(x)[idx], out_y
+
+
+def plot_scatter(
+    df: pd.DataFrame,
+    ref_col: str,
+    method_col: str,
+    output_path: Path,
+    digest: str | None = None,
+    max_points: int = MAX_SCATTER_POINTS,
+) -> None:
+    fig = _new_figure((6, 6))
+    ax = fig.add_subplot()
+    pairs = df[[ref_col, method_col]].dropna()
+    if len(pairs) > max_points:
+        density = ax.hexbin(pairs[ref_col], pairs[method_col], gridsize=HEXBIN_GRIDSIZE, mincnt=1, bins="log")
+        fig.colorbar(density, ax=ax, label="Count")
+    else:
+        ax.scatter(df[ref_col], df[method_col], alpha=0.6)
+    ax.set_xlabel(ref_col)
+    ax.set_ylabel(method_col)
+    ax.set_title(f"Scatter: {method_col} vs {ref_col}")
+    ax.grid(True, alpha=0.3)
+    _save(fig, output_path, digest)
+
+
+def plot_timeseries(
+    df: pd.DataFrame,
+    ref_col: str,
+    method_col: str,
+    output_path: Path,
+    digest: str | None = None,
+    max_points: int = MAX_LINE_POINTS,
+) -> None:
+    fig = _new_figure((10, 4))
+    ax = fig.add_subplot()
+    dates = df["date"].to_numpy()
+    for col in (ref_col, method_col):
+        ax.plot(*minmax_decimate(dates, df[col].to_numpy(dtype=float), max_points), label=col)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("ETo (mm/d)")
+    ax.set_title(f"Time series: {method_col} vs {ref_col}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    _save(fig, output_path, digest)
+
+
+def plot_monthly_totals(
+    df: pd.DataFrame, method_cols: list[str], output_path: Path, digest: str | None = None
+) -> None:
+    fig = _new_figure((10, 4))
+    ax = fig.add_subplot()
     for col in method_cols:
-        plt.plot(df["month"], df[col], label=col)
-    plt.xlabel("Month")
-    plt.ylabel("Monthly total (mm)")
-    plt.title("Monthly totals")
-    plt.legend(ncol=2, fontsize=8)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=200)
-    plt.close()
+        ax.plot(df["month"], df[col], label=col)
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Monthly total (mm)")
+    ax.set_title("Monthly totals")
+    ax.legend(ncol=2, fontsize=8)
+    ax.grid(True, alpha=0.3)
+    _save(fig, output_path, digest)
 
 
 def _taylor_stats(ref: np.ndarray, series: np.ndarray) -> tuple[float, float, float]:
@@ -66,16 +147,27 @@ def _taylor_stats(ref: np.ndarray, series: np.ndarray) -> tuple[float, float, fl
     return ref_std, series_std, corr
 
 
-def plot_taylor(df: pd.DataFrame, ref_col: str, method_cols: list[str], output_path: Path, title: str) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    ref = df[ref_col].to_numpy()
-    ref = ref[np.isfinite(ref)]
-    if ref.size < 2:
+def plot_taylor(
+    df: pd.DataFrame,
+    ref_col: str,
+    method_cols: list[str],
+    output_path: Path,
+    title: str,
+    digest: str | None = None,
+) -> None:
+    ref = df[ref_col].to_numpy(dtype=float)
+    finite_ref = ref[np.isfinite(ref)]
+    fig = _new_figure((7, 6))
+    if finite_ref.size < 2:
+        # Placeholder rather than no file, so the up-to-date check sees it as rendered
+        ax = fig.add_subplot(111)
+        ax.axis("off")
+        ax.set_title(title)
+        ax.text(0.5, 0.5, f"Not enough {ref_col} values for a Taylor diagram", ha="center", va="center")
+        _save(fig, output_path, digest)
         return
-    ref_std = np.std(ref, ddof=1)
+    ref_std = np.std(finite_ref, ddof=1)
 
-    fig = plt.figure(figsize=(7, 6))
     ax = fig.add_subplot(111, polar=True)
     ax.set_theta_direction(-1)
     ax.set_theta_zero_location("E")
@@ -91,7 +183,7 @@ def plot_taylor(df: pd.DataFrame, ref_col: str, method_cols: list[str], output_p
     for col in method_cols:
         if col == ref_col:
             continue
-        series = df[col].to_numpy()
+        series = df[col].to_numpy(dtype=float)
         _, series_std, corr = _taylor_stats(ref, series)
         if np.isnan(corr):
             continue
@@ -102,6 +194,84 @@ def plot_taylor(df: pd.DataFrame, ref_col: str, method_cols: list[str], output_p
     ax.set_xlabel("Correlation", labelpad=10)
     ax.set_ylabel("Standard deviation", labelpad=30)
     ax.legend(loc="upper right", bbox_to_anchor=(1.35, 1.15), fontsize=8)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=200)
-    plt.close()
+    _save(fig, output_path, digest)
+
+
+# --- Batched rendering -------------------------------------------------------
+
+PLOTTERS: dict[str, Callable[..., None]] = {
+    "scatter": plot_scatter,
+    "timeseries": plot_timeseries,
+    "monthly_totals": plot_monthly_totals,
+    "taylor": plot_taylor,
+}
+
+
+@dataclass
+class FigureJob:
+    """One figure to render: plot kind, the columns it reads, keyword parameters and target."""
+
+    kind: str
+    data: pd.DataFrame
+    output_path: Path
+    params: dict[str, Any] = field(default_factory=dict)
+
+    def digest(self) -> str:
+        hasher = hashlib.sha256()
+        header = {"version": PLOTS_VERSION, "dpi": DPI, "kind": self.kind, "params": self.params}
+        hasher.update(json.dumps(header, sort_keys=True, default=str).encode("utf-8"))
+        hasher.update(json.dumps(list(map(str, self.data.columns))).encode("utf-8"))
+        # Rounded so last-digit noise (e.g. a CSV round trip) does not force a re-render
+        floats = self.data.select_dtypes(include=["floating"]).columns
+        data = self.data.astype({col: float for col in floats}).round({col: DIGEST_DECIMALS for col in floats})
+        hasher.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        return hasher.hexdigest()
+
+    def render(self, digest: str | None = None) -> None:
+        PLOTTERS[self.kind](self.data, output_path=self.output_path, digest=digest, **self.params)
+
+
+def stored_digest(path: Path) -> str | None:
+    # Digest recorded in an existing PNG: walk the chunks (length, type, data, CRC) up to the
+    # image data and read the tEXt chunk named DIGEST_KEY, without decoding pixels
+    try:
+        with path.open("rb") as handle:
+            if handle.read(8) != PNG_SIGNATURE:
+                return None
+            while True:
+                header = handle.read(8)
+                if len(header) < 8:
+                    return None
+                length, kind = struct.unpack(">I4s", header)
+                if kind in (b"IDAT", b"IEND"):
+                    return None
+                if kind != b"tEXt":
+                    handle.seek(length + 4, os.SEEK_CUR)
+                    continue
+                key, _, text = handle.read(length).partition(b"\0")
+                handle.seek(4, os.SEEK_CUR)
+                if key == DIGEST_KEY.encode("latin-1"):
+                    return text.decode("latin-1")
+    except OSError:
+        return None
+
+
+def _render(job: FigureJob, digest: str) -> None:
+    job.render(digest)
+
+
+def render_figures(jobs: list[FigureJob], workers: int = 1, force: bool = False) -> tuple[int, int]:
+    # Render jobs whose inputs changed since the PNG was written; returns (rendered, skipped)
+    pending = []
+    for job in jobs:
+        digest = job.digest()
+        if force or stored_digest(job.output_path) != digest:
+            pending.append((job, digest))
+
+    if workers <= 1 or len(pending) <= 1:
+        for job, digest in pending:
+            _render(job, digest)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render, *zip(*pending)))
+    return len(pending), len(jobs) - len(pending)
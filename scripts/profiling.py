@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Callable
+import cProfile
+import json
+import sys
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FIELDS = ("site", "kind", "stage", "wall_s", "cpu_s", "peak_rss_mb", "rows", "rows_per_s")
+
+
+def peak_rss_mb() -> float | None:
+    # Peak resident set size of this process so far
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+def count_rows(value: Any) -> int:
+    # Rows of a frame, or of the largest frame in a tuple/list (e.g. stage inputs)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return max((count_rows(item) for item in value), default=0)
+    return 0
+
+
+@dataclass
+class _Call:
+    profile: cProfile.Profile | None
+    child_wall: float = 0.0
+    child_cpu: float = 0.0
+
+
+class Profiler:
+    """Wall/CPU time, peak RSS and rows for every stage and sink of a pipeline run.
+
+    Times are exclusive: a sink that triggers stage computations is charged only for its own
+    work. With `dump_dir`, each call also gets a cProfile dump `<site>_<kind>_<stage>.prof`.
+    """
+
+    def __init__(self, dump_dir: Path | None = None) -> None:
+        self.dump_dir = dump_dir
+        self.records: list[dict] = []
+        self._stack: list[_Call] = []
+
+    def call(
+        self,
+        site: str,
+        kind: str,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        rows: Callable[[], int] | None = None,
+    ) -> Any:
+        # Only one cProfile can be active at a time: the caller's is paused during nested calls
+        parent = self._stack[-1] if self._stack else None
+        call = _Call(cProfile.Profile() if self.dump_dir else None)
+        if parent is not None and parent.profile is not None:
+            parent.profile.disable()
+        self._stack.append(call)
+        wall, cpu = perf_counter(), process_time()
+        if call.profile is not None:
+            call.profile.enable()
+        try:
+            value = func(*args)
+        finally:
+            if call.profile is not None:
+                call.profile.disable()
+            wall, cpu = perf_counter() - wall, process_time() - cpu
+            self._stack.pop()
+            if parent is not None:
+                parent.child_wall += wall
+                parent.child_cpu += cpu
+                if parent.profile is not None:
+                    parent.profile.enable()
+
+        wall -= call.child_wall
+        n_rows = rows() if rows is not None else max(count_rows(args), count_rows(value))
+        self.records.append(
+            {
+                "site": site,
+                "kind": kind,
+                "stage": name,
+                "wall_s": wall,
+                "cpu_s": cpu - call.child_cpu,
+                "peak_rss_mb": peak_rss_mb(),
+                "rows": n_rows,
+                "rows_per_s": n_rows / wall if wall > 0 else None,
+            }
+        )
+        if call.profile is not None:
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+            call.profile.dump_stats(self.dump_dir / f"{site}_{kind}_{name}.prof")
+        return value
+
+
+def write_report(records: list[dict], path: Path) -> None:
+    # CSV for a .csv path, JSON records otherwise
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".csv":
+        pd.DataFrame(records, columns=list(FIELDS)).to_csv(path, index=False)
+        return
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(records, handle, indent=2)
+
+
+def slowest(records: list[dict], n: int = 5) -> pd.DataFrame:
+    # Stages with the most wall time summed over sites
+    table = pd.DataFrame(records, columns=list(FIELDS))
+    totals = table.groupby(["kind", "stage"], sort=False)[["wall_s", "cpu_s", "rows"]].sum()
+    return totals.sort_values("wall_s", ascending=False).head(n).reset_index()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from . import astronomy, eto
+from .cleaning import day_positions, run_lengths, station_breaks, station_keys
+from .config import QC_LIMITS, QC_MAX_STEP, QC_PERSISTENCE_DAYS, QC_RSO_TOLERANCE
+
+# Bitmask per cell (uint8); a cell can fail several checks
+RANGE = 1
+STEP = 2
+PERSISTENCE = 4
+RADIATION = 8
+CONSISTENCY = 16
+CHECKS = {"range": RANGE, "step": STEP, "persistence": PERSISTENCE, "radiation": RADIATION, "consistency": CONSISTENCY}
+
+# (low, mid, high) columns that must be ordered
+_ORDERED = (
+    ("tmin_c", "tmed_c", "tmax_c"),
+    ("rh_min_pct", "rh_mean_pct", "rh_max_pct"),
+    (None, "wind_mean_ms", "wind_max_ms"),
+)
+_RS_COL = "rad_global_mj_m2_d"
+_RA_COL = "ra_extraterrestre_mj_m2_d"
+
+
+def qc_columns(df: pd.DataFrame) -> list[str]:
+    return [col for col in QC_LIMITS if col in df.columns]
+
+
+def _rso(df: pd.DataFrame, lat: float | np.ndarray | None, alt_m: float | np.ndarray) -> np.ndarray | None:
+    # Clear-sky Rso (MJ m-2 d-1) from the sheet's Q_0 column, which holds Ra as equivalent
+    # evaporation (mm/d); computed from the station latitude when the column is absent
+    if _RA_COL in df.columns:
+        ra = df[_RA_COL].to_numpy(dtype=float) / eto.MJ_TO_MM
+    elif lat is not None and "date" in df.columns:
+        ra = astronomy.extraterrestrial_radiation(lat, df["date"].dt.dayofyear.to_numpy())
+    else:
+        return None
+    return (0.75 + 2e-5 * np.asarray(alt_m, dtype=float)) * ra
+
+
+def run_qc(
+    df: pd.DataFrame, lat: float | np.ndarray | None = None, alt_m: float | np.ndarray = 0.0
+) -> pd.DataFrame:
+    # uint8 flag bits for every QC column and row, computed as whole-array operations. Frames
+    # with a 'site' column are checked per station (steps and runs never cross stations);
+    # `lat`/`alt_m` may then be per-row arrays.
+    cols = qc_columns(df)
+    values = df[cols].to_numpy(dtype=float)
+    finite = np.isfinite(values)
+    flags = np.zeros(values.shape, dtype=np.uint8)
+    breaks = station_breaks(station_keys(df))
+
+    # Physical range
+    low = np.array([QC_LIMITS[c][0] for c in cols])
+    high = np.array([QC_LIMITS[c][1] for c in cols])
+    flags |= np.where(finite & ((values < low) | (values > high)), RANGE, 0).astype(np.uint8)
+
+    # Day-to-day step (flags the later day); only against a row dated the day before, as a
+    # change across missing dates is not a one-day step
+    previous = np.vstack([np.full((1, len(cols)), np.nan), values[:-1]])
+    previous[breaks] = np.nan
+    day = day_positions(df)
+    next_day = np.r_[False, np.diff(day) == 1]
+    max_step = np.array([QC_MAX_STEP.get(c, np.inf) for c in cols])
+    with np.errstate(invalid="ignore"):
+        jumps = next_day[:, None] & (np.abs(values - previous) > max_step)
+    flags |= np.where(jumps, STEP, 0).astype(np.uint8)
+
+    # Flat line: N or more identical consecutive values. A run of r repeats holds r + 1 equal
+    # values; the first of them is not a repeat itself, so flagged runs extend one row back.
+    repeat = finite & (values == previous)
+    min_days = np.array([QC_PERSISTENCE_DAYS.get(c, 0) for c in cols])
+    stuck = repeat & (min_days > 0) & (run_lengths(repeat, breaks) + 1 >= min_days)
+    stuck[:-1] |= stuck[1:]
+    flags |= np.where(stuck, PERSISTENCE, 0).astype(np.uint8)
+
+    # Rs <= Rso
+    if _RS_COL in cols:
+        rso = _rso(df, lat, alt_m)
+        if rso is not None:
+            j = cols.index(_RS_COL)
+            flags[:, j] |= np.where(values[:, j] > QC_RSO_TOLERANCE * rso, RADIATION, 0).astype(np.uint8)
+
+    # Internal consistency: low <= mid <= high
+    for triple in _ORDERED:
+        present = [c for c in triple if c is not None and c in cols]
+        for lo_col, hi_col in zip(present, present[1:]):
+            i, j = cols.index(lo_col), cols.index(hi_col)
+            bad = finite[:, i] & finite[:, j] & (values[:, i] > values[:, j])
+            flags[:, i] |= np.where(bad, CONSISTENCY, 0).astype(np.uint8)
+            flags[:, j] |= np.where(bad, CONSISTENCY, 0).astype(np.uint8)
+
+    return pd.DataFrame(flags, index=df.index, columns=cols)
+
+
+def mask_failed(df: pd.DataFrame, flags: pd.DataFrame) -> pd.DataFrame:
+    # Failed cells become missing so gap filling treats them like outages
+    df = df.copy()
+    cols = list(flags.columns)
+    df[cols] = df[cols].mask(flags.to_numpy() != 0)
+    return df
+
+
+def qc_summary(flags: pd.DataFrame, sites: pd.Series | None = None) -> pd.DataFrame:
+    # Failed cells per column and check (per site when `sites` is given)
+    bits = flags.to_numpy()
+    keys = sites.to_numpy() if sites is not None else np.zeros(len(flags), dtype=int)
+    checks = {name: (bits & bit) != 0 for name, bit in CHECKS.items()}
+    checks["any"] = bits != 0
+    counts = {
+        name: pd.DataFrame(hits, columns=flags.columns).groupby(keys).sum().stack()
+        for name, hits in checks.items()
+    }
+    summary = pd.DataFrame(counts).rename_axis(["site", "column"]).reset_index()
+    return summary if sites is not None else summary.drop(columns="site")
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+import warnings
+import numpy as np
+import pandas as pd
+
+from . import eto
+from .bootstrap import METRICS
+from .config import QC_LIMITS, SENSITIVITY_CHUNK_MB, SENSITIVITY_ERRORS, SENSITIVITY_REALIZATIONS
+from .metrics import batch_scores
+from .pipeline import REF_COL
+
+# Monte-Carlo propagation of sensor errors: every realization perturbs the weather inputs
+# with the error models and recomputes all methods, Penman-Monteith included, so the skill
+# scores against PM reflect the uncertainty of the reference as well. A chunk of
+# realizations is one long eto_arrays call (one "station" per realization).
+KINDS = ("additive", "relative")
+RANK_METRIC = "rmse"  # lower is better
+# Peak working memory per realization-day (perturbed inputs, method intermediates, score
+# temporaries; ~540 B measured with all inputs and methods), used to size chunks from a
+# memory budget
+BYTES_PER_REALIZATION_DAY = 600
+# (low, mid, high) inputs perturbed independently that must stay ordered, as in QC
+ORDERED = (("tmin_c", "tmed_c", "tmax_c"), ("rh_min_pct", "rh_mean_pct", "rh_max_pct"))
+
+
+@dataclass(frozen=True)
+class ErrorModel:
+    kind: str  # additive | relative
+    sd: float  # per-day random error
+    bias_sd: float = 0.0  # per-realization systematic error
+
+    def __post_init__(self) -> None:
+        if self.kind not in KINDS:
+            raise ValueError(f"Unknown error kind '{self.kind}' (expected one of {KINDS})")
+        if self.sd < 0 or self.bias_sd < 0:
+            raise ValueError("Error standard deviations must be non-negative")
+
+
+def parse_error(spec: str) -> tuple[str, ErrorModel]:
+    # "<column>=<kind>:<sd>[:<bias_sd>]", e.g. wind_mean_ms=relative:0.1:0.05
+    try:
+        column, model = spec.split("=", 1)
+        kind, *values = model.split(":")
+        return column.strip(), ErrorModel(kind.strip(), *(float(v) for v in values))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Expected <column>=<kind>:<sd>[:<bias_sd>], got {spec!r} ({exc})") from exc
+
+
+def error_models(overrides: dict[str, ErrorModel] | None = None) -> dict[str, ErrorModel]:
+    models = {column: ErrorModel(*spec) for column, spec in SENSITIVITY_ERRORS.items()}
+    models.update(overrides or {})
+    unknown = [column for column in models if column not in eto.INPUTS]
+    if unknown:
+        raise ValueError(f"Error models for non-input columns: {unknown} (inputs: {list(eto.INPUTS)})")
+    return models
+
+
+def _perturb(
+    inputs: dict[str, np.ndarray], errors: dict[str, ErrorModel], seeds: list[np.random.SeedSequence]
+) -> dict[str, np.ndarray]:
+    # (n_real, n_days) perturbed inputs; each realization draws from its own seed, so results
+    # depend neither on the chunk size nor on the number of workers
+    n_real = len(seeds)
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    out = {}
+    for column, values in inputs.items():
+        model = errors.get(column)
+        if model is None:
+            out[column] = np.broadcast_to(values, (n_real, len(values)))
+            continue
+        noise = np.stack([rng.normal(0.0, model.sd, len(values)) + rng.normal(0.0, model.bias_sd) for rng in rngs])
+        perturbed = values + noise if model.kind == "additive" else values * (1 + noise)
+        low, high = QC_LIMITS.get(column, (-np.inf, np.inf))
+        out[column] = np.clip(perturbed, low, high)
+    _keep_order(out, inputs)
+    return out
+
+
+def _keep_order(out: dict[str, np.ndarray], inputs: dict[str, np.ndarray]) -> None:
+    # Independent errors can push tmin above tmax (or rh_min above rh_max): crossed pairs are
+    # swapped and the mean clipped between them, on days whose unperturbed values were ordered
+    for low, mid, high in ORDERED:
+        if low not in out or high not in out:
+            continue
+        with np.errstate(invalid="ignore"):
+            crossed = (inputs[low] <= inputs[high]) & (out[low] > out[high])
+        out[low], out[high] = np.where(crossed, out[high], out[low]), np.where(crossed, out[low], out[high])
+        if mid in out:
+            with np.errstate(invalid="ignore"):
+                inside = (inputs[low] <= inputs[mid]) & (inputs[mid] <= inputs[high])
+                value = np.where(inside & (out[mid] < out[low]), out[low], out[mid])
+                out[mid] = np.where(inside & (value > out[high]), out[high], value)
+
+
+def _evaluate(
+    inputs: dict[str, np.ndarray],
+    calendar: tuple[np.ndarray, np.ndarray, np.ndarray],
+    lat: float,
+    alt_m: float,
+    methods: list[str],
+) -> np.ndarray:
+    # (n_real, n_days, k) methods for (n_real, n_days) inputs, in one flattened call
+    n_real, n_days = next(iter(inputs.values())).shape
+    flat = {column: np.ascontiguousarray(values).ravel() for column, values in inputs.items()}
+    doy, year, month = (np.tile(field, n_real) for field in calendar)
+    station = np.repeat(np.arange(n_real), n_days)
+    values = eto.eto_arrays(flat, doy, year, month, lat, alt_m, methods, station)
+    return np.stack([values[method].reshape(n_real, n_days) for method in methods], axis=2)
+
+
+def _summaries(values: np.ndarray, ref_index: int, compare: list[int]) -> dict:
+    # Per-chunk statistics that merge across chunks: daily sums over realizations, and the
+    # period mean and skill scores of every realization
+    finite = np.isfinite(values)
+    filled = np.where(finite, values, 0.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN methods
+        period_mean = np.nanmean(values, axis=1)
+    return {
+        "count": finite.sum(axis=0),
+        "sum": filled.sum(axis=0),
+        "sumsq": (filled * filled).sum(axis=0),
+        "period_mean": period_mean,
+        "scores": batch_scores(values[:, :, [ref_index]], values[:, :, compare]),
+    }
+
+
+def _chunk(
+    inputs: dict[str, np.ndarray],
+    calendar: tuple[np.ndarray, np.ndarray, np.ndarray],
+    lat: float,
+    alt_m: float,
+    methods: list[str],
+    errors: dict[str, ErrorModel],
+    ref_index: int,
+    compare: list[int],
+    seeds: list[np.random.SeedSequence],
+) -> dict:
+    values = _evaluate(_perturb(inputs, errors, seeds), calendar, lat, alt_m, methods)
+    return _summaries(values, ref_index, compare)
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    # 1 = lowest score per row; NaN scores rank last
+    return np.argsort(np.argsort(np.where(np.isnan(scores), np.inf, scores), axis=1), axis=1) + 1
+
+
+def propagate_errors(
+    daily: pd.DataFrame,
+    lat: float,
+    alt_m: float,
+    n_real: int = SENSITIVITY_REALIZATIONS,
+    errors: dict[str, ErrorModel] | None = None,
+    ref_col: str = REF_COL,
+    alpha: float = 0.05,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_mb: float = SENSITIVITY_CHUNK_MB,
+) -> dict[str, pd.DataFrame]:
+    # Three tables for one site:
+    #   eto:     per method, baseline mean ETo and its spread over realizations
+    #   metrics: per compared method and metric, baseline score and percentile interval
+    #   ranks:   per compared method, baseline rank by RANK_METRIC and how often it holds
+    if n_real < 1:
+        raise ValueError("At least one realization is needed")
+    if "date" not in daily.columns or daily.empty:
+        raise ValueError("Sensitivity needs a non-empty daily frame with a 'date' column")
+    errors = error_models() if errors is None else errors
+    inputs = {c: pd.to_numeric(daily[c], errors="coerce").to_numpy(dtype=float) for c in eto.INPUTS if c in daily}
+    if not inputs:
+        raise ValueError(f"No weather input columns (expected some of {list(eto.INPUTS)})")
+    dates = pd.to_datetime(daily["date"])
+    calendar = (dates.dt.dayofyear.to_numpy(), dates.dt.year.to_numpy(), dates.dt.month.to_numpy())
+
+    # Unperturbed run: baseline values, and the methods it can compute at all
+    baseline = _evaluate({c: v[None, :] for c, v in inputs.items()}, calendar, lat, alt_m, list(eto.METHODS))
+    methods = [m for i, m in enumerate(eto.METHODS) if np.isfinite(baseline[:, :, i]).any()]
+    if ref_col not in methods:
+        raise ValueError(f"Reference '{ref_col}' cannot be computed from the available columns")
+    baseline = baseline[:, :, [eto.METHODS.index(m) for m in methods]]
+    ref_index = methods.index(ref_col)
+    compare = [i for i, m in enumerate(methods) if m != ref_col]
+    base = _summaries(baseline, ref_index, compare)
+
+    per_chunk = max(1, int(chunk_mb * 2**20 // (len(daily) * BYTES_PER_REALIZATION_DAY)))
+    seeds = np.random.SeedSequence(seed).spawn(n_real)
+    chunks = [seeds[start : start + per_chunk] for start in range(0, n_real, per_chunk)]
+    args = (inputs, calendar, lat, alt_m, methods, errors, ref_index, compare)
+    if workers <= 1 or len(chunks) <= 1:
+        results = [_chunk(*args, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_chunk, *(repeat(arg) for arg in args), chunks))
+
+    count = sum(r["count"] for r in results)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sum(r["sum"] for r in results) / count
+        daily_sd = np.sqrt(np.clip(sum(r["sumsq"] for r in results) / count - mean * mean, 0.0, None))
+    period_mean = np.concatenate([r["period_mean"] for r in results])
+    samples = {metric: np.concatenate([r["scores"][metric] for r in results]) for metric in METRICS}
+    levels = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+
+    with warnings.catch_warnings():
+        # Methods or metrics undefined on every day/realization stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        eto_mean = base["period_mean"][0]
+        sd = np.nanmean(daily_sd, axis=0)
+        low, high = np.nanpercentile(period_mean, levels, axis=0)
+        eto_table = pd.DataFrame(
+            {
+                "method": methods,
+                "eto_mean": eto_mean,
+                "mc_mean": np.nanmean(period_mean, axis=0),
+                "ci_low": low,
+                "ci_high": high,
+                "daily_sd": sd,
+                "daily_sd_pct": 100 * sd / eto_mean,
+            }
+        )
+
+        compared = [methods[i] for i in compare]
+        rows = []
+        for metric in METRICS:
+            low, median, high = np.nanpercentile(samples[metric], [levels[0], 50, levels[1]], axis=0)
+            rows.append(
+                pd.DataFrame(
+                    {
+                        "method": compared,
+                        "metric": metric,
+                        "estimate": base["scores"][metric][0],
+                        "median": median,
+                        "ci_low": low,
+                        "ci_high": high,
+                    }
+                )
+            )
+        metrics_table = pd.concat(rows, ignore_index=True)
+
+    base_rank = _ranks(base["scores"][RANK_METRIC])[0]
+    ranks = _ranks(samples[RANK_METRIC])
+    ranks_table = pd.DataFrame(
+        {
+            "method": compared,
+            "metric": RANK_METRIC,
+            "rank": base_rank,
+            "rank_mean": ranks.mean(axis=0),
+            "rank_low": np.percentile(ranks, levels[0], axis=0),
+            "rank_high": np.percentile(ranks, levels[1], axis=0),
+            "share_same_rank": (ranks == base_rank).mean(axis=0),
+            "share_best": (ranks == 1).mean(axis=0),
+        }
+    ).sort_values("rank", ignore_index=True)
+    return {"eto": eto_table, "metrics": metrics_table, "ranks": ranks_table}
@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from time import monotonic
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import ipaddress
+import json
+import socket
+import numpy as np
+import pandas as pd
+
+from . import eto, pipeline
+from .config import (
+    DATA_CLEANED,
+    SERVICE_BATCH_MAX_ROWS,
+    SERVICE_CACHE_SITES,
+    SERVICE_HOST,
+    SERVICE_MAX_BODY_BYTES,
+    SERVICE_PORT,
+)
+from .pipeline import SitePipeline
+
+# Long-running local HTTP/JSON service over the pipeline (stdlib asyncio, HTTP/1.1 with
+# keep-alive, loopback only):
+#   GET  /health                       service, cache and batching counters
+#   GET  /sites                        configured stations
+#   GET  /sites/<site>/metrics         ?table=daily|monthly, or ?group_by=month,season
+#   POST /eto                          {"records": [...], "methods": [...], "site"/"lat"/"alt_m"}
+# Computation runs in a worker thread; concurrent /eto requests are merged into one
+# compute_eto call, and each site's cleaned series and memoized tables stay in an LRU cache.
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def require_loopback(host: str) -> None:
+    # The service has no authentication: refuse to listen beyond this machine
+    try:
+        address = ipaddress.ip_address(socket.gethostbyname(host))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"Cannot resolve service host {host!r}") from exc
+    if not address.is_loopback:
+        raise ValueError(f"The service only listens on loopback addresses, not {host!r} ({address})")
+
+
+# --- Site cache ----------------------------------------------------------------
+
+
+def _signature(cleaned_dir: Path, site: str) -> tuple:
+    # Changes when the site's cleaned data is rewritten (clean, all, update)
+    paths = sorted((cleaned_dir / pipeline.DAILY_DATASET / f"site={site}").glob("*/part.*"))
+    paths = paths or [cleaned_dir / f"{site}_daily.csv"]
+    return tuple((str(p), p.stat().st_mtime_ns) for p in paths if p.exists())
+
+
+class SiteCache:
+    """Per-site pipelines (cleaned series and memoized tables), least recently used evicted first."""
+
+    def __init__(self, cleaned_dir: Path, stations: dict[str, dict], capacity: int = SERVICE_CACHE_SITES) -> None:
+        self.cleaned_dir = cleaned_dir
+        self.stations = stations
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[tuple, asyncio.Task]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, site: str) -> SitePipeline:
+        if site not in self.stations:
+            raise HTTPError(404, f"Unknown site '{site}'")
+        signature = _signature(self.cleaned_dir, site)
+        if not signature:
+            raise HTTPError(404, f"No cleaned data for '{site}' in {self.cleaned_dir}")
+        entry = self._entries.get(site)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            self._entries.move_to_end(site)
+            return await entry[1]
+
+        # Concurrent misses share one load
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(loop.run_in_executor(None, self._load, site))
+        self._entries[site] = (signature, task)
+        self._entries.move_to_end(site)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        try:
+            return await task
+        except Exception:
+            self._entries.pop(site, None)
+            raise
+
+    def _load(self, site: str) -> SitePipeline:
+        return SitePipeline.from_daily(site, self.stations[site], pipeline.read_daily(self.cleaned_dir, site))
+
+
+# --- Batched ETo -------------------------------------------------------------
+
+
+@dataclass
+class EtoRequest:
+    records: list[dict]
+    lat: float | None  # request-level defaults (explicit or from the request's 'site')
+    alt_m: float | None
+    methods: list[str]
+    future: asyncio.Future
+
+
+def _batch_coordinate(
+    frame: pd.DataFrame, name: str, defaults: np.ndarray, owner: np.ndarray, stations: dict[str, dict]
+) -> np.ndarray:
+    # Per-row lat/alt_m: the record's value, then the catalog entry of the record's 'site',
+    # then the owning request's default
+    values = pd.to_numeric(frame[name], errors="coerce") if name in frame.columns else pd.Series(np.nan, index=frame.index)
+    if "site" in frame.columns:
+        values = values.fillna(frame["site"].map({s: meta.get(name) for s, meta in stations.items()}))
+    values = values.to_numpy(dtype=float)
+    return np.where(np.isnan(values), defaults[owner], values)
+
+
+def _compute_batch(batch: list[EtoRequest], stations: dict[str, dict]) -> list[bytes | Exception]:
+    # One frame and one compute_eto call for every queued request, answered as JSON bodies.
+    # Each request is its own station in the long frame, so series-dependent methods
+    # (Thornthwaite) never mix requests; a request with undated or unlocated rows fails alone
+    # here, and one that breaks compute_eto itself fails alone through _compute_each.
+    owner = np.repeat(np.arange(len(batch)), [len(request.records) for request in batch])
+    frame = pd.DataFrame.from_records([record for request in batch for record in request.records])
+    errors: dict[int, HTTPError] = {}
+
+    def reject(bad: np.ndarray, message: str) -> None:
+        for i in np.unique(owner[bad]):
+            errors.setdefault(int(i), HTTPError(400, message))
+
+    if "date" in frame.columns:
+        dates = pd.to_datetime(frame["date"], errors="coerce", format="ISO8601")
+    else:
+        dates = pd.Series(pd.NaT, index=frame.index, dtype="datetime64[ns]")
+    reject(dates.isna().to_numpy(), "Every record needs an ISO 'date'")
+    lat = _batch_coordinate(frame, "lat", np.array([r.lat for r in batch], dtype=float), owner, stations)
+    alt_m = _batch_coordinate(frame, "alt_m", np.array([r.alt_m for r in batch], dtype=float), owner, stations)
+    alt_m = np.nan_to_num(alt_m, nan=0.0)  # sea level unless known
+    reject(np.isnan(lat), "No lat for some records: give it per record, per request or a known 'site'")
+
+    keep = ~np.isin(owner, list(errors))
+    results: list[bytes | Exception] = [errors.get(i, b"") for i in range(len(batch))]
+    if not keep.any():
+        return results
+    methods = [m for m in eto.METHODS if any(m in batch[i].methods for i in np.unique(owner[keep]))]
+    long = frame.loc[keep].drop(columns=[c for c in ("site", "lat", "alt_m") if c in frame.columns])
+    long = long.assign(date=dates[keep], site=owner[keep])
+    result = eto.compute_eto(long, lat=lat[keep], alt_m=alt_m[keep], methods=methods)
+
+    # Split once on numpy arrays rather than slicing the frame per request; NaN -> null
+    days = np.datetime_as_string(result["date"].to_numpy(), unit="D").tolist()
+    values = result[methods].to_numpy(dtype=float)
+    values = np.where(np.isnan(values), None, values)
+    owners = owner[keep]
+    bounds = np.searchsorted(owners, np.arange(len(batch) + 1))
+    for i, request in enumerate(batch):
+        if i in errors:
+            continue
+        start, stop = bounds[i], bounds[i + 1]
+        block = values[start:stop, [methods.index(m) for m in request.methods]].tolist()
+        records = [{"date": day, **dict(zip(request.methods, row))} for day, row in zip(days[start:stop], block)]
+        results[i] = json.dumps({"records": records}).encode("utf-8")
+    return results
+
+
+def _compute_each(batch: list[EtoRequest], stations: dict[str, dict]) -> list[bytes | Exception]:
+    # Fallback when a batch raises: every request computed alone, so only the one that
+    # raised gets the error
+    results: list[bytes | Exception] = []
+    for request in batch:
+        try:
+            results.extend(_compute_batch([request], stations))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+class EtoBatcher:
+    """Queue of /eto requests, drained in batches of up to `max_rows` records.
+
+    Requests that arrive while a batch is computing are merged into the next one, so the
+    batch size follows the load without adding a fixed wait.
+    """
+
+    def __init__(self, stations: dict[str, dict], max_rows: int = SERVICE_BATCH_MAX_ROWS) -> None:
+        self.stations = stations
+        self.max_rows = max_rows
+        self.batches = 0
+        self.rows = 0
+        self._queue: asyncio.Queue[EtoRequest] = asyncio.Queue()
+
+    async def submit(self, records: list[dict], lat: float | None, alt_m: float | None, methods: list[str]) -> bytes:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(EtoRequest(records, lat, alt_m, methods, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0].records)
+            while rows < self.max_rows and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                rows += len(batch[-1].records)
+            try:
+                results = await loop.run_in_executor(None, _compute_batch, batch, self.stations)
+            except Exception as exc:
+                if len(batch) == 1:
+                    results = [exc]
+                else:
+                    results = await loop.run_in_executor(None, _compute_each, batch, self.stations)
+            self.batches += 1
+            self.rows += rows
+            for request, result in zip(batch, results):
+                if request.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    request.future.set_exception(result)
+                else:
+                    request.future.set_result(result)
+
+
+def _coordinate(value: Any, name: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError) as exc:
+        raise HTTPError(400, f"Invalid {name} {value!r}") from exc
+
+
+def parse_eto_request(payload: Any, stations: dict[str, dict]) -> tuple[list[dict], float | None, float | None, list[str]]:
+    # (records, default lat, default alt_m, methods). Only the request shape is checked here,
+    # on the event loop; dates and per-record coordinates are resolved for the whole batch
+    # in _compute_batch.
+    if not isinstance(payload, dict) or not isinstance(payload.get("records"), list) or not payload["records"]:
+        raise HTTPError(400, "Expected a JSON object with a non-empty 'records' list")
+    if not all(isinstance(record, dict) for record in payload["records"]):
+        raise HTTPError(400, "Every record must be a JSON object")
+    methods = payload.get("methods") or list(eto.METHODS)
+    unknown = [m for m in methods if m not in eto.METHODS]
+    if unknown:
+        raise HTTPError(400, f"Unknown ETo methods: {unknown}")
+
+    defaults = {}
+    for name in ("lat", "alt_m"):
+        value = payload.get(name)
+        if value is None and payload.get("site") in stations:
+            value = stations[payload["site"]].get(name)
+        defaults[name] = None if value is None else _coordinate(value, name)
+    return payload["records"], defaults["lat"], defaults["alt_m"], methods
+
+
+# --- HTTP --------------------------------------------------------------------
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    body: bytes
+    keep_alive: bool
+
+
+async def read_request(reader: asyncio.StreamReader, max_body: int = SERVICE_MAX_BODY_BYTES) -> Request | None:
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError as exc:
+        raise HTTPError(400, "Malformed request line") from exc
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError as exc:
+        raise HTTPError(400, "Invalid Content-Length") from exc
+    if length > max_body:
+        raise HTTPError(413, f"Body over {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    return Request(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), body, keep_alive)
+
+
+def response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _records_json(frame: pd.DataFrame) -> bytes:
+    # NaN -> null, dates as ISO strings
+    return frame.to_json(orient="records", date_format="iso").encode("utf-8")
+
+
+class EtoService:
+    def __init__(
+        self,
+        stations: dict[str, dict],
+        cleaned_dir: Path = DATA_CLEANED,
+        cache_sites: int = SERVICE_CACHE_SITES,
+        batch_rows: int = SERVICE_BATCH_MAX_ROWS,
+    ) -> None:
+        self.stations = stations
+        self.cache = SiteCache(cleaned_dir, stations, cache_sites)
+        self.batcher = EtoBatcher(stations, batch_rows)
+        self.requests = 0
+        self.started = monotonic()
+
+    async def handle(self, request: Request) -> bytes:
+        parts = [p for p in request.path.split("/") if p]
+        if parts == ["health"] and request.method == "GET":
+            return json.dumps(self.health()).encode("utf-8")
+        if parts == ["sites"] and request.method == "GET":
+            return json.dumps({"sites": self.stations}, default=str).encode("utf-8")
+        if len(parts) == 3 and parts[0] == "sites" and parts[2] == "metrics" and request.method == "GET":
+            return await self.metrics(parts[1], request.query)
+        if parts == ["eto"] and request.method == "POST":
+            return await self.eto(request.body)
+        if parts in (["health"], ["sites"], ["eto"]) or (len(parts) == 3 and parts[2] == "metrics"):
+            raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+        raise HTTPError(404, f"No route for {request.path}")
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_s": round(monotonic() - self.started, 3),
+            "requests": self.requests,
+            "cache": {"sites": len(self.cache), "capacity": self.cache.capacity, "hits": self.cache.hits, "misses": self.cache.misses},
+            "batches": {"count": self.batcher.batches, "rows": self.batcher.rows},
+        }
+
+    async def metrics(self, site: str, query: dict[str, list[str]]) -> bytes:
+        pipe = await self.cache.get(site)
+        table = (query.get("table") or ["daily"])[0]
+        group_by = [key for spec in query.get("group_by", []) for key in spec.split(",") if key]
+        if table not in ("daily", "monthly"):
+            raise HTTPError(400, f"Unknown metrics table '{table}' (daily or monthly)")
+
+        def compute() -> pd.DataFrame:
+            # Memoized in the cached pipeline: only the first request per site computes
+            if group_by:
+                return pipeline.grouped_daily_metrics(pipe, group_by)
+            return pipe.get(f"{table}_metrics")
+
+        try:
+            frame = await asyncio.get_running_loop().run_in_executor(None, compute)
+        except (KeyError, ValueError) as exc:
+            raise HTTPError(400, str(exc)) from exc
+        return b'{"site":' + json.dumps(site).encode("utf-8") + b',"metrics":' + _records_json(frame) + b"}"
+
+    async def eto(self, body: bytes) -> bytes:
+        try:
+            payload = json.loads(body or b"null")
+        except json.JSONDecodeError as exc:
+            raise HTTPError(400, f"Invalid JSON: {exc}") from exc
+        return await self.batcher.submit(*parse_eto_request(payload, self.stations))
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = request.keep_alive
+                    self.requests += 1
+                    status, body = 200, await self.handle(request)
+                except HTTPError as exc:
+                    status, body = exc.status, json.dumps({"error": str(exc)}).encode("utf-8")
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as exc:  # a failing computation must not take the service down
+                    status, body = 500, json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode("utf-8")
+                writer.write(response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> None:
+        require_loopback(host)
+        batcher = asyncio.ensure_future(self.batcher.run())
+        server = await asyncio.start_server(self.serve_client, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
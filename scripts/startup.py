@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from time import perf_counter
+import subprocess
+import sys
+
+from .config import BASE_DIR, STARTUP_BUDGET, STARTUP_FORBIDDEN, STARTUP_FORBIDDEN_DEFAULT
+
+# CLI startup checks (`bench --startup`, tests/test_startup.py): every subcommand's handler is
+# loaded in a fresh interpreter, timed against a bare interpreter start, and its imports
+# compared with STARTUP_FORBIDDEN. Standard library only, so the check itself starts fast.
+TRACKED_MODULES = (
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "openpyxl",
+    "pyarrow",
+    "PIL",
+    "scripts.pipeline",
+    "scripts.benchmark",
+)
+
+
+def _run(code: str, repeat: int) -> tuple[float, str]:
+    # Best wall time of a fresh interpreter running `code`, and its output
+    best, out = float("inf"), ""
+    for _ in range(repeat):
+        start = perf_counter()
+        done = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+        best = min(best, perf_counter() - start)
+        out = done.stdout
+    return best, out
+
+
+def bare_startup_time(repeat: int = 5) -> float:
+    # `python -c pass`: the unit of STARTUP_BUDGET
+    return _run("pass", repeat)[0]
+
+
+def startup_time(command: str, repeat: int = 5) -> tuple[float, list[str]]:
+    # Best wall time of a fresh interpreter importing the CLI and loading `command`'s handler
+    # ("--help": building and formatting the parser), and the tracked modules it imported
+    load = "cli.build_parser().format_help()" if command == "--help" else f"cli.resolve({command!r})"
+    code = (
+        f"import sys\nfrom scripts import cli\n{load}\n"
+        f"print(' '.join(m for m in {TRACKED_MODULES!r} if m in sys.modules))"
+    )
+    best, out = _run(code, repeat)
+    return best, out.split()
+
+
+def forbidden_modules(command: str) -> tuple[str, ...]:
+    return STARTUP_FORBIDDEN.get(command, STARTUP_FORBIDDEN_DEFAULT)
+
+
+def startup_check(repeat: int = 5) -> list[dict]:
+    # One row per subcommand: startup time (in bare interpreter starts) and imports against its budget
+    bare = bare_startup_time(repeat)
+    rows = []
+    for command, budget in STARTUP_BUDGET.items():
+        seconds, loaded = startup_time(command, repeat)
+        forbidden = [m for m in loaded if m in forbidden_modules(command)]
+        rows.append(
+            {
+                "command": command,
+                "seconds": seconds,
+                "bare_starts": seconds / bare,
+                "budget": budget,
+                "loaded": " ".join(loaded),
+                "forbidden": " ".join(forbidden),
+                "ok": seconds <= budget * bare and not forbidden,
+            }
+        )
+    return rows
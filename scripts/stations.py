@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+import csv
+
+from .config import BASE_DIR, SITES, STATIONS_FILE
+
+REQUIRED_FIELDS = ("id", "lat", "lon", "alt_m")
+FLOAT_FIELDS = ("lat", "lon", "alt_m")
+
+
+def _parse_row(row: dict[str, str], line: int) -> tuple[str, dict]:
+    missing = [f for f in REQUIRED_FIELDS if not (row.get(f) or "").strip()]
+    if missing:
+        raise ValueError(f"Station catalog line {line}: missing {missing}")
+
+    station_id = row["id"].strip()
+    meta: dict = {"sheet": (row.get("sheet") or "").strip() or station_id}
+    for field in FLOAT_FIELDS:
+        try:
+            meta[field] = float(row[field])
+        except ValueError as exc:
+            raise ValueError(f"Station catalog line {line}: invalid {field} {row[field]!r}") from exc
+
+    # Workbook, or a daily CSV such as the `ingest` output (pipeline._read_sheet)
+    source = (row.get("source") or "").strip()
+    if source:
+        source_path = Path(source)
+        meta["source"] = source_path if source_path.is_absolute() else BASE_DIR / source_path
+
+    # Extra columns (e.g. per-site coefficients) are passed through as-is
+    for key, value in row.items():
+        if key not in meta and key != "id" and key is not None and value not in (None, ""):
+            meta[key] = value.strip()
+    return station_id, meta
+
+
+def load_stations(path: Path | str | None = None) -> dict[str, dict]:
+    path = Path(path) if path is not None else STATIONS_FILE
+    if not path.exists():
+        return {site: dict(meta) for site, meta in SITES.items()}
+
+    stations: dict[str, dict] = {}
+    with path.open(newline="", encoding="utf-8") as handle:
+        for line, row in enumerate(csv.DictReader(handle), start=2):
+            station_id, meta = _parse_row(row, line)
+            if station_id in stations:
+                raise ValueError(f"Station catalog line {line}: duplicated id {station_id!r}")
+            stations[station_id] = meta
+    return stations
+
+
+def select_stations(stations: dict[str, dict], ids: list[str] | None) -> dict[str, dict]:
+    if not ids:
+        return stations
+    unknown = [s for s in ids if s not in stations]
+    if unknown:
+        raise ValueError(f"Unknown stations: {unknown}")
+    return {s: stations[s] for s in ids}
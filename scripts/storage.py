@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Iterable
+import shutil
+import pandas as pd
+
+from .config import STORAGE_CATEGORIES
+
+# Datasets are Hive-style directories partitioned by station and year:
+#   <root>/<dataset>/site=<site>/year=<year>/part.parquet
+# Frames without a date or month column (e.g. metrics) have only the site level.
+FORMATS = ("parquet", "csv")
+PART = "part"
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"  # rows whose date is missing
+_TIME_COLUMNS = ("date", "month")
+
+
+def parquet_available() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+def default_format() -> str:
+    return "parquet" if parquet_available() else "csv"
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    # Explicit storage dtypes: categorical labels. Numbers keep float64, weather variables
+    # included, so commands reading stored data compute exactly what `all` computes in memory.
+    dtypes = {}
+    for col in df.columns:
+        if col in STORAGE_CATEGORIES and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            dtypes[col] = "category"
+    return df.astype(dtypes) if dtypes else df
+
+
+def _years(df: pd.DataFrame) -> pd.Series | None:
+    for col in _TIME_COLUMNS:
+        if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]):
+            return df[col].dt.year
+    return None
+
+
+def _part_path(directory: Path, fmt: str) -> Path:
+    return directory / f"{PART}.{fmt}"
+
+
+def _write_part(df: pd.DataFrame, directory: Path, fmt: str) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        df.to_parquet(_part_path(directory, fmt), index=False)
+    else:
+        df.to_csv(_part_path(directory, fmt), index=False)
+
+
+def write_dataset(
+    df: pd.DataFrame, root: Path, dataset: str, site: str | None = None, fmt: str | None = None
+) -> list[Path]:
+    # Replace every partition of `site` in `dataset` with `df` (one file per year). Without
+    # `site`, a long frame is split on its 'site' column and each station is replaced.
+    if site is not None:
+        return [_write_site(df, root, dataset, site, fmt)]
+    if "site" not in df.columns:
+        raise ValueError(f"Writing '{dataset}' needs a site name or a 'site' column")
+    return [
+        _write_site(part, root, dataset, str(key), fmt)
+        for key, part in df.groupby("site", sort=False, observed=True)
+    ]
+
+
+def _write_site(df: pd.DataFrame, root: Path, dataset: str, site: str, fmt: str | None) -> Path:
+    fmt = fmt or default_format()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown storage format '{fmt}' (expected one of {FORMATS})")
+    site_dir = root / dataset / f"site={site}"
+    if site_dir.exists():
+        shutil.rmtree(site_dir)  # years no longer present must not survive as stale partitions
+
+    df = compact(df.drop(columns="site", errors="ignore"))
+    years = _years(df)
+    if years is None:
+        _write_part(df, site_dir, fmt)
+        return site_dir
+    for year, part in df.groupby(years.to_numpy(), sort=True, dropna=False):
+        label = NULL_PARTITION if pd.isna(year) else str(int(year))
+        _write_part(part, site_dir / f"year={label}", fmt)
+    return site_dir
+
+
+def _partition_value(directory: Path) -> str:
+    return directory.name.split("=", 1)[1]
+
+
+def _year_order(directory: Path) -> tuple[int, int]:
+    label = _partition_value(directory)
+    return (1, 0) if label == NULL_PARTITION else (0, int(label))
+
+
+def _read_part(directory: Path, columns: list[str] | None) -> pd.DataFrame | None:
+    # Only the requested columns are read: Parquet projects at the column-chunk level
+    parquet = _part_path(directory, "parquet")
+    if parquet.exists():
+        if columns is None:
+            return pd.read_parquet(parquet)
+        import pyarrow.parquet as pq
+
+        present = set(pq.read_schema(parquet).names)
+        return pd.read_parquet(parquet, columns=[c for c in columns if c in present])
+    text = _part_path(directory, "csv")
+    if text.exists():
+        usecols = None if columns is None else (lambda col: col in columns)
+        df = pd.read_csv(text, usecols=usecols)
+        for col in _TIME_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+        return compact(df)
+    return None
+
+
+def _part_columns(directory: Path) -> list[str] | None:
+    parquet = _part_path(directory, "parquet")
+    if parquet.exists():
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(parquet).names)
+    text = _part_path(directory, "csv")
+    if text.exists():
+        return list(pd.read_csv(text, nrows=0).columns)
+    return None
+
+
+def site_columns(root: Path, dataset: str, site: str) -> list[str] | None:
+    # Columns a station's partitions were written with, from the file headers only (a long
+    # read fills the other stations' columns with NaN); None when the site has no data
+    site_dir = root / dataset / f"site={site}"
+    for directory in [*sorted(site_dir.glob("year=*"), key=_year_order), site_dir]:
+        columns = _part_columns(directory)
+        if columns is not None:
+            return columns
+    return None
+
+
+def read_dataset(
+    root: Path,
+    dataset: str,
+    sites: Iterable[str] | None = None,
+    years: Iterable[int] | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame | None:
+    # Stations and years are pruned from the directory names before any file is opened.
+    # Adds a categorical 'site' column; None when nothing matches.
+    base = root / dataset
+    if not base.is_dir():
+        return None
+    wanted_sites = None if sites is None else {str(s) for s in sites}
+    wanted_years = None if years is None else {int(y) for y in years}
+
+    frames = []
+    labels = []
+    for site_dir in sorted(base.glob("site=*")):
+        site = _partition_value(site_dir)
+        if wanted_sites is not None and site not in wanted_sites:
+            continue
+        year_dirs = sorted(site_dir.glob("year=*"), key=_year_order)
+        if not year_dirs:
+            year_dirs = [site_dir]
+        elif wanted_years is not None:
+            year_dirs = [d for d in year_dirs if _year_order(d) in {(0, y) for y in wanted_years}]
+        for directory in year_dirs:
+            frame = _read_part(directory, columns)
+            if frame is not None:
+                frames.append(frame)
+                labels.extend([site] * len(frame))
+    if not frames:
+        return None
+    df = compact(pd.concat(frames, ignore_index=True))  # concat drops differing categories
+    site = pd.DataFrame({"site": pd.Categorical(labels, categories=sorted(set(labels)))})
+    return pd.concat([site, df], axis=1)
+
+
+def read_site(
+    root: Path, dataset: str, site: str, years: Iterable[int] | None = None, columns: list[str] | None = None
+) -> pd.DataFrame | None:
+    df = read_dataset(root, dataset, [site], years, columns)
+    return None if df is None else df.drop(columns="site")
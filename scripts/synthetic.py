@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from pathlib import Path
+import csv
+import numpy as np
+import pandas as pd
+
+from . import astronomy, eto
+from .config import DEFAULT_YEAR, METHOD_COLUMNS, WEATHER_COLUMNS
+
+# Synthetic stations for benchmarks and scaling runs: the standardized workbook schema
+# (WEATHER_COLUMNS and METHOD_COLUMNS) for N stations x Y years, with seasonality,
+# correlated variables (rain -> cloudier, cooler range, more humid) and injected gaps
+WEATHER = [
+    "tmed_c",
+    "tmax_c",
+    "tmin_c",
+    "rh_mean_pct",
+    "rh_max_pct",
+    "rh_min_pct",
+    "wind_mean_ms",
+    "wind_max_ms",
+    "rain_mm",
+    "rad_global_mj_m2_d",
+    "rad_net_mj_m2_d",
+]
+RA_COL = "ra_extraterrestre_mj_m2_d"
+HEADER_ROWS = 4  # blank rows above the header in the Evapo workbook layout
+
+
+def synthetic_stations(n: int, seed: int = 0) -> dict[str, dict]:
+    # Catalog entries (as stations.load_stations returns them) spread over Brazil
+    rng = np.random.default_rng(seed)
+    return {
+        f"synth{i:03d}": {
+            "sheet": f"Synth{i:03d}",
+            "lat": round(float(rng.uniform(-30.0, 3.0)), 4),
+            "lon": round(float(rng.uniform(-70.0, -35.0)), 4),
+            "alt_m": round(float(rng.uniform(0.0, 1100.0)), 1),
+        }
+        for i in range(n)
+    }
+
+
+def _ar1(rng: np.random.Generator, shape: tuple[int, int], phi: float, sd: float) -> np.ndarray:
+    # Day-to-day persistent anomalies (rows are days), stationary standard deviation `sd`
+    noise = rng.normal(0.0, sd * np.sqrt(1 - phi**2), shape)
+    out = np.empty(shape)
+    out[0] = rng.normal(0.0, sd, shape[1])
+    for day in range(1, shape[0]):
+        out[day] = phi * out[day - 1] + noise[day]
+    return out
+
+
+def _inject_gaps(rng: np.random.Generator, values: np.ndarray, gap_rate: float, years: int) -> np.ndarray:
+    # Isolated missing cells at `gap_rate`, plus station outages (all variables) of 2-20 days
+    n_days, n_stations, _ = values.shape
+    values = np.where(rng.random(values.shape) < gap_rate, np.nan, values)
+    for station in range(n_stations):
+        for _ in range(rng.poisson(2 * years * gap_rate / 0.02)):
+            start = int(rng.integers(0, n_days))
+            values[start : start + int(rng.integers(2, 21)), station] = np.nan
+    return values
+
+
+def synthetic_daily(
+    stations: dict[str, dict],
+    years: int,
+    start_year: int = DEFAULT_YEAR,
+    gap_rate: float = 0.02,
+    seed: int = 0,
+) -> pd.DataFrame:
+    # Long frame keyed by (site, date) with the standardized column names; method columns
+    # are computed from the gappy weather with eto.compute_eto, so gaps propagate to them
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{start_year}-01-01", f"{start_year + years - 1}-12-31", freq="D")
+    doy = dates.dayofyear.to_numpy()
+    n_days, n_stations = len(dates), len(stations)
+    shape = (n_days, n_stations)
+    lat = np.array([meta["lat"] for meta in stations.values()])
+    alt = np.array([meta["alt_m"] for meta in stations.values()])
+
+    # Seasonal cycle: summer peaks in January south of the equator; wet season Oct-Mar
+    season = np.cos(2 * np.pi * (doy[:, None] - 15) / 365.25) * -np.sign(lat + 1e-9)
+    wet = rng.random(shape) < np.clip(0.3 + 0.2 * season, 0.05, 0.9)
+    rain = np.where(wet, rng.gamma(0.8, 12.0, shape), 0.0)
+
+    ra = astronomy.extraterrestrial_radiation(lat[None, :], doy[:, None])
+    rso = (0.75 + 2e-5 * alt) * ra
+    sunny = np.clip(np.where(wet, 0.45, 0.72) + _ar1(rng, shape, 0.5, 0.08), 0.2, 0.98)
+    rs = sunny * rso
+
+    tmed = 27.0 - 0.25 * np.abs(lat) - 0.0055 * alt + 0.12 * np.abs(lat) * season
+    tmed = tmed + _ar1(rng, shape, 0.75, 1.3) - 1.0 * wet
+    dtr = 4.0 + 9.0 * sunny + rng.normal(0.0, 0.8, shape)
+    tmax = tmed + 0.55 * dtr
+    tmin = tmed - 0.45 * dtr
+
+    rh_mean = np.clip(92.0 - 40.0 * sunny + 6.0 * wet + _ar1(rng, shape, 0.6, 4.0), 20.0, 100.0)
+    rh_max = np.clip(rh_mean + 10.0 + 0.8 * dtr, rh_mean, 100.0)
+    rh_min = np.clip(rh_mean - 1.6 * dtr, 5.0, rh_mean)
+    wind = np.clip(1.8 + _ar1(rng, shape, 0.6, 0.6), 0.2, None)
+    wind_max = wind * rng.uniform(2.0, 3.5, shape)
+
+    ea = eto.actual_vapour_pressure(tmax, tmin, rh_max=rh_max, rh_min=rh_min)
+    rn = eto.net_radiation(rs, ra, tmax, tmin, ea, alt)
+
+    weather = np.stack([tmed, tmax, tmin, rh_mean, rh_max, rh_min, wind, wind_max, rain, rs, rn], axis=2)
+    weather = _inject_gaps(rng, np.round(weather, 2), gap_rate, years)
+
+    # Stations stacked one after the other, as the long pipeline frames are
+    columns = {"site": np.repeat(list(stations), n_days), "date": np.tile(dates.to_numpy(), n_stations)}
+    for j, col in enumerate(WEATHER):
+        columns[col] = weather[:, :, j].T.ravel()
+    columns[RA_COL] = np.round(ra * eto.MJ_TO_MM, 2).T.ravel()  # Q_0, mm/d like the workbook
+    df = pd.DataFrame(columns)
+
+    site_lat = np.repeat(lat, n_days)
+    site_alt = np.repeat(alt, n_days)
+    methods = eto.compute_eto(df, lat=site_lat, alt_m=site_alt)
+    return pd.concat([df, methods.drop(columns=["site", "date"])], axis=1)
+
+
+def _workbook_headers() -> dict[str, str]:
+    # Standardized name -> first workbook header that maps to it
+    headers: dict[str, str] = {}
+    for source, name in {**WEATHER_COLUMNS, **METHOD_COLUMNS}.items():
+        headers.setdefault(name, source)
+    return headers
+
+
+def write_workbook(daily: pd.DataFrame, stations: dict[str, dict], path: Path) -> Path:
+    # Evapo-layout workbook: one sheet per station, original headers below HEADER_ROWS blank
+    # rows and a day-of-year counter in DIA (restarting each year), readable with
+    # io.read_evapo_sheet(path, sheet, year=<first year>)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    headers = _workbook_headers()
+    with pd.ExcelWriter(path) as writer:
+        for site, part in daily.groupby("site", sort=False):
+            sheet = part.drop(columns="site").assign(date=part["date"].dt.dayofyear)
+            sheet = sheet.rename(columns=headers)
+            sheet.to_excel(writer, sheet_name=stations[site]["sheet"], startrow=HEADER_ROWS, index=False)
+    return path
+
+
+def write_catalog(stations: dict[str, dict], path: Path, source: Path | None = None) -> Path:
+    # Station catalog CSV in the data/stations.csv format
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["id", "sheet", "source", "lat", "lon", "alt_m"])
+        for site, meta in stations.items():
+            writer.writerow([site, meta["sheet"], source or "", meta["lat"], meta["lon"], meta["alt_m"]])
+    return path
+
+
+def write_grid(
+    root: Path,
+    n_lat: int,
+    n_lon: int,
+    years: int,
+    start_year: int = DEFAULT_YEAR,
+    bounds: tuple[float, float, float, float] = (-33.0, 5.0, -74.0, -35.0),
+    seed: int = 0,
+    dtype: str = "float32",
+) -> Path:
+    # Gridded stacks in the gridded.py layout over `bounds` (lat_min, lat_max, lon_min,
+    # lon_max): every cell is a synthetic station without gaps; written one latitude row
+    # at a time into memory-mapped (time, lat, lon) stacks
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    lat = np.round(np.linspace(bounds[1], bounds[0], n_lat), 4)
+    lon = np.round(np.linspace(bounds[2], bounds[3], n_lon), 4)
+    # Smooth relief: a few random bumps up to ~1500 m
+    centers = rng.uniform([bounds[0], bounds[2]], [bounds[1], bounds[3]], (4, 2))
+    elevation = sum(
+        rng.uniform(300.0, 1500.0) * np.exp(-((lat[:, None] - c_lat) ** 2 + (lon[None, :] - c_lon) ** 2) / 40.0)
+        for c_lat, c_lon in centers
+    )
+    elevation = np.round(elevation, 1)
+    dates = np.arange(f"{start_year}-01-01", f"{start_year + years}-01-01", dtype="datetime64[D]")
+    np.save(root / "lat.npy", lat)
+    np.save(root / "lon.npy", lon)
+    np.save(root / "elevation.npy", elevation)
+    np.save(root / "dates.npy", dates)
+
+    names = [name for name in WEATHER if name not in ("wind_max_ms", "rain_mm")]
+    shape = (len(dates), n_lat, n_lon)
+    stacks = {name: np.lib.format.open_memmap(root / f"{name}.npy", mode="w+", dtype=dtype, shape=shape) for name in names}
+    for i in range(n_lat):
+        cells = {f"c{j}": {"lat": float(lat[i]), "alt_m": float(elevation[i, j])} for j in range(n_lon)}
+        row = synthetic_daily(cells, years, start_year, gap_rate=0.0, seed=seed + i)
+        for name in names:
+            stacks[name][:, i, :] = row[name].to_numpy().reshape(n_lon, len(dates)).T
+    for stack in stacks.values():
+        stack.flush()
+    return root
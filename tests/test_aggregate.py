@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.aggregate import monthly_sum, rolling_mean
+
+
+def _series() -> pd.DataFrame:
+    # Two months of daily values with missing days and a NaN value
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2024-01-01", periods=60)
+    df = pd.DataFrame({"date": dates, "tmax_c": rng.normal(30, 3, len(dates))})
+    df.loc[20, "tmax_c"] = np.nan
+    return df.drop(index=[5, 6, 7, 40]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("window", [3, 4, 7, 30])
+@pytest.mark.parametrize("center", [False, True])
+def test_rolling_mean_matches_pandas_offset_windows(window, center):
+    df = _series()
+    ours = rolling_mean(df, [window], ["tmax_c"], center=center, min_count={window: 1})
+    expected = df.set_index("date")["tmax_c"].rolling(f"{window}D", center=center, min_periods=1).mean()
+    np.testing.assert_allclose(ours[f"tmax_c_{window}d"].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_even_centered_window_leans_forward():
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=40), "x": np.arange(40.0)})
+    ours = rolling_mean(df, [30], ["x"], center=True, min_count={30: 1})
+    assert ours["x_30d"].iloc[15] == 15.5
+
+
+def _gappy_months() -> pd.DataFrame:
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", "2024-03-31"), "et": 1.0, "pm": 1.0})
+    df.loc[3, "et"] = np.nan  # unfilled day in January
+    return df.drop(index=40)  # no row for 10 February
+
+
+def test_monthly_sum_masks_incomplete_months_when_asked():
+    totals = monthly_sum(_gappy_months(), ["et", "pm"], complete=True).set_index("month")
+    assert np.isnan(totals.loc["2024-01-01", "et"]) and totals.loc["2024-01-01", "pm"] == 31
+    assert totals.loc["2024-02-01"].isna().all()
+    assert (totals.loc["2024-03-01"] == 31).all()
+
+
+def test_monthly_sum_totals_whatever_is_there_by_default():
+    totals = monthly_sum(_gappy_months(), ["et", "pm"]).set_index("month")
+    assert totals.loc["2024-01-01"].tolist() == [30, 31]
+    assert totals.loc["2024-02-01"].tolist() == [28, 28]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from scripts import cli, pipeline, synthetic
+from scripts.commands import all as all_command
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    # Three synthetic stations in one workbook; the catalog points the second at a sheet
+    # the workbook does not have. Outputs go to tmp_path and figures are skipped.
+    sites = synthetic.synthetic_stations(3, seed=2)
+    workbook = synthetic.write_workbook(synthetic.synthetic_daily(sites, 1, seed=2), sites, tmp_path / "evapo.xlsx")
+    broken = list(sites)[1]
+    sites[broken] = {**sites[broken], "sheet": "NoSuchSheet"}
+    catalog = synthetic.write_catalog(sites, tmp_path / "stations.csv")
+    for name in ("OUTPUTS_TABLES", "OUTPUTS_RESULTS", "OUTPUTS_FIGURES", "DATA_STATE"):
+        monkeypatch.setattr(all_command, name, tmp_path / name.lower())
+    monkeypatch.setattr(pipeline, "write_plots", lambda pipe, output_dir, **kwargs: None)
+    return tmp_path, workbook, catalog, list(sites), broken
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_a_failing_station_does_not_stop_the_others(project, workers, capsys):
+    root, workbook, catalog, sites, broken = project
+    argv = ["all", "--input", str(workbook), "--output", str(root / "cleaned"), "--stations", str(catalog)]
+    args = cli.build_parser().parse_args([*argv, "--workers", str(workers), "--no-cache"])
+    assert cli.resolve("all")(args) == 1
+
+    out, err = capsys.readouterr()
+    ok = [line.split()[-1] for line in out.splitlines() if line.startswith("[ok]")]
+    assert ok == [site for site in sites if site != broken]
+    assert "2/3 stations processed" in out
+    assert f"[failed] {broken} (clean)" in err
+    for site in sites:
+        assert (root / "outputs_tables" / f"{site}_qc_summary.csv").exists() == (site != broken)
+        assert (root / "data_state" / site).exists() == (site != broken)
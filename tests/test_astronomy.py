@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from scripts import astronomy, eto
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(astronomy, "_tables", {})
+    return tmp_path
+
+
+def test_station_latitudes_match_the_formulas(cache_dir):
+    lat = np.array([-33.9, -15.8, -3.1, 0.0, 12.5])[:, None]
+    ra, daylength = astronomy.lookup(lat, astronomy.DOYS[None, :], cache_dir=cache_dir)
+    np.testing.assert_array_equal(ra, eto.extraterrestrial_radiation(lat, astronomy.DOYS[None, :]))
+    np.testing.assert_array_equal(daylength, eto.daylight_hours(lat, astronomy.DOYS[None, :]))
+    assert not list(cache_dir.iterdir())  # no table needed
+
+
+def test_many_latitudes_are_interpolated_within_bounds(cache_dir):
+    # Gridded inputs: off-grid latitudes between the polar circles, every day of the year
+    lat = np.random.default_rng(0).uniform(-66.0, 66.0, 500)[:, None]
+    ra, daylength = astronomy.lookup(lat, astronomy.DOYS[None, :], cache_dir=cache_dir)
+    assert np.abs(ra - eto.extraterrestrial_radiation(lat, astronomy.DOYS[None, :])).max() < 1e-4
+    assert np.abs(daylength - eto.daylight_hours(lat, astronomy.DOYS[None, :])).max() < 1e-3
+    assert astronomy.table_path(astronomy.ASTRO_LAT_STEP, cache_dir).exists()
+
+
+def test_cached_table_is_reused(cache_dir):
+    built = astronomy.load_table(cache_dir=cache_dir)
+    astronomy._tables.clear()
+    loaded = astronomy.load_table(cache_dir=cache_dir)
+    assert isinstance(loaded.ra, np.memmap)
+    np.testing.assert_array_equal(loaded.ra, built.ra)
+    np.testing.assert_array_equal(loaded.daylength, built.daylength)
+
+
+@pytest.mark.parametrize("n_lats", [1, 500])
+def test_days_outside_the_year_are_nan(cache_dir, n_lats):
+    lat = np.linspace(-30.0, 10.0, n_lats)[:, None]
+    doy = np.array([0, 1, 366, 367, -5, np.nan])[None, :]
+    ra, daylength = astronomy.lookup(lat, doy, cache_dir=cache_dir)
+    expected = np.array([True, False, False, True, True, True])
+    assert (np.isnan(ra) == expected).all() and (np.isnan(daylength) == expected).all()
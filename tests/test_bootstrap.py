@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from scripts.bootstrap import bootstrap_metrics
+from scripts.metrics import compute_metrics
+
+METHODS = ["a", "b"]
+
+
+def _frame(seed: int, n: int = 365, bias: float = 0.3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ref = 4 + np.sin(np.arange(n) / 58) + rng.normal(0, 0.3, n)
+    frame = pd.DataFrame({"ref": ref, "a": ref + bias + rng.normal(0, 0.5, n), "b": 1.1 * ref})
+    frame.loc[10:14, "a"] = np.nan
+    return frame
+
+
+def test_estimate_is_the_full_sample_score():
+    df = _frame(0)
+    table = bootstrap_metrics(df, "ref", METHODS, n_boot=50).set_index(["method", "metric"])
+    full = compute_metrics(df, "ref", METHODS).set_index("method")
+    for method in METHODS:
+        for metric in ("rmse", "mae", "mbe", "r2", "willmott_d"):
+            assert np.isclose(table.loc[(method, metric), "estimate"], full.loc[method, metric])
+    assert (table["ci_low"] <= table["estimate"]).all() and (table["estimate"] <= table["ci_high"]).all()
+
+
+def test_same_result_for_any_batch_size_and_worker_count():
+    df = _frame(1)
+    one = bootstrap_metrics(df, "ref", METHODS, n_boot=120, seed=7)
+    # ~1 resample per batch, then spread over two processes
+    tiny = bootstrap_metrics(df, "ref", METHODS, n_boot=120, seed=7, chunk_mb=0.01)
+    parallel = bootstrap_metrics(df, "ref", METHODS, n_boot=120, seed=7, chunk_mb=0.1, workers=2)
+    pdt.assert_frame_equal(tiny, one)
+    pdt.assert_frame_equal(parallel, one)
+    assert not one.equals(bootstrap_metrics(df, "ref", METHODS, n_boot=120, seed=8))
+
+
+def test_mean_bias_interval_coverage():
+    # 95% intervals of the mean bias of independent series should cover the true bias
+    # about 95% of the time
+    covered = []
+    for seed in range(200):
+        table = bootstrap_metrics(_frame(seed, n=200), "ref", ["a"], n_boot=300, seed=seed)
+        row = table[table["metric"] == "mbe"].iloc[0]
+        covered.append(row["ci_low"] <= 0.3 <= row["ci_high"])
+    assert 0.88 <= np.mean(covered) <= 0.99
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from pathlib import Path
+import os
+
+import openpyxl
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from scripts import cache, io
+from scripts.cache import SheetCache, sheet_digest, sheet_key
+
+HEADER = ["DIA", "TMAX (oC)", "TMIN (oC)", "Chuva (mm)"]
+
+
+def write_workbook(path: Path, tmax: float = 31.0, other: float = 0.0, date1904: bool = False) -> Path:
+    # Two EVAPO-style sheets: four title rows, then the header and a week of day counters
+    workbook = openpyxl.Workbook()
+    if date1904:
+        workbook.epoch = CALENDAR_MAC_1904
+    for name, base in (("manaus", tmax), ("other", 25.0 + other)):
+        sheet = workbook.create_sheet(name)
+        for _ in range(4):
+            sheet.append(["title"])
+        sheet.append(HEADER)
+        for day in range(1, 8):
+            sheet.append([day, base + day / 10, 22.0, 0.0])
+    del workbook["Sheet"]
+    workbook.save(path)
+    return path
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return write_workbook(tmp_path / "evapo.xlsx")
+
+
+def test_hit_equals_a_fresh_parse(workbook, tmp_path, monkeypatch):
+    store = SheetCache(tmp_path / "cache")
+    first = io.read_evapo_sheet(workbook, "manaus", cache=store)
+
+    def no_parse(*args):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(io, "_parse_evapo_sheet", no_parse)
+    cached = io.read_evapo_sheet(workbook, "manaus", cache=store)
+    monkeypatch.undo()
+    pdt.assert_frame_equal(cached, io.read_evapo_sheet(workbook, "manaus", use_cache=False))
+    pdt.assert_frame_equal(cached, first)
+
+
+def test_editing_the_sheet_invalidates_its_entry(workbook, tmp_path):
+    store = SheetCache(tmp_path / "cache")
+    io.read_evapo_sheet(workbook, "manaus", cache=store)
+    key = sheet_key(workbook, "manaus", 2024)
+
+    write_workbook(workbook, other=1.0)  # another sheet only
+    assert sheet_key(workbook, "manaus", 2024) == key
+    write_workbook(workbook, tmax=33.0)
+    assert sheet_key(workbook, "manaus", 2024) != key
+    edited = io.read_evapo_sheet(workbook, "manaus", cache=store)
+    pdt.assert_frame_equal(edited, io.read_evapo_sheet(workbook, "manaus", use_cache=False))
+    assert edited["tmax_c"].iloc[0] == pytest.approx(33.1)
+
+
+def test_date_system_is_part_of_the_digest(tmp_path):
+    plain = write_workbook(tmp_path / "plain.xlsx")
+    mac = write_workbook(tmp_path / "mac.xlsx", date1904=True)
+    assert sheet_digest(plain, "manaus") != sheet_digest(mac, "manaus")
+
+
+@pytest.mark.parametrize("mapping", ["WEATHER_COLUMNS", "METHOD_COLUMNS"])
+def test_column_mapping_changes_invalidate_entries(workbook, monkeypatch, mapping):
+    key = sheet_key(workbook, "manaus", 2024)
+    monkeypatch.setattr(cache, mapping, {**getattr(cache, mapping), "Extra (mm)": "extra_mm"})
+    assert sheet_key(workbook, "manaus", 2024) != key
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    frame = pd.DataFrame({"x": range(1000)})
+    store = SheetCache(tmp_path / "cache", max_bytes=10**9)
+    paths = [store.put(f"entry{i}", frame) for i in range(4)]
+    for age, path in enumerate(reversed(paths), start=1):
+        os.utime(path, ns=(0, (10_000 - age) * 10**9))  # entry0 oldest
+    store.get("entry0")  # now the most recently used
+
+    size = paths[0].stat().st_size
+    store.max_bytes = 3 * size
+    store.evict()
+    assert sorted(p.stem for p in store._entries()) == ["entry0", "entry2", "entry3"]
+    assert sum(p.stat().st_size for p in store._entries()) <= store.max_bytes
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.calibrate import calibrate
+
+
+@pytest.mark.parametrize("cv", ["month", "kfold"])
+def test_undated_rows_are_left_out_of_the_folds(cv):
+    rng = np.random.default_rng(0)
+    dates = pd.Series(pd.date_range("2024-01-01", periods=120))
+    ref = rng.uniform(2, 6, len(dates))
+    df = pd.DataFrame({"date": dates, "ref": ref, "m": 1.2 * ref})
+    undated = df.assign(date=df["date"].where(df.index % 10 != 0))
+
+    table = calibrate(undated, "ref", ["m"], cv=cv)
+    expected = calibrate(df[df.index % 10 != 0].reset_index(drop=True), "ref", ["m"], cv=cv)
+    pd.testing.assert_frame_equal(table, expected)
+    assert table.loc[0, "n"] == 108
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from scripts.cleaning import CLIMATOLOGY, INTERPOLATED, MISSING, fill_columns, fill_gaps
+
+
+def _frame(dates, values) -> pd.DataFrame:
+    return pd.DataFrame({"date": pd.to_datetime(dates), "tmax_c": np.asarray(values, dtype=float)})
+
+
+def test_interpolation_weights_follow_calendar_days():
+    # Days 3 and 4 have no row: day 2 lies a quarter of the way from day 1 to day 5
+    df = _frame(["2024-01-01", "2024-01-02", "2024-01-05"], [0.0, np.nan, 4.0])
+    filled, flags = fill_gaps(df)
+    assert filled["tmax_c"].iloc[1] == 1.0
+    assert flags["tmax_c"].iloc[1] == INTERPOLATED
+
+
+def test_gap_length_counts_dates_without_rows():
+    # One missing value inside a 10-day outage with no rows is a long gap, not a 1-row one
+    dates = [*pd.date_range("2024-01-01", "2024-01-10"), pd.Timestamp("2024-01-11"), *pd.date_range("2024-01-21", "2024-01-31")]
+    values = np.arange(len(dates), dtype=float)
+    values[10] = np.nan
+    filled, flags = fill_gaps(_frame(dates, values))
+    assert flags["tmax_c"].iloc[10] != INTERPOLATED
+
+
+def test_short_gaps_across_missing_rows_are_still_interpolated():
+    dates = ["2024-01-01", "2024-01-02", "2024-01-04", "2024-01-05"]
+    filled, flags = fill_gaps(_frame(dates, [1.0, np.nan, np.nan, 5.0]))
+    np.testing.assert_allclose(filled["tmax_c"], [1.0, 2.0, 4.0, 5.0])
+    assert (flags["tmax_c"].iloc[1:3] == INTERPOLATED).all()
+
+
+def test_single_year_gets_climatology_for_a_week_long_gap():
+    dates = pd.date_range("2024-01-01", "2024-12-31")
+    values = 25 + 5 * np.sin(np.arange(len(dates)) / 58.0)
+    values[100:107] = np.nan
+    filled, flags = fill_gaps(_frame(dates, values))
+    assert (flags["tmax_c"].iloc[100:107] == CLIMATOLOGY).all()
+    assert filled["tmax_c"].iloc[100:107].notna().all()
+
+
+def test_gaps_are_filled_per_station():
+    df = pd.concat(
+        [
+            _frame(["2024-01-01", "2024-01-02"], [1.0, np.nan]).assign(site="a"),
+            _frame(["2024-01-01", "2024-01-02"], [np.nan, 9.0]).assign(site="b"),
+        ],
+        ignore_index=True,
+    )
+    filled, flags = fill_gaps(df, ["tmax_c"])
+    np.testing.assert_allclose(filled["tmax_c"], [1.0, 1.0, 9.0, 9.0])
+    assert not (flags["tmax_c"] == MISSING).any()
+
+
+def test_only_weather_columns_are_filled_by_default():
+    # Spreadsheet helpers (T_med) and ingest counts (n_temp) are kept as read
+    df = _frame(["2024-01-01", "2024-01-02", "2024-01-03"], [1.0, np.nan, 3.0])
+    df["T_med"] = [20.0, np.nan, 22.0]
+    df["n_temp"] = [24.0, np.nan, 24.0]
+    df["rain_mm"] = [0.0, np.nan, 1.0]
+    assert fill_columns(df) == ["tmax_c", "rain_mm"]
+    filled, flags = fill_gaps(df)
+    assert filled["tmax_c"].iloc[1] == 2.0
+    assert filled[["T_med", "n_temp", "rain_mm"]].iloc[1].isna().all()
+    assert list(flags.columns) == ["tmax_c", "rain_mm"]
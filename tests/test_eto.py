@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from scripts import eto
+
+
+def _year(start: str, periods: int) -> dict:
+    dates = pd.date_range(start, periods=periods)
+    day = np.arange(periods)
+    tmean = 22 + 4 * np.sin(2 * np.pi * day / 365)
+    return {
+        "year": dates.year.to_numpy(),
+        "month": dates.month.to_numpy(),
+        "daylength": np.full(periods, 12.0),
+        "tmean": tmean,
+        "tmax": tmean + 5,
+        "tmin": tmean - 5,
+    }
+
+
+def test_thornthwaite_needs_twelve_months_for_the_heat_index():
+    data = _year("2023-07-01", 549)  # Jul 2023 - Dec 2024
+    values = eto.thornthwaite(data["tmean"], data["year"], data["month"], data["daylength"])
+    partial = data["year"] == 2023
+    assert np.isnan(values[partial]).all()
+    assert np.isfinite(values[~partial]).all()
+
+
+def test_thornthwaite_camargo_heat_index_from_mean_temperature():
+    data = _year("2024-01-01", 366)
+    tef = eto.effective_temperature(data["tmax"], data["tmin"])
+    args = (data["year"], data["month"], data["daylength"])
+    camargo = eto.thornthwaite(tef, *args, t_index=data["tmean"])
+
+    # Same monthly term as Thornthwaite on Tef, with I and a of the mean temperature
+    t_month = pd.Series(data["tmean"]).groupby(data["month"]).mean()
+    tef_month = pd.Series(tef).groupby(data["month"]).mean()
+    heat_index = ((t_month / 5) ** 1.514).sum()
+    a = 6.75e-7 * heat_index**3 - 7.71e-5 * heat_index**2 + 1.792e-2 * heat_index + 0.49239
+    expected = 16 * (10 * tef_month / heat_index) ** a
+    expected = expected.where(tef_month < 26.5, -415.85 + 32.24 * tef_month - 0.43 * tef_month**2)
+    np.testing.assert_allclose(camargo, (expected / 30).to_numpy()[data["month"] - 1], rtol=1e-12)
+    assert not np.allclose(camargo, eto.thornthwaite(tef, *args))
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import eto, gridded, synthetic
+
+METHODS = list(eto.METHODS)
+
+
+@pytest.fixture(scope="module")
+def grid_dir(tmp_path_factory) -> Path:
+    return synthetic.write_grid(tmp_path_factory.mktemp("grid"), n_lat=3, n_lon=4, years=2, seed=1)
+
+
+def _cell_eto(grid: gridded.Grid, i: int, j: int) -> pd.DataFrame:
+    # One cell as a station: its float32 inputs through compute_eto
+    frame = pd.DataFrame({"date": grid.dates})
+    for name in grid.variables:
+        frame[name] = np.asarray(grid.stack(name)[:, i, j], dtype=float)
+    return eto.compute_eto(frame, lat=float(grid.lat[i]), alt_m=float(grid.elevation[i, j]), methods=METHODS)
+
+
+def test_every_cell_matches_compute_eto(grid_dir, tmp_path):
+    # A budget of a few cells per tile: tiles split latitude rows
+    summary = gridded.run_grid(grid_dir, tmp_path / "out", tile_mb=0.5)
+    assert summary["tiles"] > 2
+    grid = gridded.open_grid(grid_dir)
+    for i in range(len(grid.lat)):
+        for j in range(len(grid.lon)):
+            expected = _cell_eto(grid, i, j)
+            for method in METHODS:
+                out = np.load(tmp_path / "out" / f"{method}.npy", mmap_mode="r")[:, i, j]
+                np.testing.assert_allclose(out, expected[method].to_numpy(), rtol=1e-6, atol=1e-6, equal_nan=True)
+
+
+def test_tiling_does_not_change_results(grid_dir, tmp_path):
+    gridded.run_grid(grid_dir, tmp_path / "small", tile_mb=0.5)
+    gridded.run_grid(grid_dir, tmp_path / "large", tile_mb=64)
+    for method in METHODS:
+        small, large = (np.load(tmp_path / name / f"{method}.npy") for name in ("small", "large"))
+        np.testing.assert_array_equal(small, large)
+
+
+def _fake_grid(n_lat: int, n_lon: int, start: str, end: str) -> gridded.Grid:
+    # plan_tiles only looks at the axes
+    dates = np.arange(start, end, dtype="datetime64[D]")
+    lat, lon = np.linspace(5, -33, n_lat), np.linspace(-74, -35, n_lon)
+    return gridded.Grid(Path("."), ["tmax_c"], lat, lon, np.zeros((n_lat, n_lon)), dates)
+
+
+@pytest.mark.parametrize("tile_mb", [0.05, 1.0, 8.0, 256.0])
+def test_tiles_cover_the_grid_within_budget_and_years(tile_mb, monkeypatch):
+    monkeypatch.setattr(gridded, "ASTRO_EXACT_MAX_LATS", 16)
+    grid = _fake_grid(40, 30, "2023-07-01", "2026-03-01")
+    tiles = gridded.plan_tiles(grid, tile_mb)
+
+    covered = np.zeros(grid.shape, dtype=np.int64)
+    years = grid.dates.astype("datetime64[Y]")
+    for tile in tiles:
+        covered[tile.time, tile.rows, tile.cols] += 1
+        assert len(set(years[tile.time])) == 1
+        n_cells = (tile.rows.stop - tile.rows.start) * (tile.cols.stop - tile.cols.start)
+        assert n_cells == 1 or n_cells * 366 * gridded.BYTES_PER_CELL_DAY <= tile_mb * 2**20
+        assert tile.rows.stop - tile.rows.start <= 16
+    assert (covered == 1).all()
+    # Year boundaries: the partial first and last years are tiles of their own
+    starts = sorted({tile.time.start for tile in tiles})
+    assert [str(grid.dates[s]) for s in starts] == ["2023-07-01", "2024-01-01", "2025-01-01", "2026-01-01"]
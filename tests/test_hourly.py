@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from scripts import hourly
+from scripts.pipeline import SitePipeline
+
+SITE = {"lat": -22.7, "lon": -47.6, "alt_m": 546.0, "utc_offset": -3}
+HEADER = [
+    "Data",
+    "Hora UTC",
+    "PRECIPITAÇÃO TOTAL, HORÁRIO (mm)",
+    "RADIACAO GLOBAL (Kj/m²)",
+    "TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)",
+    "UMIDADE RELATIVA DO AR, HORARIA (%)",
+    "VENTO, VELOCIDADE HORARIA (m/s)",
+]
+
+
+def write_inmet(path: Path, hours: int = 96, drop: tuple[int, ...] = (60,)) -> pd.DataFrame:
+    # INMET-style hourly file: 8 metadata lines, ';' separated, ',' decimals, latin-1
+    rng = np.random.default_rng(0)
+    time = pd.date_range("2024-01-01 00:00", periods=hours, freq="h")
+    local = (time.hour - 3) % 24
+    frame = pd.DataFrame(
+        {
+            "time": time,
+            "rain": rng.choice([0.0, 0.0, 1.2], hours),
+            "rad": np.where(local < 5, -9999, np.where((local >= 6) & (local <= 18), rng.uniform(500, 3000, hours), 0)),
+            "temp": 24 + 6 * np.sin((local - 9) / 24 * 2 * np.pi),
+            "rh": rng.uniform(50, 95, hours).round(0),
+            "wind": rng.uniform(0.5, 4.0, hours).round(1),
+        }
+    ).drop(index=list(drop))
+    lines = [f"META{i}:;x" for i in range(8)] + [";".join(HEADER) + ";"]
+    for row in frame.itertuples():
+        values = [row.rain, row.rad, row.temp, row.rh, row.wind]
+        lines.append(
+            ";".join(
+                [row.time.strftime("%Y/%m/%d"), row.time.strftime("%H00 UTC")]
+                + [f"{v:.4f}".replace(".", ",") for v in values]
+            )
+            + ";"
+        )
+    path.write_text("\n".join(lines) + "\n", encoding="latin-1")
+    return frame
+
+
+def test_chunked_ingest_matches_one_chunk(tmp_path):
+    path = tmp_path / "inmet.csv"
+    write_inmet(path)
+    one = hourly.ingest_hourly([path], SITE, chunk_rows=10_000, hourly_eto=True)
+    # 7-row chunks put chunk edges inside every local day
+    chunked = hourly.ingest_hourly([path], SITE, chunk_rows=7, hourly_eto=True)
+    pdt.assert_frame_equal(chunked, one)
+
+    # 96 UTC hours at UTC-3: 4 h on the first local day, then 24, 24, 24 (one hour dropped), 20
+    assert one["hours"].tolist() == [4, 24, 24, 23, 20]
+    assert one["n_temp"].tolist() == [4, 24, 24, 23, 20]
+    # Hourly ETo needs a Rs/Rso ratio from an earlier daylight hour, so the first full day has none
+    assert one["et_pm_hourly"].notna().tolist() == [False, False, True, False, False]
+
+
+def test_daily_wind_is_converted_to_2m(tmp_path):
+    path = tmp_path / "inmet.csv"
+    frame = write_inmet(path)
+    daily = hourly.ingest_hourly([path], SITE)
+    local_day = (frame["time"] - pd.Timedelta(hours=3, minutes=1)).dt.normalize()
+    mean_10m = frame.groupby(local_day)["wind"].mean().to_numpy()
+    np.testing.assert_allclose(daily["wind_mean_ms"], mean_10m * 4.87 / np.log(67.8 * 10 - 5.42))
+
+
+def test_pipeline_reads_the_ingested_daily_csv(tmp_path):
+    path = tmp_path / "inmet.csv"
+    write_inmet(path, hours=24 * 40)
+    daily_path = tmp_path / "site_daily.csv"
+    hourly.ingest_hourly([path], SITE).to_csv(daily_path, index=False)
+
+    pipe = SitePipeline("site", {**SITE, "sheet": "site", "source": daily_path})
+    raw = pipe.get("raw")
+    assert pd.api.types.is_datetime64_any_dtype(raw["date"])
+    assert raw["date"].iloc[1] == pd.Timestamp("2024-01-01")
+    assert len(pipe.get("daily")) == len(raw)
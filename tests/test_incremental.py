@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from scripts import cleaning, incremental, qc, synthetic
+
+# An incremental update must give exactly what a full rebuild of the same observations gives
+
+
+@pytest.fixture(scope="module")
+def station():
+    stations = synthetic.synthetic_stations(1, seed=3)
+    (meta,) = stations.values()
+    observed = synthetic.synthetic_daily(stations, 2, gap_rate=0.03, seed=3).drop(columns="site")
+    return meta, observed
+
+
+def assert_matches_rebuild(state: incremental.SiteState, observed: pd.DataFrame, meta: dict) -> None:
+    rebuilt = incremental.build_state(observed, meta)
+    for name in incremental.SiteState.FRAMES:
+        pdt.assert_frame_equal(
+            getattr(state, name).reset_index(drop=True),
+            getattr(rebuilt, name).reset_index(drop=True),
+            check_exact=False,
+            rtol=1e-9,
+            obj=name,
+        )
+    for ours, theirs in zip(incremental.site_metrics(state), incremental.site_metrics(rebuilt)):
+        pdt.assert_frame_equal(ours, theirs, check_exact=False, rtol=1e-9)
+    assert incremental.compare_with_rebuild(state, meta) == []
+
+
+def test_append_rows(station):
+    meta, observed = station
+    state = incremental.build_state(observed.iloc[:400], meta)
+    state, summary = incremental.update_state(state, observed.iloc[400:], meta)
+    assert summary["rows"] == len(observed) - 400
+    assert_matches_rebuild(state, observed, meta)
+
+
+def test_append_in_several_updates(station):
+    meta, observed = station
+    state = incremental.build_state(observed.iloc[:300], meta)
+    for start in range(300, len(observed), 60):
+        state, _ = incremental.update_state(state, observed.iloc[start : start + 60], meta)
+    assert_matches_rebuild(state, observed, meta)
+
+
+def test_append_across_a_gap(station):
+    # Twenty days without rows between the stored series and the new rows
+    meta, observed = station
+    kept = pd.concat([observed.iloc[:300], observed.iloc[320:]], ignore_index=True)
+    state = incremental.build_state(observed.iloc[:300], meta)
+    state, _ = incremental.update_state(state, observed.iloc[320:], meta)
+    assert_matches_rebuild(state, kept, meta)
+
+
+def test_edit_mid_series_value(station):
+    meta, observed = station
+    state = incremental.build_state(observed, meta)
+    edit = observed.iloc[[250]].copy()
+    edit["tmax_c"] += 2.5
+    edit["et_penman_monteith"] *= 1.1
+    state, summary = incremental.update_state(state, edit, meta)
+    assert summary["start"] is not None and summary["start"] <= 250
+    edited = observed.copy()
+    edited.iloc[[250]] = edit
+    assert_matches_rebuild(state, edited, meta)
+
+
+def test_resent_rows_change_nothing(station):
+    meta, observed = station
+    state = incremental.build_state(observed, meta)
+    updated, summary = incremental.update_state(state, observed.iloc[100:110], meta)
+    assert summary["start"] is None
+    assert_matches_rebuild(updated, observed, meta)
+
+
+def test_qc_and_gap_filling_see_a_window(station, monkeypatch):
+    # Appending a week runs QC and gap filling over the rows near it, not the whole series
+    meta, observed = station
+    state = incremental.build_state(observed.iloc[:-7], meta)
+    seen = []
+    run_qc, fill_gaps = qc.run_qc, cleaning.fill_gaps
+    monkeypatch.setattr(qc, "run_qc", lambda df, **kw: seen.append(len(df)) or run_qc(df, **kw))
+    monkeypatch.setattr(cleaning, "fill_gaps", lambda df, *a: seen.append(len(df)) or fill_gaps(df, *a))
+    state, _ = incremental.update_state(state, observed.iloc[-7:], meta)
+    assert len(seen) == 2 and max(seen) < 60
+    monkeypatch.undo()
+    assert_matches_rebuild(state, observed, meta)
+
+
+def test_new_column_rebuilds(station):
+    meta, observed = station
+    state = incremental.build_state(observed.iloc[:400], meta)
+    extra = observed.iloc[400:].assign(insolation_h=8.0)
+    state, summary = incremental.update_state(state, extra, meta)
+    assert summary["start"] == 0
+    assert_matches_rebuild(state, pd.concat([observed.iloc[:400], extra], ignore_index=True), meta)
+
+
+def test_unfilled_helper_columns_are_kept_as_read(station):
+    # A spreadsheet helper column is not gap filled, in the state as in a rebuild
+    meta, observed = station
+    observed = observed.assign(T_med=observed["tmax_c"].where(observed.index % 7 != 0))
+    state = incremental.build_state(observed.iloc[:400], meta)
+    state, _ = incremental.update_state(state, observed.iloc[400:], meta)
+    edit = observed.iloc[[250]].copy()
+    edit["T_med"] = float("nan")
+    state, summary = incremental.update_state(state, edit, meta)
+    assert summary["changed"] == 1
+    edited = observed.copy()
+    edited.iloc[[250]] = edit
+    assert_matches_rebuild(state, edited, meta)
+    assert state.daily["T_med"].isna().sum() == edited["T_med"].isna().sum()
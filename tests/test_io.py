@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from scripts.io import infer_day_counter_dates
+
+
+def _counters(*months: range) -> pd.Series:
+    return pd.Series([d for month in months for d in month], dtype=float)
+
+
+def test_day_of_month_counters_roll_over_months():
+    dates, ambiguous = infer_day_counter_dates(_counters(range(1, 32), range(1, 30), range(1, 32)), 2024)
+    expected = pd.date_range("2024-01-01", "2024-03-31")
+    assert (dates.to_numpy() == expected.to_numpy()).all()
+    assert not ambiguous.any()
+
+
+def test_mistyped_counter_is_not_a_month_rollover():
+    values = _counters(range(1, 32), range(1, 30))
+    values.iloc[14] = 4  # 15 January typed as 4
+    dates, ambiguous = infer_day_counter_dates(values, 2024)
+    assert (dates.to_numpy() == pd.date_range("2024-01-01", "2024-02-29").to_numpy()).all()
+    assert list(np.flatnonzero(ambiguous)) == [14]
+
+
+def test_mistyped_counter_above_the_month_keeps_day_of_month_counting():
+    values = _counters(range(1, 32), range(1, 30))
+    values.iloc[40] = 91  # 10 February typed as 91
+    dates, ambiguous = infer_day_counter_dates(values, 2024)
+    assert (dates.to_numpy() == pd.date_range("2024-01-01", "2024-02-29").to_numpy()).all()
+    assert list(np.flatnonzero(ambiguous)) == [40]
+
+
+def test_typo_without_room_for_repair_is_missing_and_flagged():
+    # 14, 3, 20: the sequence continues but the typo's own day is unknown
+    values = pd.Series([12.0, 13, 14, 3, 20, 21])
+    dates, ambiguous = infer_day_counter_dates(values, 2024)
+    assert pd.isna(dates.iloc[3]) and ambiguous.iloc[3]
+    assert dates.iloc[4] == pd.Timestamp("2024-01-20")
+
+
+def test_day_of_year_counters_over_two_years():
+    values = _counters(range(1, 367), range(1, 11))
+    dates, ambiguous = infer_day_counter_dates(values, 2024)
+    assert dates.iloc[-1] == pd.Timestamp("2025-01-10")
+    assert not ambiguous.any()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from scripts.metrics import MetricsAccumulator, compute_metrics, group_keys, grouped_metrics, score_chunks
+
+METHODS = ["a", "b", "c"]
+
+
+@pytest.fixture(scope="module")
+def series() -> pd.DataFrame:
+    rng = np.random.default_rng(6)
+    ref = 4.0 + np.sin(np.arange(1000) / 58.0) + rng.normal(0, 0.3, 1000)
+    df = pd.DataFrame({"ref": ref, "a": ref * 1.1, "b": ref + rng.normal(0.2, 0.5, 1000), "c": 3.0 + 0 * ref})
+    df.loc[rng.random(1000) < 0.05, "ref"] = np.nan
+    df.loc[rng.random(1000) < 0.1, "b"] = np.nan
+    return df
+
+
+def _assert_scores_equal(ours: pd.DataFrame, theirs: pd.DataFrame) -> None:
+    pdt.assert_frame_equal(
+        ours.reset_index(drop=True), theirs.reset_index(drop=True), check_exact=False, rtol=1e-13, atol=1e-15
+    )
+
+
+def test_merged_chunk_states_equal_compute_metrics(series):
+    bounds = [0, 1, 130, 131, 400, 777, 1000]  # uneven, with single-row chunks
+    chunks = [series.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+    # Pass 1 per chunk, stored and reloaded as state tables, merged in reverse order
+    states = [
+        MetricsAccumulator(METHODS).update(chunk["ref"].to_numpy(), chunk[METHODS].to_numpy()).to_state()
+        for chunk in chunks
+    ]
+    merged = MetricsAccumulator(METHODS)
+    for state in reversed(states):
+        merged.merge(MetricsAccumulator.from_state(state, METHODS))
+
+    # Pass 2 per chunk against the merged reference mean, as workers would
+    for chunk in chunks:
+        merged.merge(merged.fresh_agreement().update_agreement(chunk["ref"].to_numpy(), chunk[METHODS].to_numpy()))
+
+    _assert_scores_equal(merged.to_frame(), compute_metrics(series, "ref", METHODS))
+
+
+def test_score_chunks_equals_compute_metrics(series):
+    def chunks():
+        return (series.iloc[start : start + 97] for start in range(0, len(series), 97))
+
+    _assert_scores_equal(score_chunks(chunks, "ref", METHODS), compute_metrics(series, "ref", METHODS))
+
+
+def test_compute_metrics_matches_the_reference_formulas(series):
+    scores = compute_metrics(series, "ref", METHODS).set_index("method")
+    for method in METHODS:
+        pair = series[["ref", method]].dropna()
+        o, p = pair["ref"].to_numpy(), pair[method].to_numpy()
+        assert scores.loc[method, "rmse"] == pytest.approx(np.sqrt(np.mean((p - o) ** 2)), rel=1e-12)
+        assert scores.loc[method, "mbe"] == pytest.approx(np.mean(p - o), rel=1e-12)
+    assert np.isnan(scores.loc["c", "r2"])  # constant prediction
+
+
+def _group_reference(part: pd.DataFrame) -> pd.DataFrame:
+    # One group scored on its own (a single series: no 'site' column), with its pair counts
+    scores = compute_metrics(part.drop(columns="site"), "ref", ["a", "b"])
+    scores.insert(1, "n", [int((part["ref"].notna() & part[m].notna()).sum()) for m in ("a", "b")])
+    return scores
+
+
+@pytest.mark.parametrize("group_by", [["month"], ["season"], ["year"], ["year", "season"], ["site", "month"]])
+def test_grouped_metrics_match_a_groupby_reference(group_by):
+    rng = np.random.default_rng(7)
+    n = 3 * 365
+    ref = 4.0 + np.sin(np.arange(n) / 58.0) + rng.normal(0, 0.3, n)
+    df = pd.DataFrame({"date": pd.date_range("2021-01-01", periods=n), "site": np.where(np.arange(n) % 2, "x", "y")})
+    df["ref"] = np.where(rng.random(n) < 0.05, np.nan, ref)
+    df["a"] = ref * 1.1
+    df["b"] = np.where(rng.random(n) < 0.1, np.nan, ref + rng.normal(0.2, 0.5, n))
+
+    keys = group_keys(df, group_by)
+    reference = (
+        df.groupby([keys[key] for key in group_by], sort=True)
+        .apply(_group_reference, include_groups=False)
+        .reset_index(level=-1, drop=True)
+        .reset_index()
+    )
+    ours = grouped_metrics(df, "ref", ["a", "b"], group_by)
+    pdt.assert_frame_equal(ours, reference, check_exact=False, rtol=1e-12, atol=1e-14, check_dtype=False)
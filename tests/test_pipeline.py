@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from scripts.pipeline import SitePipeline, _by_site
+
+
+def test_long_mode_keeps_all_nan_columns_a_station_has():
+    dates = pd.date_range("2024-01-01", periods=3)
+    a = pd.DataFrame({"date": dates, "tmax_c": 30.0, "rs_mj": np.nan})  # sensor down all period
+    b = pd.DataFrame({"date": dates, "tmax_c": 28.0, "tef": 25.0})
+    daily = pd.concat([a.assign(site="a"), b.assign(site="b")], ignore_index=True)
+    pipe = SitePipeline.from_long_daily({"a": {}, "b": {}}, daily, {"a": list(a.columns), "b": list(b.columns)})
+
+    parts = dict(_by_site(pipe, daily))
+    assert list(parts["a"].columns) == list(a.columns)
+    assert list(parts["b"].columns) == list(b.columns)
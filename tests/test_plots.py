@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import plots
+
+pytest.importorskip("matplotlib")
+
+
+def _job(tmp_path, ref: np.ndarray) -> plots.FigureJob:
+    data = pd.DataFrame({"pm": ref, "hs": np.linspace(1.0, 5.0, len(ref))})
+    params = {"ref_col": "pm", "method_cols": ["hs"], "title": "Taylor"}
+    return plots.FigureJob("taylor", data, tmp_path / "taylor.png", params)
+
+
+def test_digest_round_trips_through_the_png(tmp_path):
+    job = _job(tmp_path, np.linspace(2.0, 6.0, 30))
+    assert plots.render_figures([job]) == (1, 0)
+    assert plots.stored_digest(job.output_path) == job.digest()
+    assert plots.render_figures([job]) == (0, 1)
+
+
+def test_taylor_without_reference_is_rendered_once(tmp_path):
+    job = _job(tmp_path, np.full(30, np.nan))
+    assert plots.render_figures([job]) == (1, 0)
+    assert job.output_path.exists()
+    assert plots.render_figures([job]) == (0, 1)
+
+
+def test_stored_digest_of_missing_or_foreign_files(tmp_path):
+    assert plots.stored_digest(tmp_path / "missing.png") is None
+    other = tmp_path / "other.png"
+    other.write_bytes(b"not a png")
+    assert plots.stored_digest(other) is None
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from time import process_time, sleep
+import json
+import pstats
+
+import pandas as pd
+import pytest
+
+from scripts import profiling
+from scripts.profiling import FIELDS, Profiler
+
+
+def _spin(seconds: float) -> None:
+    # Burn CPU time (sleep would only count as wall time)
+    end = process_time() + seconds
+    while process_time() < end:
+        pass
+
+
+def test_nested_calls_are_charged_exclusive_time():
+    profiler = Profiler()
+
+    def stage() -> pd.DataFrame:
+        sleep(0.1)
+        _spin(0.1)
+        return pd.DataFrame({"x": range(7)})
+
+    def sink() -> None:
+        # A sink that triggers a stage computation, like writing outputs of an uncomputed stage
+        profiler.call("manaus", "stage", "daily", stage)
+        sleep(0.02)
+
+    profiler.call("manaus", "sink", "write", sink)
+    inner, outer = profiler.records
+    assert (inner["kind"], inner["stage"], outer["kind"], outer["stage"]) == ("stage", "daily", "sink", "write")
+    assert inner["wall_s"] >= 0.2 and inner["cpu_s"] >= 0.1
+    assert 0.02 <= outer["wall_s"] < 0.1
+    assert outer["cpu_s"] < 0.05
+    assert not profiler._stack
+
+
+def test_rows_come_from_frames_or_the_callback():
+    profiler = Profiler()
+    small, large = pd.DataFrame({"x": range(3)}), pd.DataFrame({"x": range(40)})
+    profiler.call("a", "stage", "join", lambda left, right: left, small, large)
+    profiler.call("a", "stage", "make", lambda: large)
+    profiler.call("a", "sink", "write", lambda: None, rows=lambda: 12)
+    profiler.call("a", "sink", "noop", lambda: None)
+    assert [record["rows"] for record in profiler.records] == [40, 40, 12, 0]
+    assert profiler.records[-1]["rows_per_s"] in (0.0, None)
+
+
+def test_failing_call_propagates_and_leaves_the_stack_clean():
+    profiler = Profiler()
+
+    def broken() -> None:
+        raise ValueError("bad sheet")
+
+    with pytest.raises(ValueError):
+        profiler.call("a", "sink", "outer", lambda: profiler.call("a", "stage", "inner", broken))
+    assert not profiler._stack and not profiler.records
+    profiler.call("a", "stage", "after", lambda: None)
+    assert [record["stage"] for record in profiler.records] == ["after"]
+
+
+def test_dumps_one_profile_per_call(tmp_path):
+    profiler = Profiler(tmp_path / "prof")
+
+    def inner() -> None:
+        _spin(0.01)
+
+    profiler.call("manaus", "sink", "write", lambda: profiler.call("manaus", "stage", "daily", inner))
+    dumps = sorted(path.name for path in (tmp_path / "prof").iterdir())
+    assert dumps == ["manaus_sink_write.prof", "manaus_stage_daily.prof"]
+    # The caller's profile is paused while the nested call runs: _spin shows up in the stage only
+    spun = {}
+    for name in dumps:
+        spun[name] = any(func[2] == "_spin" for func in pstats.Stats(str(tmp_path / "prof" / name)).stats)
+    assert spun == {"manaus_sink_write.prof": False, "manaus_stage_daily.prof": True}
+
+
+def _records() -> list[dict]:
+    rows = [
+        ("manaus", "stage", "daily", 0.5),
+        ("manaus", "sink", "plots", 2.0),
+        ("belem", "stage", "daily", 1.0),
+        ("belem", "sink", "plots", 0.25),
+        ("belem", "stage", "metrics", 0.1),
+    ]
+    return [
+        {"site": site, "kind": kind, "stage": stage, "wall_s": wall, "cpu_s": wall / 2, "peak_rss_mb": 100.0,
+         "rows": 10, "rows_per_s": 10 / wall}
+        for site, kind, stage, wall in rows
+    ]
+
+
+def test_csv_report(tmp_path):
+    path = tmp_path / "report" / "profile.csv"
+    profiling.write_report(_records(), path)
+    table = pd.read_csv(path)
+    assert list(table.columns) == list(FIELDS)
+    assert table["wall_s"].tolist() == [0.5, 2.0, 1.0, 0.25, 0.1]
+
+
+def test_json_report(tmp_path):
+    path = tmp_path / "profile.json"
+    profiling.write_report(_records(), path)
+    assert json.loads(path.read_text(encoding="utf-8")) == _records()
+
+
+def test_slowest_sums_over_sites():
+    table = profiling.slowest(_records(), n=2)
+    assert table[["kind", "stage"]].values.tolist() == [["sink", "plots"], ["stage", "daily"]]
+    assert table["wall_s"].tolist() == [2.25, 1.5]
+    assert table["rows"].tolist() == [20, 20]
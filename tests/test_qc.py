@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from scripts import astronomy
+from scripts.qc import CONSISTENCY, PERSISTENCE, RADIATION, RANGE, STEP, mask_failed, run_qc
+
+
+def _frame(n: int = 10, start: str = "2024-01-01", **cols) -> pd.DataFrame:
+    df = pd.DataFrame({"date": pd.date_range(start, periods=n)})
+    for col, values in cols.items():
+        df[col] = np.asarray(values, dtype=float)
+    return df
+
+
+def _ramp(n: int = 10, base: float = 25.0) -> np.ndarray:
+    # Distinct, gently varying values: no check fires
+    return base + 0.3 * np.arange(n)
+
+
+def test_clean_series_passes():
+    df = _frame(tmax_c=_ramp(), tmin_c=_ramp(base=15.0), rh_mean_pct=_ramp(base=60.0))
+    assert (run_qc(df).to_numpy() == 0).all()
+
+
+def test_range():
+    values = _ramp()
+    values[3] = 55.0
+    flags = run_qc(_frame(tmax_c=values))["tmax_c"]
+    assert flags.iloc[3] & RANGE
+    assert (flags.drop(index=3) & RANGE == 0).all()
+
+
+def test_step_flags_the_later_day():
+    values = _ramp()
+    values[5:] += 20.0
+    flags = run_qc(_frame(tmax_c=values))["tmax_c"].to_numpy()
+    assert list(np.flatnonzero(flags & STEP)) == [5]
+
+
+def test_step_ignores_changes_across_missing_dates():
+    # 20 degrees over the three weeks without rows is not a day-to-day jump
+    df = pd.concat([_frame(5, tmax_c=_ramp(5)), _frame(5, "2024-01-27", tmax_c=_ramp(5) + 20.0)], ignore_index=True)
+    assert (run_qc(df)["tmax_c"] & STEP == 0).all()
+
+
+def test_step_does_not_cross_stations():
+    df = pd.concat(
+        [_frame(5, tmax_c=_ramp(5)).assign(site="a"), _frame(5, tmax_c=_ramp(5) + 20.0).assign(site="b")],
+        ignore_index=True,
+    )
+    assert (run_qc(df)["tmax_c"] & STEP == 0).all()
+
+
+def test_persistence_needs_the_configured_run():
+    # QC_PERSISTENCE_DAYS is 5 for tmax_c: four equal values pass, five fail
+    values = _ramp(12)
+    values[1:5] = 30.0
+    values[6:11] = 32.0
+    flags = run_qc(_frame(12, tmax_c=values))["tmax_c"].to_numpy()
+    assert list(np.flatnonzero(flags & PERSISTENCE)) == [6, 7, 8, 9, 10]
+
+
+def test_radiation_above_clear_sky():
+    # Rs may exceed Rso = 0.75 Ra (sea level) by 3%
+    df = _frame(4)
+    ra = astronomy.extraterrestrial_radiation(-15.0, df["date"].dt.dayofyear.to_numpy())
+    df["rad_global_mj_m2_d"] = 0.75 * ra * np.array([0.5, 1.0, 1.02, 1.05])
+    flags = run_qc(df, lat=-15.0)["rad_global_mj_m2_d"].to_numpy()
+    assert list(flags & RADIATION != 0) == [False, False, False, True]
+    # Without a latitude (or Q_0 column) there is no Rso to check against
+    assert (run_qc(df)["rad_global_mj_m2_d"] == 0).all()
+
+
+def test_consistency_flags_both_columns():
+    tmax = _ramp()
+    tmin = _ramp(base=15.0)
+    tmin[2] = tmax[2] + 1.0
+    flags = run_qc(_frame(tmax_c=tmax, tmin_c=tmin))
+    assert list(np.flatnonzero(flags["tmin_c"] & CONSISTENCY)) == [2]
+    assert list(np.flatnonzero(flags["tmax_c"] & CONSISTENCY)) == [2]
+
+
+def test_a_cell_can_fail_several_checks():
+    values = _ramp()
+    values[4] = 60.0
+    assert run_qc(_frame(tmax_c=values))["tmax_c"].iloc[4] == RANGE | STEP
+
+
+def test_mask_failed_sets_failed_cells_missing():
+    values = _ramp()
+    values[3] = 55.0
+    df = _frame(tmax_c=values, rain_mm=np.full(10, 55.0))
+    masked = mask_failed(df, run_qc(df))
+    # The spike fails the range check, the drop back the step check
+    assert list(np.flatnonzero(masked["tmax_c"].isna())) == [3, 4]
+    pd.testing.assert_series_equal(masked["rain_mm"], df["rain_mm"])
+    assert df["tmax_c"].iloc[3] == 55.0  # input untouched
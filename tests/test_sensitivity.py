@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from scripts import eto, sensitivity, synthetic
+from scripts.sensitivity import ErrorModel, parse_error, propagate_errors
+
+
+@pytest.fixture(scope="module")
+def site():
+    stations = synthetic.synthetic_stations(1, seed=4)
+    (meta,) = stations.values()
+    return meta, synthetic.synthetic_daily(stations, 1, gap_rate=0.0, seed=4).drop(columns="site")
+
+
+def _run(site, **kwargs) -> dict[str, pd.DataFrame]:
+    meta, daily = site
+    return propagate_errors(daily, meta["lat"], meta["alt_m"], n_real=12, seed=7, **kwargs)
+
+
+def test_results_do_not_depend_on_chunking_or_workers(site):
+    whole = _run(site)
+    for kwargs in ({"chunk_mb": 0.5}, {"chunk_mb": 0.5, "workers": 2}):
+        for name, table in _run(site, **kwargs).items():
+            pdt.assert_frame_equal(table, whole[name], obj=name)
+
+
+def test_zero_error_reproduces_the_baseline(site):
+    errors = {column: ErrorModel("additive", 0.0) for column in eto.INPUTS}
+    tables = _run(site, errors=errors)
+    eto_table, metrics_table = tables["eto"], tables["metrics"]
+    for col in ("mc_mean", "ci_low", "ci_high"):
+        np.testing.assert_allclose(eto_table[col], eto_table["eto_mean"], rtol=1e-12)
+    assert (eto_table["daily_sd"] < 1e-6).all()  # sqrt of a rounding-level variance
+    defined = metrics_table["estimate"].notna()
+    for col in ("median", "ci_low", "ci_high"):
+        np.testing.assert_allclose(metrics_table.loc[defined, col], metrics_table.loc[defined, "estimate"], rtol=1e-12)
+    assert (tables["ranks"]["share_same_rank"] == 1.0).all()
+
+
+def test_perturbed_inputs_stay_ordered():
+    n = 2000
+    inputs = {
+        "tmin_c": np.full(n, 20.0),
+        "tmed_c": np.full(n, 20.5),
+        "tmax_c": np.full(n, 21.0),
+        "rh_min_pct": np.full(n, 60.0),
+        "rh_max_pct": np.full(n, 61.0),
+    }
+    errors = {column: ErrorModel("additive", 2.0, 1.0) for column in inputs}
+    out = sensitivity._perturb(inputs, errors, np.random.SeedSequence(1).spawn(3))
+    assert (out["tmin_c"] <= out["tmed_c"]).all() and (out["tmed_c"] <= out["tmax_c"]).all()
+    assert (out["rh_min_pct"] <= out["rh_max_pct"]).all()
+    assert (out["tmin_c"] < 20.0).any()  # still perturbed both ways
+
+
+def test_parse_error():
+    assert parse_error("wind_mean_ms=relative:0.1:0.05") == ("wind_mean_ms", ErrorModel("relative", 0.1, 0.05))
+    assert parse_error(" tmax_c = additive:0.3") == ("tmax_c", ErrorModel("additive", 0.3))
+
+
+BAD_SPECS = [
+    "tmax_c",
+    "tmax_c=additive",
+    "tmax_c=gaussian:0.3",
+    "tmax_c=additive:abc",
+    "tmax_c=additive:-1",
+    "tmax_c=additive:1:2:3",
+]
+
+
+@pytest.mark.parametrize("spec", BAD_SPECS)
+def test_parse_error_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_error(spec)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import eto, service
+
+STATIONS = {"manaus": {"lat": -3.1, "alt_m": 72.0}}
+
+
+def _records(n: int, tmax: float = 31.0) -> list[dict]:
+    dates = pd.date_range("2024-01-01", periods=n).strftime("%Y-%m-%d")
+    return [
+        {
+            "date": day,
+            "tmax_c": tmax + i % 3,
+            "tmin_c": 23.0,
+            "rh_mean_pct": 80.0,
+            "wind_mean_ms": 1.5,
+            "rad_global_mj_m2_d": 18.0,
+        }
+        for i, day in enumerate(dates)
+    ]
+
+
+def _expected(records: list[dict], lat: float, alt_m: float) -> list[dict]:
+    # The same request computed on its own
+    result = eto.compute_eto(pd.DataFrame.from_records(records), lat=lat, alt_m=alt_m)
+    out = []
+    for _, row in result.iterrows():
+        values = {m: None if np.isnan(row[m]) else row[m] for m in eto.METHODS}
+        out.append({"date": row["date"].strftime("%Y-%m-%d"), **values})
+    return out
+
+
+async def _post_all(server: service.EtoService, payloads: list[dict]) -> list:
+    batcher = asyncio.ensure_future(server.batcher.run())
+    try:
+        bodies = [json.dumps(payload).encode("utf-8") for payload in payloads]
+        return await asyncio.gather(*(server.eto(body) for body in bodies), return_exceptions=True)
+    finally:
+        batcher.cancel()
+
+
+def test_concurrent_requests_share_one_batch(tmp_path):
+    server = service.EtoService(STATIONS, tmp_path)
+    per_record = [{**record, "lat": -15.8, "alt_m": 1100.0} for record in _records(4)]
+    payloads = [
+        {"site": "manaus", "records": _records(5)},
+        {"lat": -23.5, "records": _records(3, 28.0)},
+        {"records": per_record},
+    ]
+    results = asyncio.run(_post_all(server, payloads))
+
+    assert server.batcher.batches == 1 and server.batcher.rows == 12
+    expected = [
+        _expected(_records(5), -3.1, 72.0),
+        _expected(_records(3, 28.0), -23.5, 0.0),
+        _expected(per_record, -15.8, 1100.0),
+    ]
+    for body, records in zip(results, expected):
+        got = json.loads(body)["records"]
+        assert [r["date"] for r in got] == [r["date"] for r in records]
+        for ours, theirs in zip(got, records):
+            for method in eto.METHODS:
+                assert ours[method] == pytest.approx(theirs[method], rel=1e-12)
+
+
+def test_invalid_request_fails_alone(tmp_path):
+    server = service.EtoService(STATIONS, tmp_path)
+    results = asyncio.run(_post_all(server, [{"site": "manaus", "records": _records(2)}, {"records": _records(2)}]))
+    assert json.loads(results[0])["records"]
+    assert isinstance(results[1], service.HTTPError) and results[1].status == 400
+
+
+def test_request_breaking_the_batch_fails_alone(tmp_path, monkeypatch):
+    compute_eto = eto.compute_eto
+
+    def fragile(df, *args, **kwargs):
+        if (df["tmax_c"] > 90).any():
+            raise FloatingPointError("bad input")
+        return compute_eto(df, *args, **kwargs)
+
+    monkeypatch.setattr(eto, "compute_eto", fragile)
+    server = service.EtoService(STATIONS, tmp_path)
+    payloads = [
+        {"site": "manaus", "records": _records(2)},
+        {"site": "manaus", "records": _records(2, 95.0)},
+        {"lat": 0.0, "records": _records(2)},
+    ]
+    results = asyncio.run(_post_all(server, payloads))
+    assert isinstance(results[1], FloatingPointError)
+    assert json.loads(results[0])["records"] and json.loads(results[2])["records"]
+
+
+def test_http_round_trip(tmp_path):
+    async def main() -> list[bytes]:
+        server = service.EtoService(STATIONS, tmp_path)
+        batcher = asyncio.ensure_future(server.batcher.run())
+        listener = await asyncio.start_server(server.serve_client, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        calls = [
+            ("POST", "/eto", json.dumps({"site": "manaus", "records": _records(2)})),
+            ("POST", "/eto", "{"),
+            ("GET", "/health", ""),
+        ]
+        for method, path, body in calls:
+            writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n{body}".encode("latin-1"))
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            replies.append(head.split(b"\r\n")[0] + b" " + await reader.readexactly(length))
+        writer.close()
+        listener.close()
+        batcher.cancel()
+        return replies
+
+    ok, bad, health = asyncio.run(main())
+    assert ok.startswith(b"HTTP/1.1 200 OK") and b'"records"' in ok
+    assert bad.startswith(b"HTTP/1.1 400 Bad Request")
+    assert json.loads(health.split(b" ", 3)[3])["requests"] == 3
+
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "localhost", "127.0.0.2"])
+def test_loopback_hosts_are_accepted(host):
+    service.require_loopback(host)
+
+
+@pytest.mark.parametrize("host", ["0.0.0.0", "192.0.2.10", "not a host"])
+def test_other_hosts_are_refused(host):
+    with pytest.raises(ValueError):
+        service.require_loopback(host)
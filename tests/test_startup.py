@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from scripts.cli import build_parser
+from scripts.config import STARTUP_BUDGET
+from scripts.startup import forbidden_modules, startup_time
+
+# Every subcommand's handler is loaded in a fresh interpreter: it must not import the modules
+# STARTUP_FORBIDDEN lists for it. Times depend on the machine and are checked against
+# STARTUP_BUDGET by `bench --startup`, not here.
+
+COMMANDS = list(STARTUP_BUDGET)
+
+
+def test_budget_covers_every_subcommand():
+    subparsers = next(a for a in build_parser()._actions if a.dest == "command")
+    assert set(subparsers.choices) | {"--help"} == set(COMMANDS)
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_startup_imports(command):
+    _, loaded = startup_time(command, repeat=1)
+    assert not set(loaded) & set(forbidden_modules(command)), f"{command} imports {loaded}"
+
+
+@pytest.mark.parametrize("command", ["--help", "bench"])
+def test_light_commands_skip_numpy(command):
+    _, loaded = startup_time(command, repeat=1)
+    assert loaded == []
+
+
+def test_handlers_load_only_their_command():
+    # A heavy command loads the pipeline; a light one in the same tree does not
+    _, metrics = startup_time("metrics", repeat=1)
+    _, synth = startup_time("synth", repeat=1)
+    assert "scripts.pipeline" in metrics
+    assert "scripts.pipeline" not in synth and "pandas" in synth
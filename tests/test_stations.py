@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from scripts import stations
+from scripts.config import BASE_DIR, SITES
+
+
+def _catalog(tmp_path: Path, *rows: str) -> Path:
+    path = tmp_path / "stations.csv"
+    path.write_text("\n".join(["id,sheet,source,lat,lon,alt_m,kc", *rows]) + "\n", encoding="utf-8")
+    return path
+
+
+def test_catalog_rows(tmp_path):
+    path = _catalog(
+        tmp_path,
+        "manaus,Manaus,,-3.1019,-60.0164,61.25,",
+        "brasilia,,data/raw/daily/brasilia_daily.csv,-15.79,-47.93,1160,0.9",
+        f"recife,,{tmp_path / 'recife.xlsx'},-8.05,-34.95,10,",
+    )
+    catalog = stations.load_stations(path)
+    assert list(catalog) == ["manaus", "brasilia", "recife"]
+    assert catalog["manaus"] == {"sheet": "Manaus", "lat": -3.1019, "lon": -60.0164, "alt_m": 61.25}
+    # Blank sheet defaults to the id; relative sources resolve from the repository root
+    assert catalog["brasilia"]["sheet"] == "brasilia"
+    assert catalog["brasilia"]["source"] == BASE_DIR / "data/raw/daily/brasilia_daily.csv"
+    assert catalog["brasilia"]["kc"] == "0.9"
+    assert catalog["recife"]["source"] == tmp_path / "recife.xlsx"
+
+
+@pytest.mark.parametrize(
+    "row, message",
+    [
+        (",Manaus,,-3.1,-60.0,61", "line 3: missing \\['id'\\]"),
+        ("belem,,,,-48.5,10", "line 3: missing \\['lat'\\]"),
+        ("belem,,,south,-48.5,10", "line 3: invalid lat"),
+        ("manaus,,,-3.1,-60.0,61", "line 3: duplicated id"),
+    ],
+)
+def test_catalog_errors_name_the_line(tmp_path, row, message):
+    path = _catalog(tmp_path, "manaus,Manaus,,-3.1,-60.0,61,", row)
+    with pytest.raises(ValueError, match=message):
+        stations.load_stations(path)
+
+
+def test_missing_catalog_falls_back_to_sites(tmp_path):
+    catalog = stations.load_stations(tmp_path / "absent.csv")
+    assert catalog == SITES
+    next(iter(catalog.values()))["lat"] = 0.0  # a copy: config stays untouched
+    assert catalog != SITES
+
+
+def test_select_stations():
+    catalog = {"a": {}, "b": {}, "c": {}}
+    assert list(stations.select_stations(catalog, ["c", "a"])) == ["c", "a"]
+    assert stations.select_stations(catalog, None) is catalog
+    with pytest.raises(ValueError, match="Unknown stations"):
+        stations.select_stations(catalog, ["a", "z"])
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from scripts import storage
+
+
+def _daily() -> pd.DataFrame:
+    # Two stations over two years (long frame keyed by site)
+    dates = pd.date_range("2023-12-30", periods=4)
+    frames = [
+        pd.DataFrame({"site": site, "date": dates, "tmax_c": np.arange(4.0) + offset, "rain_mm": [0.0, np.nan, 1.5, 0.0]})
+        for site, offset in (("a", 0.0), ("b", 10.0))
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize("fmt", storage.FORMATS)
+def test_round_trip_with_partition_filters_and_projection(tmp_path, fmt):
+    if fmt == "parquet" and not storage.parquet_available():
+        pytest.skip("pyarrow not installed")
+    daily = _daily()
+    storage.write_dataset(daily, tmp_path, "daily", fmt=fmt)
+    assert (tmp_path / "daily" / "site=a" / "year=2023" / f"part.{fmt}").exists()
+
+    back = storage.read_dataset(tmp_path, "daily")
+    assert isinstance(back["site"].dtype, pd.CategoricalDtype)
+    pdt.assert_frame_equal(back.astype({"site": str}), daily)
+
+    only = storage.read_dataset(tmp_path, "daily", sites=["b"], years=[2024], columns=["date", "tmax_c"])
+    assert list(only.columns) == ["site", "date", "tmax_c"]
+    assert only["site"].astype(str).unique().tolist() == ["b"]
+    assert only["date"].dt.year.unique().tolist() == [2024]
+    assert storage.read_dataset(tmp_path, "daily", sites=["c"]) is None
+
+    assert storage.site_columns(tmp_path, "daily", "a") == ["date", "tmax_c", "rain_mm"]
+    pdt.assert_frame_equal(storage.read_site(tmp_path, "daily", "a"), daily[daily["site"] == "a"].drop(columns="site"))
+
+
+def test_labels_are_stored_as_categoricals_and_rewrites_drop_stale_years(tmp_path):
+    metrics = pd.DataFrame({"method": ["x", "y"], "rmse": [0.5, 0.7]})
+    storage.write_dataset(metrics, tmp_path, "metrics", site="a", fmt="csv")
+    back = storage.read_site(tmp_path, "metrics", "a")
+    assert isinstance(back["method"].dtype, pd.CategoricalDtype)
+    assert back["rmse"].dtype == np.float64
+
+    daily = _daily()
+    storage.write_dataset(daily, tmp_path, "daily", fmt="csv")
+    storage.write_dataset(daily[daily["date"].dt.year == 2024], tmp_path, "daily", fmt="csv")
+    assert storage.read_dataset(tmp_path, "daily")["date"].dt.year.unique().tolist() == [2024]
+
+
+def test_csv_fallback_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "find_spec", lambda name: None)
+    assert storage.default_format() == "csv"
+    storage.write_dataset(_daily(), tmp_path, "daily")
+    assert (tmp_path / "daily" / "site=a" / "year=2024" / "part.csv").exists()
+    back = storage.read_dataset(tmp_path, "daily", columns=["date"])
+    assert pd.api.types.is_datetime64_any_dtype(back["date"])